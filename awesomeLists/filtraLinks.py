@@ -1,3 +1,4 @@
+import argparse
 import json
 import requests
 import os
@@ -7,6 +8,12 @@ from typing import List, Dict, Any
 from urllib.parse import urlparse
 from dotenv import load_dotenv
 
+from awesomeLists.ingestao import canonicalizar_repo
+from src.github_searches.metadata_filter import RepositoryMetadataPrefilter
+from src.github_searches.keyword_filter import RepositoryKeywordScanner
+from src.github_searches.pagination import fetch_pages
+from src.profiling.profiler import profiled_run
+
 
 
 class GitHubPRAnalyzer:
@@ -45,11 +52,14 @@ class GitHubPRAnalyzer:
         self.async_keywords = ["promise", "async"]
     
     def load_repositories(self, json_file: str) -> List[str]:
-        """Carrega lista de repositórios do arquivo JSON"""
+        """Carrega lista de repositórios do arquivo JSON (lista simples ou versão gerada por ingestao.py)"""
         try:
             with open(json_file, 'r') as f:
                 repos = json.load(f)
-            return repos
+            if isinstance(repos, dict):
+                # Versões do ingestao.py ('repositorios') ou saída do keyword_filter ('repositories')
+                repos = repos.get('repositorios') or repos.get('repositories', [])
+            return self.deduplicate_repositories(repos)
         except FileNotFoundError:
             print(f"Arquivo {json_file} não encontrado!")
             return []
@@ -68,19 +78,40 @@ class GitHubPRAnalyzer:
             return owner, repo
         return None, None
     
+    def deduplicate_repositories(self, repo_urls: List[str]) -> List[str]:
+        """Remove URLs que apontam para o mesmo owner/repo (maiúsculas, .git, /tree/...)"""
+        unique = {}
+        for repo_url in repo_urls:
+            owner, repo = self.extract_repo_info(repo_url)
+            canonical = canonicalizar_repo(owner, repo) if owner and repo else None
+            if canonical is None:
+                print(f"URL inválida: {repo_url}")
+                continue
+            unique.setdefault(canonical[0], f"https://github.com/{canonical[1]}")
+        
+        if len(unique) < len(repo_urls):
+            print(f"{len(repo_urls) - len(unique)} URLs duplicadas ou inválidas removidas")
+        return list(unique.values())
+    
+    def get_with_rate_limit(self, url: str) -> requests.Response:
+        """GET na API do GitHub que espera e tenta de novo uma vez se o rate limit (primário ou secundário) for atingido"""
+        response = self.session.get(url)
+        
+        # Verifica rate limit
+        if response.status_code == 403 and 'rate limit' in response.text.lower():
+            reset_time = int(response.headers.get('X-RateLimit-Reset', 0))
+            current_time = int(time.time())
+            sleep_time = max(reset_time - current_time + 1, 60)
+            print(f"Rate limit atingido. Aguardando {sleep_time} segundos...")
+            time.sleep(sleep_time)
+            response = self.session.get(url)
+        
+        return response
+    
     def make_api_request(self, url: str) -> Dict[Any, Any]:
         """Faz requisição para API do GitHub com tratamento de rate limit"""
         try:
-            response = self.session.get(url)
-            
-            # Verifica rate limit
-            if response.status_code == 403 and 'rate limit' in response.text.lower():
-                reset_time = int(response.headers.get('X-RateLimit-Reset', 0))
-                current_time = int(time.time())
-                sleep_time = max(reset_time - current_time + 1, 60)
-                print(f"Rate limit atingido. Aguardando {sleep_time} segundos...")
-                time.sleep(sleep_time)
-                response = self.session.get(url)
+            response = self.get_with_rate_limit(url)
             
             if response.status_code == 200:
                 return response.json()
@@ -93,32 +124,11 @@ class GitHubPRAnalyzer:
             return {}
     
     def get_pull_requests(self, owner: str, repo: str, state: str = 'all') -> List[Dict]:
-        """Obtém pull requests do repositório"""
-        url = f"https://api.github.com/repos/{owner}/{repo}/pulls"
-        params = {'state': state, 'per_page': 100}
-        
-        all_prs = []
-        page = 1
-        
-        while True:
-            params['page'] = page
-            response = self.session.get(url, params=params)
-            
-            if response.status_code != 200:
-                break
-                
-            prs = response.json()
-            if not prs:
-                break
-                
-            all_prs.extend(prs)
-            page += 1
-            
-            # Limite para evitar muitas requisições
-            if page > 10:  # Máximo 1000 PRs
-                break
+        """Obtém pull requests do repositório (página 1 e depois as demais, até rel="last", em paralelo)"""
+        url = f"https://api.github.com/repos/{owner}/{repo}/pulls?state={state}"
         
-        return all_prs
+        # Limite para evitar muitas requisições: máximo 1000 PRs
+        return self.fetch_all_pages(url, max_pages=10)
     
     def check_pr_description(self, pr: Dict) -> bool:
         """Verifica se o PR contém termos relacionados a race conditions"""
@@ -131,9 +141,22 @@ class GitHubPRAnalyzer:
         return False
     
     def get_pr_files(self, owner: str, repo: str, pr_number: int) -> List[Dict]:
-        """Obtém arquivos modificados no PR"""
+        """Obtém arquivos modificados no PR (todas as páginas, até 3000 arquivos)"""
         url = f"https://api.github.com/repos/{owner}/{repo}/pulls/{pr_number}/files"
-        return self.make_api_request(url)
+        return self.fetch_all_pages(url, max_pages=30)
+    
+    def fetch_all_pages(self, url: str, max_pages: int) -> List[Dict]:
+        """Itens de todas as páginas de uma listagem; se uma página falhar, avisa e devolve as anteriores"""
+        responses, failure = fetch_pages(self.get_with_rate_limit, url, max_pages=max_pages)
+        
+        if failure is not None:
+            page, error = failure
+            if isinstance(error, Exception):
+                print(f"Erro na requisição: {error} - {url} (página {page}), lista incompleta")
+            elif error is not None:
+                print(f"Erro na requisição: {error.status_code} - {url} (página {page}), lista incompleta")
+        
+        return [item for response in responses for item in response.json()]
     
     def is_test_file(self, filename: str) -> bool:
         """Verifica se o arquivo é um arquivo de teste"""
@@ -224,12 +247,52 @@ class GitHubPRAnalyzer:
         
         return matching_prs
     
+    def prefilter_repositories(self, repo_urls: List[str]) -> List[str]:
+        """Remove repositórios que não atendem METADATA_FILTERS (consulta GraphQL em lotes de 100)"""
+        if not self.github_token:
+            # A API GraphQL exige autenticação
+            return repo_urls
+        
+        names = {}
+        for repo_url in repo_urls:
+            owner, repo = self.extract_repo_info(repo_url)
+            names[repo_url] = f"{owner}/{repo}"
+        
+        prefilter = RepositoryMetadataPrefilter({'Authorization': f'token {self.github_token}'})
+        kept, dropped = prefilter.filter_repos(sorted(set(names.values())))
+        
+        for name, reason in sorted(dropped.items()):
+            print(f"Ignorando {name}: {reason}")
+        print(f"{len(dropped)} repositórios removidos pelos filtros de metadados")
+        
+        return [repo_url for repo_url in repo_urls if names[repo_url] in kept]
+    
+    def scan_repositories(self, repo_urls: List[str]) -> List[str]:
+        """Mantém só repositórios com uso intenso de código assíncrono (KEYWORDS em até MAX_FILES arquivos)"""
+        if not self.github_token:
+            return repo_urls
+        
+        scanner = RepositoryKeywordScanner(dict(self.session.headers))
+        names = {}
+        for repo_url in repo_urls:
+            owner, repo = self.extract_repo_info(repo_url)
+            names[repo_url] = f"{owner}/{repo}"
+        
+        passing, _ = scanner.filter_repos(list(names.values()))
+        passing = set(passing)
+        print(f"{len(passing)} de {len(repo_urls)} repositórios passaram na varredura de keywords")
+        
+        return [repo_url for repo_url in repo_urls if names[repo_url] in passing]
+    
     def analyze_all_repositories(self, json_file: str, output_file: str = 'analysis_results.json'):
         """Analisa todos os repositórios do arquivo JSON"""
         repos = self.load_repositories(json_file)
         if not repos:
             return
         
+        repos = self.prefilter_repositories(repos)
+        repos = self.scan_repositories(repos)
+        
         print(f"Analisando {len(repos)} repositórios...")
         
         all_results = []
@@ -264,8 +327,14 @@ class GitHubPRAnalyzer:
                 print(f"- {result['repository']} - PR #{result['pr_number']}: {result['pr_title']}")
 
 
-def main():
+def main(argv=None):
     """Função principal"""
+    parser = argparse.ArgumentParser(description="Analisa os PRs dos repositórios das awesome lists")
+    parser.add_argument("--profile", action="store_true",
+                        help="Gera perfil de CPU, tempos por etapa e alocações")
+    parser.add_argument("--profile-dir", default="profiles")
+    args = parser.parse_args(argv)
+    
     # Exemplo de uso
     
     # 1. Cria arquivo JSON com repositórios (se não existir)
@@ -277,7 +346,8 @@ def main():
     
     # 3. Executa análise
     analyzer = GitHubPRAnalyzer(github_token)
-    analyzer.analyze_all_repositories(repos_file)
+    with profiled_run(enabled=args.profile, output_dir=args.profile_dir):
+        analyzer.analyze_all_repositories(repos_file)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,222 @@
+import argparse
+import glob
+import json
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import requests
+from dotenv import load_dotenv
+
+# owner/repo em qualquer link do GitHub (https, http, sem esquema, .git, /tree/..., etc.); o host
+# precisa começar ali, para que gist.github.com, api.github.com e afins não sejam lidos como repositório
+PADRAO_REPO = re.compile(r"(?<![\w.-])(?:https?://)?(?:www\.)?github\.com/([A-Za-z0-9][A-Za-z0-9-]*)/([A-Za-z0-9_.-]+)")
+
+# Primeiros segmentos de URL do GitHub que não são donos de repositório
+DONOS_RESERVADOS = {
+    "about", "apps", "blog", "collections", "contact", "customer-stories", "enterprise", "events",
+    "explore", "features", "join", "login", "marketplace", "notifications", "orgs", "pricing",
+    "pulls", "issues", "readme", "search", "security", "settings", "site", "sponsors", "topics",
+    "trending", "users", "repos", "organizations", "codespaces", "copilot", "dashboard", "new",
+    "account", "team", "watching", "stars", "github-copilot", "resources", "solutions",
+}
+
+DIRETORIO_VERSOES = "awesomeLists/repos"
+CACHE_RESOLUCAO = "awesomeLists/repos_resolvidos.json"
+
+def canonicalizar_repo(dono: str, nome: str):
+    """
+    Normaliza owner/repo para a chave de deduplicação (minúsculas, sem .git)
+
+    Returns:
+        Tupla (chave, 'dono/nome' como apareceu) ou None se não for um repositório
+    """
+    if dono.lower() in DONOS_RESERVADOS:
+        return None
+
+    nome = nome.rstrip(".")
+    if nome.lower().endswith(".git"):
+        nome = nome[:-4]
+    if not nome or nome in (".", ".."):
+        return None
+
+    exibicao = f"{dono}/{nome}"
+    return exibicao.lower(), exibicao
+
+def extrair_repos_de_linhas(linhas) -> dict:
+    """Extrai {chave: 'dono/nome'} de um iterável de linhas, sem carregar o arquivo inteiro"""
+    repos = {}
+    for linha in linhas:
+        for dono, nome in PADRAO_REPO.findall(linha):
+            canonico = canonicalizar_repo(dono, nome)
+            if canonico and canonico[0] not in repos:
+                repos[canonico[0]] = canonico[1]
+    return repos
+
+def ler_fonte(fonte: str, session: requests.Session) -> dict:
+    """Lê uma awesome list local ou remota (URL) em streaming"""
+    if fonte.startswith(("http://", "https://")):
+        with session.get(fonte, stream=True, timeout=30) as response:
+            response.raise_for_status()
+            return extrair_repos_de_linhas(response.iter_lines(decode_unicode=True))
+
+    with open(fonte, "r", encoding="utf-8", errors="replace") as f:
+        return extrair_repos_de_linhas(f)
+
+def expandir_fontes(fontes):
+    """Expande globs locais; URLs passam sem alteração"""
+    expandidas = []
+    for fonte in fontes:
+        if fonte.startswith(("http://", "https://")):
+            expandidas.append(fonte)
+        else:
+            expandidas.extend(sorted(glob.glob(fonte)) or [fonte])
+    return expandidas
+
+def carregar_cache_resolucao(caminho: str = CACHE_RESOLUCAO) -> dict:
+    try:
+        with open(caminho, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def salvar_cache_resolucao(cache: dict, caminho: str = CACHE_RESOLUCAO):
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump(cache, f, indent=2, ensure_ascii=False, sort_keys=True)
+
+def resolver_repos(repos: dict, session: requests.Session, cache: dict, max_workers: int = 8) -> dict:
+    """
+    Resolve repositórios renomeados/transferidos para o nome atual
+
+    Cada chave é consultada uma única vez (GET /repos segue o redirect de repositórios
+    renomeados); o resultado fica no cache, com None para repositórios que não existem mais.
+
+    Returns:
+        {chave: 'dono/nome' atual} apenas para repositórios existentes
+    """
+    lock = threading.Lock()
+    pendentes = [chave for chave in repos if chave not in cache]
+
+    def resolver(chave):
+        try:
+            response = session.get(f"https://api.github.com/repos/{repos[chave]}", timeout=30)
+        except requests.RequestException as e:
+            print(f"Erro ao resolver {repos[chave]}: {e}")
+            return
+
+        if response.status_code == 200:
+            resolvido = response.json()["full_name"]
+        elif response.status_code in (404, 451):
+            resolvido = None
+        else:
+            # Rate limit ou erro temporário: não grava no cache, tenta de novo na próxima execução
+            print(f"Erro {response.status_code} ao resolver {repos[chave]}")
+            return
+
+        with lock:
+            cache[chave] = resolvido
+
+    if pendentes:
+        print(f"Resolvendo {len(pendentes)} repositórios ({len(repos) - len(pendentes)} já no cache)...")
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            list(executor.map(resolver, pendentes))
+
+    return {
+        chave: (cache[chave] if chave in cache else repos[chave])
+        for chave in repos
+        if cache.get(chave, repos[chave]) is not None
+    }
+
+def proxima_versao(diretorio: str = DIRETORIO_VERSOES) -> int:
+    versoes = [
+        int(m.group(1))
+        for m in (re.match(r"repos_v(\d+)\.json$", nome) for nome in os.listdir(diretorio))
+        if m
+    ] if os.path.isdir(diretorio) else []
+    return max(versoes, default=0) + 1
+
+def ingerir_awesome_lists(fontes, diretorio_saida: str = DIRETORIO_VERSOES, resolver: bool = True,
+                          github_token: str = None, max_workers: int = 8, saida_lista: str = None) -> str:
+    """
+    Lê várias awesome lists em paralelo e grava uma lista versionada e deduplicada de repositórios
+
+    Args:
+        fontes: Arquivos markdown locais (aceita globs) ou URLs
+        diretorio_saida: Diretório das versões (repos_v1.json, repos_v2.json, ...)
+        resolver: Resolve renomeações pela API (uma vez por repositório, com cache)
+        github_token: Token do GitHub para a resolução
+        max_workers: Número de fontes/consultas processadas em paralelo
+        saida_lista: Também grava a lista simples de URLs (formato do linksGithub.json)
+
+    Returns:
+        Caminho do arquivo de versão gravado
+    """
+    fontes = expandir_fontes(fontes)
+    session = requests.Session()
+    if github_token:
+        session.headers.update({
+            'Authorization': f'token {github_token}',
+            'Accept': 'application/vnd.github.v3+json'
+        })
+
+    repos = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for fonte, encontrados in zip(fontes, executor.map(lambda f: ler_fonte(f, session), fontes)):
+            print(f"{len(encontrados)} repositórios em {fonte}")
+            for chave, exibicao in encontrados.items():
+                repos.setdefault(chave, exibicao)
+
+    total_links = len(repos)
+    if resolver:
+        cache = carregar_cache_resolucao()
+        resolvidos = resolver_repos(repos, session, cache, max_workers)
+        salvar_cache_resolucao(cache)
+    else:
+        resolvidos = repos
+
+    # Repositórios diferentes podem apontar para o mesmo repositório após a resolução
+    unicos = {}
+    for nome in resolvidos.values():
+        unicos.setdefault(nome.lower(), nome)
+    repositorios = [f"https://github.com/{nome}" for _, nome in sorted(unicos.items())]
+
+    os.makedirs(diretorio_saida, exist_ok=True)
+    versao = proxima_versao(diretorio_saida)
+    caminho = os.path.join(diretorio_saida, f"repos_v{versao}.json")
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump({
+            "versao": versao,
+            "gerado_em": datetime.now().isoformat(),
+            "fontes": fontes,
+            "resolvido": resolver,
+            "total_links_unicos": total_links,
+            "total_repositorios": len(repositorios),
+            "repositorios": repositorios
+        }, f, indent=4, ensure_ascii=False)
+
+    if saida_lista:
+        with open(saida_lista, "w", encoding="utf-8") as f:
+            json.dump(repositorios, f, indent=4, ensure_ascii=False)
+
+    print(f"{len(repositorios)} repositórios únicos ({total_links} antes da resolução) salvos em '{caminho}'.")
+    return caminho
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ingestão de awesome lists em uma lista versionada de repositórios")
+    parser.add_argument("fontes", nargs="*", default=["awesomeLists/texto.txt"],
+                        help="Arquivos markdown (aceita globs) ou URLs")
+    parser.add_argument("--saida", default=DIRETORIO_VERSOES)
+    parser.add_argument("--sem-resolver", action="store_true", help="Não consulta a API para resolver renomeações")
+    parser.add_argument("--saida-lista", default=None, help="Também grava a lista simples (ex: awesomeLists/linksGithub.json)")
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    ingerir_awesome_lists(args.fontes, args.saida, resolver=not args.sem_resolver,
+                          github_token=os.getenv('GITHUB_TOKEN'), max_workers=args.workers,
+                          saida_lista=args.saida_lista)
+
+if __name__ == "__main__":
+    main()
@@ -19,4 +19,5 @@ def extrair_links_github(arquivo_entrada, arquivo_saida):
     print(f"{len(links_unicos)} repositórios encontrados e salvos em '{arquivo_saida}'.")
 
 # Exemplo de chamada
-extrair_links_github("awesomeLists/texto.txt", "awesomeLists/linksGithub.json")
+if __name__ == "__main__":
+    extrair_links_github("awesomeLists/texto.txt", "awesomeLists/linksGithub.json")
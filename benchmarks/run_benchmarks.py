@@ -0,0 +1,234 @@
+"""
+Offline micro-benchmarks for the local hot paths.
+
+Uses the committed data_repos / awesomeLists datasets, scaled up synthetically,
+and never touches the network. Run from the repository root:
+
+    python3 -m benchmarks.run_benchmarks --output benchmarks/results/current.json
+    python3 -m benchmarks.run_benchmarks --compare benchmarks/results/baseline.json
+"""
+import argparse
+import copy
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from src.github_searches.pr_search import (
+    match_pr_terms,
+    is_test_file,
+    is_js_file,
+    save_checkpoint_data
+)
+from src.github_searches.filter_search import GitHubTestAnalyzer
+from src.github_searches.content_scan import KeywordStreamMatcher
+from data_repos.transformCsv import extrair_dados_para_csv
+from awesomeLists.leitor import extrair_links_github
+
+SEARCH_DATASET = "data_repos/race_condition_prs-2.json"
+ANALYSIS_DATASET = "data_repos/filtered_race_condition_prs-2.json"
+AWESOME_LIST = "awesomeLists/texto.txt"
+
+# Non-test names mixed into the file lists, as PR file listings are mostly source files
+SOURCE_FILE_NAMES = ["src/index.js", "lib/utils.ts", "README.md", "package.json", "src/components/App.jsx",
+                     "docs/guide.md", "src/server/router.tsx", "scripts/build.py"]
+
+TEST_FILE_TEMPLATE = """import {{ render }} from '../src/render';
+
+describe('component {n}', () => {{
+  beforeEach(() => {{ jest.useFakeTimers(); }});
+{body}
+}});
+"""
+
+def load_json(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def scale_search_items(pull_requests, count):
+    """Build `count` search-item shaped dicts by cycling the collected PRs"""
+    items = []
+    for i in range(count):
+        pr = pull_requests[i % len(pull_requests)]
+        items.append({
+            "url": f"{pr['repo_url']}/issues/{i}",
+            "html_url": f"{pr['pr_url']}-{i}",
+            "title": pr["title"],
+            "body": pr.get("body") or "",
+            "repository_url": pr["repo_url"],
+            "user": {"login": pr.get("author")},
+            "created_at": pr.get("created_at"),
+        })
+    return items
+
+def scale_file_names(pull_requests, count):
+    names = [name for pr in pull_requests for name in pr.get("js_test_files", [])] + SOURCE_FILE_NAMES
+    return [f"pkg{i // len(names)}/{names[i % len(names)]}" for i in range(count)]
+
+def synthetic_test_files(count, lines=400):
+    """JS test files where the async keyword only shows up near the end"""
+    body = "\n".join(f"  it('case {j}', () => {{ expect(render({j})).toBe({j}); }});" for j in range(lines))
+    files = []
+    for n in range(count):
+        content = TEST_FILE_TEMPLATE.format(n=n, body=body)
+        if n % 2 == 0:
+            content += "\ntest('late', async () => { await Promise.resolve(); });\n"
+        files.append(content)
+    return files
+
+def scale_analysis_dataset(data, count):
+    projects = data.get("matching_projects", [])
+    scaled = copy.deepcopy(data)
+    scaled["matching_projects"] = [projects[i % len(projects)] for i in range(count)]
+    return scaled
+
+def run_case(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+def build_cases(scale, tmp_dir):
+    search_data = load_json(SEARCH_DATASET)
+    analysis_data = load_json(ANALYSIS_DATASET)
+    pull_requests = search_data["pull_requests"]
+
+    n_prs = int(200_000 * scale)
+    n_files = int(500_000 * scale)
+    n_contents = max(int(2_000 * scale), 10)
+    n_checkpoint = max(int(50_000 * scale), 10)
+    n_projects = max(int(50_000 * scale), 10)
+    awesome_copies = max(int(200 * scale), 1)
+
+    items = scale_search_items(pull_requests, n_prs)
+    file_names = scale_file_names(pull_requests, n_files)
+    contents = synthetic_test_files(n_contents)
+    encoded_contents = [content.encode("utf-8") for content in contents]
+    collected = [pull_requests[i % len(pull_requests)] for i in range(n_checkpoint)]
+    seen = {f"{pr['pr_url']}-{i}" for i, pr in enumerate(collected)}
+    analyzer = GitHubTestAnalyzer(headers={})
+
+    analysis_path = os.path.join(tmp_dir, "analysis.json")
+    with open(analysis_path, "w", encoding="utf-8") as f:
+        json.dump(scale_analysis_dataset(analysis_data, n_projects), f, ensure_ascii=False)
+
+    awesome_path = os.path.join(tmp_dir, "awesome.md")
+    with open(AWESOME_LIST, "r", encoding="utf-8") as f:
+        awesome_text = f.read()
+    with open(awesome_path, "w", encoding="utf-8") as f:
+        for i in range(awesome_copies):
+            # Vary owners so the dedupe has real work to do
+            f.write(awesome_text.replace("https://github.com/", f"https://github.com/copy{i}-"))
+
+    def stream_scan():
+        for data in encoded_contents:
+            matcher = KeywordStreamMatcher({"test": analyzer.test_keywords, "async": analyzer.async_keywords})
+            for offset in range(0, len(data), 64 * 1024):
+                matcher.feed(data[offset:offset + 64 * 1024])
+                if matcher.done:
+                    break
+            matcher.finish()
+
+    return {
+        "term_matching": (len(items), lambda: [match_pr_terms(pr) for pr in items]),
+        "is_test_file": (len(file_names), lambda: [is_test_file(name) for name in file_names]),
+        "is_js_file": (len(file_names), lambda: [is_js_file(name) for name in file_names]),
+        "stream_keyword_scan": (len(contents), stream_scan),
+        "save_checkpoint_data": (len(collected), lambda: save_checkpoint_data(
+            os.path.join(tmp_dir, "checkpoint.json"), collected, seen, {"processed": len(collected)})),
+        "extrair_dados_para_csv": (n_projects, lambda: extrair_dados_para_csv(
+            analysis_path, os.path.join(tmp_dir, "saida.csv"))),
+        "extrair_links_github": (awesome_copies, lambda: extrair_links_github(
+            awesome_path, os.path.join(tmp_dir, "links.json"))),
+    }
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_benchmarks(scale=1.0, repeat=5, only=None):
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cases = build_cases(scale, tmp_dir)
+        for name, (n_items, func) in cases.items():
+            if only and name not in only:
+                continue
+
+            # Warm-up run (file cache, lazy imports)
+            run_case(func, 1)
+            timings = run_case(func, repeat)
+            best = min(timings)
+            results[name] = {
+                "items": n_items,
+                "repeat": repeat,
+                "min_seconds": round(best, 6),
+                "median_seconds": round(statistics.median(timings), 6),
+                "us_per_item": round(best / max(n_items, 1) * 1e6, 4),
+            }
+            print(f"⏱️ {name}: {results[name]['min_seconds']:.4f}s min, "
+                  f"{results[name]['us_per_item']:.3f} µs/item ({n_items} items)")
+
+    return {
+        "metadata": {
+            "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "git_revision": git_revision(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "scale": scale,
+        },
+        "results": results,
+    }
+
+def compare_results(current, baseline, threshold=0.10):
+    """Print per-benchmark ratios against a baseline; returns the names that regressed"""
+    regressions = []
+    print(f"\n{'benchmark':<28}{'baseline':>12}{'current':>12}{'ratio':>9}")
+    for name, result in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base:
+            print(f"{name:<28}{'-':>12}{result['us_per_item']:>12.3f}{'new':>9}")
+            continue
+        ratio = result["us_per_item"] / max(base["us_per_item"], 1e-9)
+        flag = " ⚠️" if ratio > 1 + threshold else ""
+        print(f"{name:<28}{base['us_per_item']:>12.3f}{result['us_per_item']:>12.3f}{ratio:>8.2f}x{flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline micro-benchmarks for the local hot paths")
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="1.0 = 200k PRs / 500k file names; use 0.05 for a quick run")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", nargs="*", help="Run only these benchmarks")
+    parser.add_argument("--output", default=None, help="Write results as JSON")
+    parser.add_argument("--compare", default=None, help="Baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Allowed slowdown before flagging")
+    args = parser.parse_args(argv)
+
+    current = run_benchmarks(args.scale, args.repeat, args.only)
+
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=2)
+        print(f"💾 Results saved to {args.output}")
+
+    if args.compare:
+        regressions = compare_results(current, load_json(args.compare), args.threshold)
+        if regressions:
+            print(f"\n❌ Regressions: {', '.join(regressions)}")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
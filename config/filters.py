@@ -4,6 +4,12 @@ LANGUAGES = [
     # 'typescript',
 ]
 
+# Period covered by the PR search, split into windows of SEARCH_WINDOW_DAYS
+# (can be increased to 30 for fewer API calls)
+SEARCH_START_DATE = "2020-01-01"
+SEARCH_END_DATE = "2025-05-01"
+SEARCH_WINDOW_DAYS = 7
+
 # Terms to identify test files
 # TEST_FILE_IDENTIFIERS = [
 #     "describe",
@@ -20,6 +26,15 @@ PR_DESCRIPTION_TERMS = [
     "race bug",
 ]
 
+# How specific each term is for event races; used to enrich the most promising PRs first
+PR_TERM_WEIGHTS = {
+    "event race": 3.0,
+    "race condition": 2.0,
+    "race bug": 2.0,
+    "concurrency bug": 1.5,
+    "flaky test": 1.0,
+}
+
 TEST_FILE_PATTERNS = [
     ".test.", ".spec.", "_test.", "_spec.", 
     "/test/", "/tests/", "__tests__", 
@@ -54,7 +69,12 @@ METADATA_FILTERS = {
     "min_stars": 10,
     "min_forks": 0,
     "updated_since": "2022-01-01T00:00:00Z",
+    "exclude_archived": True,
+    "exclude_forks": True,
+    "primary_languages": [],  # empty = any language
 }
+# How long looked-up repository metadata is reused before querying again
+METADATA_CACHE_TTL_HOURS = 24
 
 # 4. Filters the repos by keywords
 KEYWORDS = [
@@ -65,4 +85,8 @@ KEYWORDS = [
     # "setInterval"
 ]
 EXTENSIONS = [".js", ".ts", ".jsx", ".tsx"]
-MAX_FILES = 20
\ No newline at end of file
+MAX_FILES = 20
+# Larger files (generated fixtures, bundles) are skipped instead of downloaded
+MAX_BLOB_BYTES = 200 * 1024
+# Minimum KEYWORDS hits per KB of scanned code for a repo to be crawled
+MIN_ASYNC_DENSITY = 0.5
\ No newline at end of file
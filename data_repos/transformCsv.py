@@ -28,5 +28,6 @@ def extrair_dados_para_csv(arquivo_json, arquivo_csv):
                 writer.writerow(linha)
 
 # Exemplo de uso:
-# extrair_dados_para_csv('data_repos/filtered_race_condition_prs-1.json', 'data_repos/saida1.csv')
-extrair_dados_para_csv('data_repos/filtered_race_condition_prs-2.json', 'data_repos/saida2.csv')
+if __name__ == "__main__":
+    # extrair_dados_para_csv('data_repos/filtered_race_condition_prs-1.json', 'data_repos/saida1.csv')
+    extrair_dados_para_csv('data_repos/filtered_race_condition_prs-2.json', 'data_repos/saida2.csv')
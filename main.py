@@ -1,11 +1,38 @@
+import argparse
+
 from src.auth.get_token import get_github_token
 # from src.github_searches.search import search_github_issues
 # from src.github_searches.metadata_filter import filter_metadata
 # from src.github_searches.keyword_filter import filter_by_keywords
 from src.github_searches.pr_search import search_github_prs
 from src.github_searches.filter_search import analyze_projects_with_criteria
+from src.github_searches.event_log import configure_event_log
+from src.github_searches.raw_archive import configure_archive
+from src.github_searches.prefetch import SpeculativePrefetcher, DEFAULT_PREFETCH_DIR
+from src.profiling.profiler import profiled_run
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description="GitHub API race scrapper")
+    parser.add_argument("--profile", action="store_true",
+                        help="Profile the run (CPU samples, stage timings and allocations)")
+    parser.add_argument("--profile-dir", default="profiles")
+    parser.add_argument("--log-jsonl", help="Append every event to this file as JSON lines")
+    parser.add_argument("--console", choices=["lines", "progress", "off"], default="lines",
+                        help="lines: sampled event lines; progress: one status line; off: no events on the console")
+    parser.add_argument("--archive", help="Keep every raw API payload in this directory (replay with refilter)")
+    parser.add_argument("--prefetch", action="store_true",
+                        help="Spend core quota about to expire on caching candidates' files and contents")
+    parser.add_argument("--prefetch-dir", default=DEFAULT_PREFETCH_DIR)
+    args = parser.parse_args(argv)
+    configure_event_log(jsonl_path=args.log_jsonl, console=args.console)
+    if args.archive:
+        configure_archive(args.archive)
+
+    with profiled_run(enabled=args.profile, output_dir=args.profile_dir):
+        run(args)
 
-def main():
+def run(args):
 
     # 1. Get GitHub token from environment variable
     token = get_github_token()
@@ -28,7 +55,8 @@ def main():
     # search_github_prs(headers)
 
     try:
-        prs = search_github_prs(headers, save_checkpoint=True)
+        prefetcher = SpeculativePrefetcher(headers, args.prefetch_dir) if args.prefetch else None
+        prs = search_github_prs(headers, save_checkpoint=True, prefetcher=prefetcher)
         print(f"✅ Successfully collected {len(prs)} PRs")
     except KeyboardInterrupt:
         print("🛑 Interrupted by user - progress has been saved")
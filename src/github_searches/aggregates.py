@@ -0,0 +1,187 @@
+import argparse
+import heapq
+import json
+from collections import Counter
+
+from src.github_searches.prioritizer import term_score
+
+DEFAULT_TOP_K = 20
+BREAKDOWNS = ("by_repo", "by_term", "by_month", "by_keyword")
+
+class TopK:
+    """The k highest-scored items seen so far (a min-heap, so each add is O(log k))"""
+
+    def __init__(self, k=DEFAULT_TOP_K):
+        self.k = k
+        self._heap = []
+        self._keys = set()
+
+    def add(self, score, key, item):
+        if key in self._keys:
+            return
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, (score, key, item))
+            self._keys.add(key)
+        elif (score, key) > self._heap[0][:2]:
+            _, dropped_key, _ = heapq.heapreplace(self._heap, (score, key, item))
+            self._keys.discard(dropped_key)
+            self._keys.add(key)
+
+    def merge(self, other):
+        for score, key, item in other._heap:
+            self.add(score, key, item)
+
+    def items(self):
+        return [item for _, _, item in sorted(self._heap, key=lambda entry: entry[:2], reverse=True)]
+
+    def to_list(self):
+        return [{"score": score, "key": key, "item": item} for score, key, item in self._heap]
+
+    @classmethod
+    def from_list(cls, entries, k=DEFAULT_TOP_K):
+        top = cls(k)
+        for entry in entries:
+            top.add(entry["score"], entry["key"], entry["item"])
+        return top
+
+def _matching_files(project):
+    """Matching file details of a matching_projects record or of an analyze_pr result"""
+    return (project.get("analysis_results") or {}).get("matching_files_details") or project.get("files_with_keywords") or []
+
+class RunAggregates:
+    """
+    Running statistics of a crawl, updated as each result arrives.
+
+    Totals, per-repo / per-term / per-month / per-keyword counts and the top-K PRs
+    take space proportional to the distinct keys, not to the number of PRs, and two
+    instances (shards, runs, resumed checkpoints) combine with merge().
+    """
+
+    def __init__(self, top_k=DEFAULT_TOP_K):
+        self.totals = Counter()
+        self.by_repo = Counter()
+        self.by_term = Counter()
+        self.by_month = Counter()
+        self.by_keyword = Counter()
+        self.top_prs = TopK(top_k)
+
+    def _count_pr(self, record):
+        self.by_repo[record.get("repo_name") or "unknown"] += 1
+        for term in record.get("matched_terms") or []:
+            self.by_term[term] += 1
+        self.by_month[(record.get("created_at") or "unknown")[:7]] += 1
+
+    def add_pr(self, pr):
+        """One PR collected by the search (a process_pr record)"""
+        self.totals["prs"] += 1
+        self.totals["js_test_files"] += len(pr.get("js_test_files") or [])
+        self._count_pr(pr)
+        self.top_prs.add(term_score(pr), pr["pr_url"], {
+            "pr_url": pr["pr_url"],
+            "repo_name": pr.get("repo_name"),
+            "title": pr.get("title"),
+        })
+
+    def add_analysis(self, success, project=None):
+        """
+        One analyzed PR: success tells whether the analysis ran, project is its
+        matching_projects record (or analyze_pr result) when it met the criteria
+        """
+        self.totals["analyzed"] += 1
+        if not success:
+            self.totals["errors"] += 1
+            return
+        self.totals["successful"] += 1
+        if project is None:
+            return
+
+        matching_files = _matching_files(project)
+        self.totals["matching_prs"] += 1
+        self.totals["matching_files"] += len(matching_files)
+        self._count_pr(project)
+        for file_result in matching_files:
+            for keyword in (file_result.get("found_test_keywords") or []) + (file_result.get("found_async_keywords") or []):
+                self.by_keyword[keyword] += 1
+
+        self.top_prs.add(len(matching_files), project["pr_url"], {
+            "pr_url": project["pr_url"],
+            "repo_name": project.get("repo_name"),
+            "title": project.get("title"),
+            "matching_files": len(matching_files),
+        })
+
+    def merge(self, other):
+        self.totals.update(other.totals)
+        for name in BREAKDOWNS:
+            getattr(self, name).update(getattr(other, name))
+        self.top_prs.merge(other.top_prs)
+        return self
+
+    def to_dict(self):
+        data = {"totals": dict(self.totals), "top_k": self.top_prs.k, "top_prs": self.top_prs.to_list()}
+        for name in BREAKDOWNS:
+            data[name] = dict(getattr(self, name))
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        aggregates = cls(data.get("top_k", DEFAULT_TOP_K))
+        aggregates.totals.update(data.get("totals", {}))
+        for name in BREAKDOWNS:
+            getattr(aggregates, name).update(data.get(name, {}))
+        aggregates.top_prs = TopK.from_list(data.get("top_prs", []), aggregates.top_prs.k)
+        return aggregates
+
+    @classmethod
+    def from_prs(cls, prs, top_k=DEFAULT_TOP_K):
+        aggregates = cls(top_k)
+        for pr in prs:
+            aggregates.add_pr(pr)
+        return aggregates
+
+    def summary(self, top_n=10):
+        """Compact report for dashboards and the end-of-run print; same cost at any scale"""
+        return {
+            "totals": dict(self.totals),
+            "unique_repositories": len(self.by_repo),
+            "top_repositories": self.by_repo.most_common(top_n),
+            "terms": self.by_term.most_common(),
+            "months": sorted(self.by_month.items()),
+            "keywords": self.by_keyword.most_common(),
+            "top_prs": self.top_prs.items()[:top_n],
+        }
+
+    def print_summary(self, top_n=5):
+        summary = self.summary(top_n)
+        if summary["top_repositories"]:
+            print("🏆 Top repositories: " + ", ".join(f"{name} ({count})" for name, count in summary["top_repositories"]))
+        if summary["terms"]:
+            print("🏷️ PRs per term: " + ", ".join(f"{term} ({count})" for term, count in summary["terms"]))
+        if summary["keywords"]:
+            print("🔑 Keywords in matching files: " + ", ".join(f"{kw} ({count})" for kw, count in summary["keywords"]))
+
+def load_aggregates(path):
+    """Aggregates stored in a result file's metadata (search or analysis output)"""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return RunAggregates.from_dict(data.get("metadata", {}).get("aggregates", {}))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Merge the aggregates of several runs or shards")
+    parser.add_argument("inputs", nargs="+", help="Result files written by search_github_prs / the analysis")
+    parser.add_argument("--output", help="Write the merged aggregates as JSON")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    merged = RunAggregates()
+    for path in args.inputs:
+        merged.merge(load_aggregates(path))
+
+    summary = merged.summary(args.top)
+    print(json.dumps(summary, indent=2, ensure_ascii=False))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(merged.to_dict(), f, indent=2, ensure_ascii=False)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+import threading
+import time
+from collections import Counter
+
+# Failures that say something about the repository itself, and how many in a row open its breaker.
+# A 451 never gets better.
+REPO_FAILURE_THRESHOLDS = {
+    "not_found": 5,
+    "gone": 1,
+    "legal": 1,
+    "access_denied": 3,
+}
+# Endpoint classes whose 404 means the PR or the repository is gone. A 404 from
+# contents is normal (a file deleted or renamed by the PR) and says nothing about the repo.
+REPO_NOT_FOUND_ENDPOINTS = ("pulls", "pull_files", "other")
+# Failures of the endpoint class as a whole (GitHub having a bad minute)
+ENDPOINT_FAILURE_THRESHOLD = 5
+
+REPO_RESET_SECONDS = 30 * 60
+ENDPOINT_RESET_SECONDS = 60
+
+# Used when a quota response carries no reset header
+DEFAULT_QUOTA_WAIT = 60
+
+def classify_response(response):
+    """
+    Failure class of a response, or None for a success:
+    'not_found', 'gone', 'legal', 'quota', 'access_denied', 'server' or 'client'.
+    A 403 only counts as 'quota' when the rate-limit headers or body say so.
+    """
+    status = response.status_code
+    if status < 400:
+        return None
+    if status == 404:
+        return "not_found"
+    if status == 410:
+        return "gone"
+    if status == 451:
+        return "legal"
+    if status == 429:
+        return "quota"
+    if status == 403:
+        headers = response.headers
+        if headers.get("X-RateLimit-Remaining") == "0" or "Retry-After" in headers:
+            return "quota"
+        try:
+            message = (response.json() or {}).get("message", "")
+        except ValueError:
+            message = ""
+        if "rate limit" in message.lower():
+            return "quota"
+        return "access_denied"
+    if status >= 500:
+        return "server"
+    return "client"
+
+def quota_wait_seconds(response):
+    """Seconds until the quota behind a 'quota' response resets"""
+    headers = response.headers
+    if "Retry-After" in headers:
+        try:
+            return max(int(headers["Retry-After"]), 1)
+        except ValueError:
+            pass
+    if "X-RateLimit-Reset" in headers:
+        try:
+            return max(int(headers["X-RateLimit-Reset"]) - time.time() + 1, 1)
+        except ValueError:
+            pass
+    return DEFAULT_QUOTA_WAIT
+
+class CircuitBreaker:
+    """
+    closed -> open after `threshold` consecutive failures; after reset_seconds one
+    half-open probe is let through, which closes the breaker on success or
+    reopens it on failure
+    """
+
+    def __init__(self, threshold, reset_seconds):
+        self.threshold = threshold
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.reason = None
+
+    def allow(self, now=None):
+        now = now if now is not None else time.time()
+        if self.state == "closed":
+            return True
+        # One probe per reset period: a probe whose outcome never came back is replaced
+        if now - self.opened_at >= self.reset_seconds:
+            self.state = "half_open"
+            self.opened_at = now
+            return True
+        return False
+
+    def retry_in(self, now=None):
+        now = now if now is not None else time.time()
+        return max(self.opened_at + self.reset_seconds - now, 0)
+
+    def record_success(self):
+        self.state = "closed"
+        self.failures = 0
+        self.reason = None
+
+    def record_failure(self, reason, threshold=None, now=None):
+        self.failures += 1
+        self.reason = reason
+        if self.state == "half_open" or self.failures >= (threshold or self.threshold):
+            self.state = "open"
+            self.opened_at = now if now is not None else time.time()
+
+class BreakerBoard:
+    """
+    Circuit breakers keyed by repository and by endpoint class.
+
+    - Repository breakers open on 404/410/451/access-denied streaks and make the
+      caller skip that repo's remaining work, with the reason recorded; only 404s
+      of repo-level endpoints (repository, PR details, PR files) count, not those of single files
+    - Endpoint breakers open on 5xx/network streaks; callers wait for the probe
+      instead of skipping, since the work itself is still valid
+    - Quota responses never count as failures of the target
+    """
+
+    def __init__(self, repo_thresholds=None, endpoint_threshold=ENDPOINT_FAILURE_THRESHOLD,
+                 repo_reset_seconds=REPO_RESET_SECONDS, endpoint_reset_seconds=ENDPOINT_RESET_SECONDS):
+        self.repo_thresholds = repo_thresholds or REPO_FAILURE_THRESHOLDS
+        self.endpoint_threshold = endpoint_threshold
+        self.repo_reset_seconds = repo_reset_seconds
+        self.endpoint_reset_seconds = endpoint_reset_seconds
+        self.repos = {}
+        self.endpoints = {}
+        self.skipped = Counter()
+        self.lock = threading.Lock()
+
+    def _repo(self, repo_name):
+        key = (repo_name or "").lower()
+        if key not in self.repos:
+            self.repos[key] = CircuitBreaker(max(self.repo_thresholds.values()), self.repo_reset_seconds)
+        return self.repos[key]
+
+    def _endpoint(self, endpoint):
+        if endpoint not in self.endpoints:
+            self.endpoints[endpoint] = CircuitBreaker(self.endpoint_threshold, self.endpoint_reset_seconds)
+        return self.endpoints[endpoint]
+
+    def repo_blocked(self, repo_name):
+        """Reason the repository is being skipped, or None if a request may go out"""
+        with self.lock:
+            breaker = self._repo(repo_name)
+            if breaker.allow():
+                return None
+            self.skipped[breaker.reason] += 1
+            return breaker.reason
+
+    def repo_open_reason(self, repo_name):
+        """Like repo_blocked, but only looks: it never takes the half-open probe"""
+        with self.lock:
+            breaker = self._repo(repo_name)
+            if breaker.state != "closed" and breaker.retry_in() > 0:
+                return breaker.reason
+            return None
+
+    def note_skipped(self, reason):
+        """Count work skipped by the caller because of an open breaker"""
+        with self.lock:
+            self.skipped[reason] += 1
+
+    def endpoint_wait(self, endpoint):
+        """Seconds to wait before the endpoint class takes requests again (0 if closed or probing)"""
+        with self.lock:
+            breaker = self._endpoint(endpoint)
+            return 0 if breaker.allow() else max(breaker.retry_in(), 1)
+
+    def record(self, repo_name, endpoint, failure=None):
+        """Feed the outcome of a request: failure is a classify_response class, 'network' or None"""
+        with self.lock:
+            repo, endpoint_breaker = self._repo(repo_name), self._endpoint(endpoint)
+            if failure is None:
+                repo.record_success()
+                endpoint_breaker.record_success()
+            elif failure == "not_found" and endpoint not in REPO_NOT_FOUND_ENDPOINTS:
+                endpoint_breaker.record_success()
+            elif failure in self.repo_thresholds:
+                # The endpoint answered, so it is healthy even if the repo is not
+                endpoint_breaker.record_success()
+                repo.record_failure(failure, self.repo_thresholds[failure])
+            elif failure in ("server", "network"):
+                endpoint_breaker.record_failure(failure)
+
+    def summary(self):
+        with self.lock:
+            return {
+                "open_repositories": {name: b.reason for name, b in self.repos.items() if b.state != "closed"},
+                "open_endpoints": {name: b.reason for name, b in self.endpoints.items() if b.state != "closed"},
+                "skipped": dict(self.skipped),
+            }
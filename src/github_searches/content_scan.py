@@ -0,0 +1,99 @@
+import codecs
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional
+
+class KeywordStreamMatcher:
+    """
+    Case-insensitive keyword matcher fed with raw file bytes chunk by chunk.
+
+    - Bytes are decoded incrementally as UTF-8; invalid sequences are replaced
+      instead of failing the whole file
+    - The last (longest keyword - 1) characters of each chunk are kept, so a
+      keyword split across two chunks is still found
+    - `done` turns true once at least one keyword of every group has been seen,
+      which lets the caller stop downloading
+    """
+
+    def __init__(self, keyword_groups: Dict[str, Iterable[str]]):
+        self.keyword_groups = {name: list(keywords) for name, keywords in keyword_groups.items()}
+        self._lowered = {
+            name: [(keyword, keyword.lower()) for keyword in keywords]
+            for name, keywords in self.keyword_groups.items()
+        }
+        self.found = {name: [] for name in self.keyword_groups}
+        self.bytes_read = 0
+        self._decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        longest = max((len(k) for keywords in self.keyword_groups.values() for k in keywords), default=1)
+        self._overlap = max(longest - 1, 0)
+        self._tail = ''
+
+    @property
+    def done(self) -> bool:
+        return all(self.found[name] for name in self.keyword_groups)
+
+    @property
+    def complete(self) -> bool:
+        """True once every keyword has been seen, so nothing more can change"""
+        return all(len(self.found[name]) == len(keywords) for name, keywords in self.keyword_groups.items())
+
+    def feed(self, chunk: bytes, final: bool = False):
+        self.bytes_read += len(chunk)
+        text = self._tail + self._decoder.decode(chunk, final=final).lower()
+
+        for name, keywords in self._lowered.items():
+            found = self.found[name]
+            for keyword, keyword_lower in keywords:
+                if keyword not in found and keyword_lower in text:
+                    found.append(keyword)
+
+        self._tail = text[-self._overlap:] if self._overlap else ''
+
+    def finish(self):
+        self.feed(b'', final=True)
+
+    def found_in_order(self, name: str) -> List[str]:
+        """Found keywords of a group in configuration order, as the full-text scan reported them"""
+        return [keyword for keyword in self.keyword_groups[name] if keyword in self.found[name]]
+
+def scan_bytes(content: bytes, keyword_groups: Dict[str, Iterable[str]]) -> Dict[str, List[str]]:
+    """Whole-file scan: found keywords of each group, in configuration order"""
+    matcher = KeywordStreamMatcher(keyword_groups)
+    matcher.feed(content, final=True)
+    return {name: matcher.found_in_order(name) for name in matcher.keyword_groups}
+
+def scan_batch(contents: List[bytes], keyword_groups: Dict[str, Iterable[str]]) -> List[Dict[str, List[str]]]:
+    return [scan_bytes(content, keyword_groups) for content in contents]
+
+class ContentScanPool:
+    """
+    CPU tier of the content analysis: UTF-8 decoding, lowercasing and keyword
+    matching run in worker processes, so the threads downloading files never
+    wait on the GIL.
+
+    - Raw bytes are sent in batches of about batch_bytes, to amortize pickling
+    - Only the compact found-keyword lists come back
+    """
+
+    def __init__(self, keyword_groups: Dict[str, Iterable[str]], max_workers: Optional[int] = None,
+                 batch_bytes: int = 4 * 1024 * 1024):
+        self.keyword_groups = {name: list(keywords) for name, keywords in keyword_groups.items()}
+        self.batch_bytes = batch_bytes
+        self.executor = ProcessPoolExecutor(max_workers=max_workers)
+
+    def scan(self, contents: List[bytes]) -> List[Dict[str, List[str]]]:
+        """Scan every content and return the results in the same order"""
+        batches, batch, size = [], [], 0
+        for content in contents:
+            if batch and size + len(content) > self.batch_bytes:
+                batches.append(batch)
+                batch, size = [], 0
+            batch.append(content)
+            size += len(content)
+        if batch:
+            batches.append(batch)
+
+        futures = [self.executor.submit(scan_batch, batch, self.keyword_groups) for batch in batches]
+        return [result for future in futures for result in future.result()]
+
+    def close(self):
+        self.executor.shutdown()
@@ -0,0 +1,251 @@
+import argparse
+import glob
+import json
+import math
+import time
+from datetime import datetime
+
+from config.filters import LANGUAGES, SEARCH_START_DATE, SEARCH_END_DATE, SEARCH_WINDOW_DAYS
+from src.auth.get_token import get_github_token
+from src.github_searches.pr_search import (
+    create_session_with_retries,
+    safe_api_request,
+    build_search_url,
+    daterange,
+    search_windows
+)
+from src.github_searches.pagination import DEFAULT_WORKERS as PAGE_WORKERS
+
+# GitHub REST limits per token
+SEARCH_REQUESTS_PER_MINUTE = 30
+CORE_REQUESTS_PER_HOUR = 5000
+SEARCH_RESULTS_CAP = 1000
+
+# Fixed sleeps in search_github_prs / GitHubTestAnalyzer, per worker. Search pages have
+# none: they are paced only by the QuotaScheduler, PAGE_WORKERS pages of a window at a time
+SLEEP_PER_PR = 0.2
+SLEEP_PER_FILE = 0.1
+
+# Used when no earlier run is found; the last full run (2020-2025, javascript)
+# matched 300 of 27,577 processed PRs with 777 test files analyzed
+DEFAULT_YIELDS = {
+    'match_ratio': 300 / 27577,
+    'term_match_ratio': None,
+    'files_per_matched_pr': 777 / 300,
+    'source': 'built-in defaults',
+}
+
+def load_observed_yields(search_glob="data_repos/race_condition_prs*.json",
+                         analysis_glob="data_repos/filtered_race_condition_prs*.json"):
+    """
+    Derive yield ratios from the statistics saved by earlier runs.
+
+    term_match_ratio (search items with a term in title/body, i.e. the ones that
+    cost PR calls) is only recorded by runs that saved 'term_matches'; when it is
+    missing the plan assumes every search item needs PR calls (an upper bound).
+    """
+    yields = dict(DEFAULT_YIELDS)
+    processed = matched = term_matches = 0
+    has_term_matches = True
+    sources = []
+
+    for path in sorted(glob.glob(search_glob)):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                stats = json.load(f).get('metadata', {}).get('statistics', {})
+        except (OSError, json.JSONDecodeError):
+            continue
+        if not stats.get('processed'):
+            continue
+        processed += stats['processed']
+        matched += stats.get('matching_all_criteria', 0)
+        if 'term_matches' in stats:
+            term_matches += stats['term_matches']
+        else:
+            has_term_matches = False
+        sources.append(path)
+
+    if processed:
+        yields['match_ratio'] = matched / processed
+        yields['term_match_ratio'] = term_matches / processed if has_term_matches else None
+
+    analyzed = files = 0
+    for path in sorted(glob.glob(analysis_glob)):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                stats = json.load(f).get('metadata', {}).get('statistics', {})
+        except (OSError, json.JSONDecodeError):
+            continue
+        if not stats.get('total_prs_analyzed'):
+            continue
+        analyzed += stats['total_prs_analyzed']
+        files += stats.get('total_files_analyzed', 0)
+        sources.append(path)
+
+    if analyzed:
+        yields['files_per_matched_pr'] = files / analyzed
+
+    if sources:
+        yields['source'] = ", ".join(sources)
+    return yields
+
+def probe_window_counts(session, headers, probe_days=90, exact=False):
+    """
+    Estimate the number of search results in every configured search window.
+
+    By default one per_page=1 query is made per probe_days period and its
+    total_count is spread, by days of overlap, over the search_windows() that
+    overlap it; with exact=True every search window is probed on its own.
+
+    Returns:
+        (list of estimated counts per search window, number of search calls spent)
+    """
+    start_date = datetime.strptime(SEARCH_START_DATE, '%Y-%m-%d')
+    end_date = datetime.strptime(SEARCH_END_DATE, '%Y-%m-%d')
+    span_days = probe_days if not exact else SEARCH_WINDOW_DAYS
+    windows = list(search_windows())
+    counts = []
+    calls = 0
+
+    for lang in LANGUAGES:
+        lang_counts = [0.0] * len(windows)
+        for probe_start, probe_end in daterange(start_date, end_date, span_days):
+            response = safe_api_request(session, build_search_url(lang, probe_start, probe_end, per_page=1), headers)
+            calls += 1
+
+            if response is None or response.status_code != 200:
+                print(f"⚠️ Probe failed for {lang} {probe_start.date()}..{probe_end.date()}")
+                total = 0
+            else:
+                total = response.json().get('total_count', 0)
+
+            probe_span = max((probe_end - probe_start).days, 1)
+            for i, (start, end) in enumerate(windows):
+                overlap = (min(end, probe_end) - max(start, probe_start)).days
+                if overlap > 0:
+                    lang_counts[i] += total * overlap / probe_span
+
+            print(f"🔍 {lang} {probe_start.date()}..{probe_end.date()}: {total} results")
+            # Stay under the 30/min search limit
+            time.sleep(60 / SEARCH_REQUESTS_PER_MINUTE)
+        counts.extend(lang_counts)
+
+    return counts, calls
+
+def estimate_crawl(window_counts, yields, concurrency=1, tokens=1, avg_latency=0.6, target_hours=None):
+    """
+    Turn window counts and yield ratios into request counts and wall time.
+
+    Args:
+        window_counts: Estimated search results per search window
+        yields: Output of load_observed_yields
+        concurrency: Number of parallel workers
+        tokens: Number of GitHub tokens shared by the workers
+        avg_latency: Average seconds per API call
+        target_hours: If given, also report the tokens needed to finish in that time
+    """
+    capped = [min(count, SEARCH_RESULTS_CAP) for count in window_counts]
+    search_calls = sum(max(1, math.ceil(count / 100)) for count in capped)
+    search_items = sum(capped)
+    truncated_windows = sum(1 for count in window_counts if count > SEARCH_RESULTS_CAP)
+
+    term_match_ratio = yields['term_match_ratio']
+    term_matches = search_items * (term_match_ratio if term_match_ratio is not None else 1.0)
+    matched_prs = search_items * yields['match_ratio']
+
+    # process_pr: PR details + file list per term match
+    pr_calls = 2 * term_matches
+    # analyze_pr: head SHA + one contents call per test file
+    content_calls = matched_prs * (1 + yields['files_per_matched_pr'])
+    core_calls = pr_calls + content_calls
+
+    # Throughput is bounded by the per-token rate limits and by what the workers can issue
+    search_rate = min(tokens * SEARCH_REQUESTS_PER_MINUTE / 60, concurrency * PAGE_WORKERS / avg_latency)
+    core_rate = min(tokens * CORE_REQUESTS_PER_HOUR / 3600, concurrency / (avg_latency + SLEEP_PER_FILE))
+    # enrich_candidate sleeps once per candidate it enriches (PRs with a term match)
+    sleep_seconds = (term_matches * SLEEP_PER_PR + content_calls * SLEEP_PER_FILE) / concurrency
+
+    search_hours = search_calls / search_rate / 3600
+    core_hours = core_calls / core_rate / 3600
+    wall_hours = search_hours + core_hours + sleep_seconds / 3600
+
+    estimate = {
+        'windows': len(window_counts),
+        'truncated_windows': truncated_windows,
+        'search_items': round(search_items),
+        'requests': {
+            'search': search_calls,
+            'pr': round(pr_calls),
+            'content': round(content_calls),
+        },
+        'expected_matches': round(matched_prs),
+        'term_match_ratio_known': term_match_ratio is not None,
+        'concurrency': concurrency,
+        'tokens': tokens,
+        'wall_hours': round(wall_hours, 2),
+        'yields_source': yields['source'],
+    }
+
+    if target_hours:
+        estimate['tokens_needed'] = {
+            'target_hours': target_hours,
+            'tokens': max(
+                math.ceil(search_calls / (SEARCH_REQUESTS_PER_MINUTE * 60 * target_hours)),
+                math.ceil(core_calls / (CORE_REQUESTS_PER_HOUR * target_hours)),
+                1
+            )
+        }
+
+    return estimate
+
+def print_estimate(estimate):
+    print("\n" + "="*60)
+    print("🧮 CRAWL PLAN (dry run)")
+    print("="*60)
+    print(f"Search windows: {estimate['windows']} ({estimate['truncated_windows']} over the {SEARCH_RESULTS_CAP}-result cap)")
+    print(f"Search items to process: {estimate['search_items']}")
+    print(f"Search requests: {estimate['requests']['search']}")
+    bound = "" if estimate['term_match_ratio_known'] else " (upper bound: no term-match ratio recorded yet)"
+    print(f"PR requests: {estimate['requests']['pr']}{bound}")
+    print(f"Content requests: {estimate['requests']['content']}")
+    print(f"Expected matching PRs: {estimate['expected_matches']}")
+    print(f"Wall time with {estimate['concurrency']} worker(s) and {estimate['tokens']} token(s): {estimate['wall_hours']} h")
+    if 'tokens_needed' in estimate:
+        needed = estimate['tokens_needed']
+        print(f"Tokens needed to finish in {needed['target_hours']} h: {needed['tokens']}")
+    print(f"Yield ratios from: {estimate['yields_source']}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Estimate the API cost and wall time of a crawl without running it")
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--tokens", type=int, default=1)
+    parser.add_argument("--target-hours", type=float, default=None)
+    parser.add_argument("--probe-days", type=int, default=90,
+                        help="Length of each probed period; counts are spread over the search windows inside it")
+    parser.add_argument("--exact", action="store_true", help="Probe every search window separately")
+    parser.add_argument("--output", default=None, help="Also write the estimate as JSON")
+    args = parser.parse_args(argv)
+
+    token = get_github_token()
+    headers = {
+        "Accept": "application/vnd.github.v3+json",
+        "Authorization": f"token {token}"
+    }
+
+    session = create_session_with_retries()
+    window_counts, probe_calls = probe_window_counts(session, headers, args.probe_days, args.exact)
+    print(f"🔍 Probing used {probe_calls} search requests")
+
+    estimate = estimate_crawl(window_counts, load_observed_yields(), args.concurrency, args.tokens,
+                              target_hours=args.target_hours)
+    estimate['probe_requests'] = probe_calls
+    print_estimate(estimate)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(estimate, f, indent=2, ensure_ascii=False)
+
+    return estimate
+
+if __name__ == "__main__":
+    main()
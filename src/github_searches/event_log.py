@@ -0,0 +1,226 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+from collections import Counter
+
+LOGGER_NAME = "race_scraper"
+
+# Console sampling per event type: one of every N INFO events is shown.
+# The JSON-lines file always gets every event.
+DEFAULT_SAMPLE_EVERY = {
+    "search.page": 5,
+    "analysis.file": 10,
+    "analysis.pr": 5,
+    "net.retry": 1,
+}
+# Console lines per second per event type, for every level
+DEFAULT_MAX_PER_SECOND = 20.0
+DEFAULT_RATE_LIMITS = {
+    "analysis.file": 5.0,
+    "search.page": 5.0,
+}
+
+PROGRESS_INTERVAL = 1.0
+
+class SampleFilter(logging.Filter):
+    """Per-event-type sampling (INFO only) and token-bucket rate limiting of console lines"""
+
+    def __init__(self, sample_every=None, rate_limits=None, default_rate=DEFAULT_MAX_PER_SECOND):
+        super().__init__()
+        self.sample_every = {**DEFAULT_SAMPLE_EVERY, **(sample_every or {})}
+        self.rate_limits = {**DEFAULT_RATE_LIMITS, **(rate_limits or {})}
+        self.default_rate = default_rate
+        self.seen = Counter()
+        self.dropped = Counter()
+        self._buckets = {}
+
+    def _take_token(self, event):
+        rate = self.rate_limits.get(event, self.default_rate)
+        now = time.monotonic()
+        tokens, last = self._buckets.get(event, (rate, now))
+        tokens = min(rate, tokens + (now - last) * rate)
+        if tokens < 1:
+            self._buckets[event] = (tokens, now)
+            return False
+        self._buckets[event] = (tokens - 1, now)
+        return True
+
+    def filter(self, record):
+        event = getattr(record, "event", "message")
+        self.seen[event] += 1
+        every = self.sample_every.get(event, 1)
+        if record.levelno <= logging.INFO and every > 1 and self.seen[event] % every != 1:
+            self.dropped[event] += 1
+            return False
+        if not self._take_token(event):
+            self.dropped[event] += 1
+            return False
+        return True
+
+class JsonLinesHandler(logging.Handler):
+    """One compact JSON object per event: ts, level, event, msg and the event's fields"""
+
+    def __init__(self, path, flush_interval=1.0):
+        super().__init__()
+        self.stream = open(path, "a", encoding="utf-8")
+        self.flush_interval = flush_interval
+        self._last_flush = time.monotonic()
+
+    def emit(self, record):
+        try:
+            entry = {
+                "ts": round(record.created, 3),
+                "level": record.levelname,
+                "event": getattr(record, "event", "message"),
+                "msg": record.getMessage(),
+            }
+            entry.update(getattr(record, "fields", {}))
+            self.stream.write(json.dumps(entry, ensure_ascii=False, separators=(",", ":"), default=str) + "\n")
+            if time.monotonic() - self._last_flush >= self.flush_interval:
+                self.stream.flush()
+                self._last_flush = time.monotonic()
+        except Exception:
+            self.handleError(record)
+
+    def close(self):
+        try:
+            self.stream.flush()
+            self.stream.close()
+        finally:
+            super().close()
+
+class ProgressHandler(logging.Handler):
+    """
+    Interactive mode: instead of one line per event, a single status line with the
+    event counts is redrawn at most once per interval; warnings and errors still
+    get their own line
+    """
+
+    def __init__(self, stream=None, interval=PROGRESS_INTERVAL, console_filter=None):
+        super().__init__()
+        self.stream = stream or sys.stderr
+        self.interval = interval
+        self.console_filter = console_filter
+        self.counts = Counter()
+        self._last_draw = 0.0
+        self._started = time.monotonic()
+
+    def _line(self):
+        elapsed = time.monotonic() - self._started
+        parts = [f"{event}={count}" for event, count in sorted(self.counts.items())]
+        return f"\r⚡ [{elapsed:6.0f}s] " + " ".join(parts)
+
+    def emit(self, record):
+        try:
+            self.counts[getattr(record, "event", "message")] += 1
+            if record.levelno >= logging.WARNING and (self.console_filter is None or self.console_filter.filter(record)):
+                self.stream.write("\n" + record.getMessage() + "\n")
+            now = time.monotonic()
+            if now - self._last_draw >= self.interval:
+                self.stream.write(self._line())
+                self.stream.flush()
+                self._last_draw = now
+        except Exception:
+            self.handleError(record)
+
+    def close(self):
+        self.stream.write(self._line() + "\n")
+        self.stream.flush()
+        super().close()
+
+class SubscriberHandler(logging.Handler):
+    """Hands every record to the callbacks registered with subscribe() (e.g. per-job progress)"""
+
+    def emit(self, record):
+        for callback in list(_subscribers):
+            try:
+                callback(record)
+            except Exception:
+                self.handleError(record)
+
+_listener = None
+_subscribers = []
+_lock = threading.RLock()
+
+def configure_event_log(jsonl_path=None, console="lines", sample_every=None, rate_limits=None):
+    """
+    Route the event log through a queue to a background thread
+
+    Args:
+        jsonl_path: Append every event as compact JSON lines to this file
+        console: 'lines' (sampled and rate-limited lines on stdout), 'progress'
+                 (one summarized status line) or 'off'
+        sample_every / rate_limits: Overrides of the per-event console sampling and lines per second
+    """
+    global _listener
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            for handler in _listener.handlers:
+                handler.close()
+
+        handlers = [SubscriberHandler()]
+        console_filter = SampleFilter(sample_every, rate_limits)
+        if console == "lines":
+            handler = logging.StreamHandler(sys.stdout)
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            handler.addFilter(console_filter)
+            handlers.append(handler)
+        elif console == "progress":
+            handlers.append(ProgressHandler(console_filter=console_filter))
+        if jsonl_path:
+            handlers.append(JsonLinesHandler(jsonl_path))
+
+        event_queue = queue.SimpleQueue()
+        logger = logging.getLogger(LOGGER_NAME)
+        logger.handlers = [logging.handlers.QueueHandler(event_queue)]
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+
+        _listener = logging.handlers.QueueListener(event_queue, *handlers)
+        _listener.start()
+        return _listener
+
+def shutdown_event_log():
+    """Drain the queue and close the handlers (registered with atexit)"""
+    global _listener
+    with _lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+atexit.register(shutdown_event_log)
+
+def flush_event_log():
+    """Wait until every queued event has been handled (before printing a summary, for instance)"""
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener.start()
+
+def subscribe(callback):
+    """Call callback(record) on the listener thread for every event; record.event and record.fields are set"""
+    _subscribers.append(callback)
+
+def unsubscribe(callback):
+    if callback in _subscribers:
+        _subscribers.remove(callback)
+
+def log_event(event, message, level=logging.INFO, **fields):
+    """
+    Record one event; the caller's thread only enqueues it. Without a
+    configure_event_log call, events go to stdout in 'lines' mode.
+    """
+    if _listener is None:
+        with _lock:
+            if _listener is None:
+                configure_event_log()
+    logging.getLogger(LOGGER_NAME).log(level, message, extra={"event": event, "fields": fields})
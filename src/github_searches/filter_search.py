@@ -1,30 +1,190 @@
+import argparse
 import json
+import os
 import requests
 import time
 import re
-from typing import List, Dict, Tuple, Optional
-import base64
+import threading
+from itertools import chain
+from logging import WARNING
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Tuple, Optional, Iterator
+from urllib.parse import quote
+
+from src.github_searches.content_scan import KeywordStreamMatcher, ContentScanPool, scan_bytes
+from src.github_searches.latency import hedged_get, endpoint_class
+from src.github_searches.circuit_breaker import BreakerBoard, classify_response, quota_wait_seconds
+from src.github_searches.aggregates import RunAggregates
+from src.github_searches.records import compact_matching_project, DictView
+from src.github_searches.prioritizer import RepoHistory, score_candidate, prioritized
+from src.github_searches.event_log import log_event, flush_event_log, configure_event_log
+from src.github_searches.raw_archive import ArchivingSession, RawArchive, configure_archive
+from src.github_searches.git_mirror import GitMirrorPool, GitMirrorError, DEFAULT_MIRROR_DIR
+from src.github_searches.single_flight import DEFAULT_FLIGHTS, shared_json
+from src.profiling.profiler import profiled_run
+
+# Media type que devolve o arquivo cru (sem JSON/base64) e funciona acima de 1 MB
+RAW_MEDIA_TYPE = "application/vnd.github.raw"
+
+def contents_url(repo_name: str, file_path: str, ref: Optional[str] = None) -> str:
+    """URL da API de conteúdo de um arquivo (a mesma para a análise e para o prefetch)"""
+    url = f"https://api.github.com/repos/{repo_name}/contents/{quote(file_path)}"
+    return f"{url}?ref={ref}" if ref else url
+
+JOURNAL_SUFFIX = ".journal.ndjson"
+INPUT_CHUNK_SIZE = 1024 * 1024
+PULL_REQUESTS_KEY = re.compile(r'"pull_requests"\s*:\s*\[')
+
+def iter_pull_requests(input_json_path: str) -> Iterator[Dict]:
+    """
+    Lê os PRs de entrada um a um, sem carregar o arquivo inteiro
+    
+    Aceita NDJSON/JSONL (um PR por linha) ou o JSON salvo por search_github_prs,
+    cuja lista 'pull_requests' é decodificada objeto a objeto.
+    """
+    if input_json_path.endswith(('.ndjson', '.jsonl')):
+        with open(input_json_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        return
+    
+    decoder = json.JSONDecoder()
+    with open(input_json_path, 'r', encoding='utf-8') as f:
+        buffer = ''
+        # Avança até a abertura da lista 'pull_requests' (a chave pode cair entre dois blocos)
+        while True:
+            chunk = f.read(INPUT_CHUNK_SIZE)
+            buffer += chunk
+            match = PULL_REQUESTS_KEY.search(buffer)
+            if match:
+                buffer = buffer[match.end():]
+                break
+            if not chunk:
+                return
+            buffer = buffer[-64:]
+        
+        eof = False
+        while True:
+            buffer = buffer.lstrip(' \t\r\n,')
+            if buffer.startswith(']'):
+                return
+            try:
+                pr_data, end = decoder.raw_decode(buffer)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                chunk = f.read(INPUT_CHUNK_SIZE)
+                eof = not chunk
+                buffer += chunk
+                continue
+            yield pr_data
+            buffer = buffer[end:]
+
+def load_journal(journal_path: str) -> List[Dict]:
+    """Lê o diário NDJSON; linhas cortadas por uma queda no meio da escrita são ignoradas"""
+    entries = []
+    try:
+        with open(journal_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    continue
+    except FileNotFoundError:
+        pass
+    return entries
+
+def open_journal(journal_path: str):
+    """Abre o diário para acrescentar linhas, terminando antes uma linha cortada"""
+    truncated = False
+    try:
+        with open(journal_path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell() > 0:
+                f.seek(-1, os.SEEK_END)
+                truncated = f.read(1) != b"\n"
+    except FileNotFoundError:
+        pass
+    
+    journal = open(journal_path, 'a', encoding='utf-8')
+    if truncated:
+        journal.write("\n")
+    return journal
 
 class GitHubTestAnalyzer:
-    def __init__(self, headers: Dict[str, str]):
+    def __init__(self, headers: Dict[str, str], max_content_bytes: int = 2 * 1024 * 1024,
+                 chunk_size: int = 64 * 1024, stop_on_match: bool = True,
+                 io_workers: int = 1, cpu_workers: int = 0, session: Optional[requests.Session] = None,
+                 request_delay: float = 0.1, test_keywords: Optional[List[str]] = None,
+                 async_keywords: Optional[List[str]] = None, git_mirrors: Optional[GitMirrorPool] = None):
         """
         Inicializa o analisador com headers do GitHub
         
         Args:
             headers: Headers para requisições HTTP incluindo Authorization token
+            max_content_bytes: Máximo de bytes baixados por arquivo
+            chunk_size: Tamanho de cada bloco lido do stream
+            stop_on_match: Cancela o download assim que houver uma keyword de teste e uma async
+            io_workers: Threads baixando os arquivos de um PR em paralelo
+            cpu_workers: Processos que decodificam e buscam as keywords (0 = na própria thread,
+                         em streaming; com processos os arquivos são baixados inteiros até o limite)
+            session: Sessão HTTP (padrão: ArchivingSession, que grava as respostas no arquivo
+                     de payloads se configure_archive foi chamado)
+            request_delay: Pausa entre arquivos no modo streaming
+            test_keywords / async_keywords: Substituem as palavras-chave padrão
+            git_mirrors: Espelhos git locais; SHA e arquivos do PR são lidos deles e a API
+                         só é usada para o que o espelho não tiver
         """
         self.headers = headers
+        self.max_content_bytes = max_content_bytes
+        self.chunk_size = chunk_size
+        self.stop_on_match = stop_on_match
+        # Sessão compartilhada: reaproveita conexões e permite requisições hedged
+        self.session = session or ArchivingSession()
+        self.request_delay = request_delay
+        self.io_workers = io_workers
+        self.cpu_workers = cpu_workers
+        self._scan_pool = None
+        self.git_mirrors = git_mirrors
         
         # Palavras-chave para buscar
-        self.test_keywords = ["describe(", "it(", "test("]
-        self.async_keywords = ["promise", "async"]
+        self.test_keywords = test_keywords or ["describe(", "it(", "test("]
+        self.async_keywords = async_keywords or ["promise", "async"]
         
         # Controle de rate limiting
         self.request_count = 0
         self.start_time = time.time()
+        self._rate_lock = threading.Lock()
+        
+        # Circuit breakers por repositório e por classe de endpoint
+        self.breakers = BreakerBoard()
+        
+        # Leituras idênticas em andamento em outras threads são compartilhadas em vez de repetidas
+        self.flights = DEFAULT_FLIGHTS
+    
+    @property
+    def scan_pool(self) -> Optional[ContentScanPool]:
+        """Pool de processos da etapa de CPU, criado no primeiro uso"""
+        if self.cpu_workers and self._scan_pool is None:
+            self._scan_pool = ContentScanPool(
+                {'test': self.test_keywords, 'async': self.async_keywords},
+                max_workers=self.cpu_workers
+            )
+        return self._scan_pool
+    
+    def close(self) -> None:
+        if self._scan_pool is not None:
+            self._scan_pool.close()
+            self._scan_pool = None
+        self.session.close()
     
     def check_rate_limit(self):
         """Verifica e controla o rate limit da API do GitHub"""
+        with self._rate_lock:
+            self._check_rate_limit()
+    
+    def _check_rate_limit(self):
         self.request_count += 1
         
         # GitHub permite 60 requests/hora sem autenticação, 5000 com token
@@ -42,9 +202,55 @@ class GitHubTestAnalyzer:
                 self.request_count = 0
                 self.start_time = time.time()
     
-    def get_file_content(self, repo_name: str, file_path: str, pr_sha: Optional[str] = None) -> Optional[str]:
+    def guarded_get(self, repo_name: str, url: str, headers: Dict[str, str],
+                    stream: bool = False) -> Tuple[Optional[requests.Response], Optional[str]]:
         """
-        Obtém o conteúdo de um arquivo do repositório
+        GET protegido pelos circuit breakers do repositório e da classe de endpoint
+        
+        - Com o breaker do repositório aberto nenhuma requisição é feita
+        - Com o breaker do endpoint aberto (5xx/rede em sequência) espera-se o teste half-open
+        - Um 403/429 de cota espera o reset indicado nos headers e tenta mais uma vez,
+          sem contar como falha do repositório
+        
+        Returns:
+            Tupla (resposta ou None, classe da falha ou None); 'circuit_open:<motivo>' quando
+            o repositório foi ignorado
+        """
+        reason = self.breakers.repo_blocked(repo_name)
+        if reason:
+            return None, f"circuit_open:{reason}"
+        
+        endpoint = endpoint_class(url)
+        wait = self.breakers.endpoint_wait(endpoint)
+        if wait:
+            print(f"Endpoint '{endpoint}' instável, aguardando {wait:.0f} segundos...")
+            time.sleep(wait)
+        
+        # Respostas já no cache do prefetch não gastam cota
+        cached = isinstance(self.session, ArchivingSession) and self.session.has_cached(url)
+        for attempt in range(2):
+            if not cached:
+                self.check_rate_limit()
+            try:
+                response = hedged_get(self.session, url, headers=headers, stream=stream)
+            except requests.exceptions.RequestException:
+                self.breakers.record(repo_name, endpoint, 'network')
+                raise
+            
+            failure = classify_response(response)
+            if failure == 'quota' and attempt == 0:
+                wait = quota_wait_seconds(response)
+                response.close()
+                print(f"Rate limit atingido. Pausando por {wait:.0f} segundos...")
+                time.sleep(wait)
+                continue
+            
+            self.breakers.record(repo_name, endpoint, failure)
+            return response, failure
+    
+    def open_raw_content(self, repo_name: str, file_path: str, pr_sha: Optional[str] = None) -> Optional[requests.Response]:
+        """
+        Abre o conteúdo cru de um arquivo como stream
         
         Args:
             repo_name: Nome do repositório (formato: owner/repo)
@@ -52,92 +258,259 @@ class GitHubTestAnalyzer:
             pr_sha: SHA do commit do PR (opcional)
             
         Returns:
-            Conteúdo do arquivo como string ou None se não encontrado
+            Resposta em streaming (o chamador deve fechá-la) ou None se não encontrado
         """
-        self.check_rate_limit()
-        
         try:
             # URL da API para obter conteúdo do arquivo
-            if pr_sha:
-                url = f"https://api.github.com/repos/{repo_name}/contents/{file_path}?ref={pr_sha}"
-            else:
-                url = f"https://api.github.com/repos/{repo_name}/contents/{file_path}"
+            url = contents_url(repo_name, file_path, pr_sha)
             
-            response = requests.get(url, headers=self.headers, timeout=30)
+            headers = {**self.headers, "Accept": RAW_MEDIA_TYPE}
+            response, failure = self.guarded_get(repo_name, url, headers, stream=True)
             
-            if response.status_code == 200:
-                file_data = response.json()
-                
-                # O conteúdo vem codificado em base64
-                if 'content' in file_data:
-                    content = base64.b64decode(file_data['content']).decode('utf-8')
-                    return content
-                    
-            elif response.status_code == 404:
-                print(f"Arquivo não encontrado: {repo_name}/{file_path}")
-                return None
-            elif response.status_code == 403:
-                print(f"Rate limit atingido ou acesso negado para: {repo_name}/{file_path}")
-                time.sleep(60)  # Pausa de 1 minuto
+            if failure is None:
+                return response
+            
+            if response is None:
+                log_event("file.skipped", f"Repositório ignorado ({failure}): {repo_name}/{file_path}",
+                          repo=repo_name, file=file_path, reason=failure)
                 return None
+            
+            response.close()
+            if failure == 'not_found':
+                message = f"Arquivo não encontrado: {repo_name}/{file_path}"
+            elif failure == 'quota':
+                message = f"Rate limit persistente para: {repo_name}/{file_path}"
+            elif failure in ('access_denied', 'legal', 'gone'):
+                message = f"Acesso negado ({failure}) para: {repo_name}/{file_path}"
             else:
-                print(f"Erro {response.status_code} ao acessar: {repo_name}/{file_path}")
-                return None
+                message = f"Erro {response.status_code} ao acessar: {repo_name}/{file_path}"
+            log_event("file.error", message, WARNING, repo=repo_name, file=file_path,
+                      reason=failure, status=response.status_code)
+            return None
                 
         except requests.exceptions.RequestException as e:
-            print(f"Erro de requisição para {repo_name}/{file_path}: {e}")
+            log_event("file.error", f"Erro de requisição para {repo_name}/{file_path}: {e}", WARNING,
+                      repo=repo_name, file=file_path)
             return None
         except Exception as e:
-            print(f"Erro inesperado para {repo_name}/{file_path}: {e}")
+            log_event("file.error", f"Erro inesperado para {repo_name}/{file_path}: {e}", WARNING,
+                      repo=repo_name, file=file_path)
             return None
     
-    def get_pr_commit_sha(self, repo_name: str, pr_number: int) -> Optional[str]:
+    def scan_file_content(self, repo_name: str, file_path: str, pr_sha: Optional[str] = None) -> Optional[Dict]:
         """
-        Obtém o SHA do commit de um PR
+        Baixa o arquivo em blocos passando cada bloco pelo matcher de keywords
+        
+        O download é cancelado quando já foram vistas uma keyword de teste e uma async
+        (se stop_on_match) ou quando max_content_bytes é atingido. Nesses casos as
+        listas de keywords encontradas contêm apenas o que foi visto até o corte.
         
         Args:
-            repo_name: Nome do repositório
-            pr_number: Número do PR
+            repo_name: Nome do repositório (formato: owner/repo)
+            file_path: Caminho do arquivo
+            pr_sha: SHA do commit do PR (opcional)
             
         Returns:
-            SHA do commit ou None se não encontrado
+            Dicionário com as keywords encontradas e bytes lidos, ou None se não foi possível obter o arquivo
         """
-        self.check_rate_limit()
+        key = ('scan', contents_url(repo_name, file_path, pr_sha), tuple(self.test_keywords),
+               tuple(self.async_keywords), self.max_content_bytes, self.stop_on_match)
+        return self.flights.do(key, lambda: self._scan_file_content(repo_name, file_path, pr_sha))
+    
+    def _scan_file_content(self, repo_name: str, file_path: str, pr_sha: Optional[str] = None) -> Optional[Dict]:
+        response = self.open_raw_content(repo_name, file_path, pr_sha)
+        if response is None:
+            return None
+        
+        matcher = KeywordStreamMatcher({'test': self.test_keywords, 'async': self.async_keywords})
+        truncated = False
+        early_exit = False
         
         try:
-            url = f"https://api.github.com/repos/{repo_name}/pulls/{pr_number}"
-            response = requests.get(url, headers=self.headers, timeout=30)
-            
-            if response.status_code == 200:
-                pr_data = response.json()
-                return pr_data['head']['sha']
-            else:
-                print(f"Erro ao obter PR {pr_number} do repo {repo_name}: {response.status_code}")
-                return None
+            for chunk in response.iter_content(chunk_size=self.chunk_size):
+                remaining = self.max_content_bytes - matcher.bytes_read
+                if len(chunk) > remaining:
+                    matcher.feed(chunk[:remaining])
+                    truncated = True
+                    break
                 
-        except Exception as e:
-            print(f"Erro ao obter SHA do PR {repo_name}#{pr_number}: {e}")
+                matcher.feed(chunk)
+                if matcher.complete or (self.stop_on_match and matcher.done):
+                    early_exit = True
+                    break
+            matcher.finish()
+        except requests.exceptions.RequestException as e:
+            print(f"Erro de requisição para {repo_name}/{file_path}: {e}")
+            return None
+        finally:
+            # Fechar a resposta cancela o restante do download
+            response.close()
+        
+        return {
+            'found_test_keywords': matcher.found_in_order('test'),
+            'found_async_keywords': matcher.found_in_order('async'),
+            'bytes_read': matcher.bytes_read,
+            'truncated': truncated,
+            'early_exit': early_exit
+        }
+    
+    def get_raw_content(self, repo_name: str, file_path: str,
+                        pr_sha: Optional[str] = None) -> Optional[Tuple[bytes, bool]]:
+        """
+        Baixa os bytes crus de um arquivo (limitados a max_content_bytes), sem decodificar
+        
+        Returns:
+            Tupla (bytes, truncado) ou None se não foi possível obter o arquivo
+        """
+        key = ('raw', contents_url(repo_name, file_path, pr_sha), self.max_content_bytes)
+        return self.flights.do(key, lambda: self._get_raw_content(repo_name, file_path, pr_sha))
+    
+    def _get_raw_content(self, repo_name: str, file_path: str,
+                         pr_sha: Optional[str] = None) -> Optional[Tuple[bytes, bool]]:
+        response = self.open_raw_content(repo_name, file_path, pr_sha)
+        if response is None:
             return None
+        
+        try:
+            data = bytearray()
+            truncated = False
+            for chunk in response.iter_content(chunk_size=self.chunk_size):
+                data.extend(chunk)
+                if len(data) >= self.max_content_bytes:
+                    truncated = len(data) > self.max_content_bytes
+                    del data[self.max_content_bytes:]
+                    break
+            return bytes(data), truncated
+        except requests.exceptions.RequestException as e:
+            print(f"Erro de requisição para {repo_name}/{file_path}: {e}")
+            return None
+        finally:
+            response.close()
     
-    def check_keywords_in_content(self, content: str) -> Tuple[bool, bool]:
+    def get_file_content(self, repo_name: str, file_path: str, pr_sha: Optional[str] = None) -> Optional[str]:
         """
-        Verifica se o conteúdo contém as palavras-chave especificadas
+        Obtém o conteúdo de um arquivo do repositório (limitado a max_content_bytes)
         
         Args:
-            content: Conteúdo do arquivo
+            repo_name: Nome do repositório (formato: owner/repo)
+            file_path: Caminho do arquivo
+            pr_sha: SHA do commit do PR (opcional)
             
         Returns:
-            Tuple (tem_test_keywords, tem_async_keywords)
+            Conteúdo do arquivo como string ou None se não encontrado
         """
-        content_lower = content.lower()
+        raw = self.get_raw_content(repo_name, file_path, pr_sha)
+        if raw is None:
+            return None
+        return raw[0].decode('utf-8', errors='replace')
+    
+    def scan_files_offloaded(self, repo_name: str, file_paths: List[str],
+                             pr_sha: Optional[str] = None) -> List[Optional[Dict]]:
+        """
+        Mesmo resultado de scan_file_content para vários arquivos, separando as etapas:
+        threads (io_workers) baixam os bytes e o pool de processos faz a decodificação
+        e a busca das keywords, devolvendo só as listas encontradas
         
-        # Verifica palavras-chave de teste
-        has_test_keywords = any(keyword.lower() in content_lower for keyword in self.test_keywords)
+        Returns:
+            Lista na ordem de file_paths, com None para arquivos não obtidos
+        """
+        with ThreadPoolExecutor(max_workers=max(self.io_workers, 1)) as executor:
+            downloads = list(executor.map(lambda path: self.get_raw_content(repo_name, path, pr_sha), file_paths))
         
-        # Verifica palavras-chave de async
-        has_async_keywords = any(keyword.lower() in content_lower for keyword in self.async_keywords)
+        contents = [raw[0] for raw in downloads if raw is not None]
+        matches = iter(self.scan_pool.scan(contents))
         
-        return has_test_keywords, has_async_keywords
+        scans = []
+        for raw in downloads:
+            if raw is None:
+                scans.append(None)
+                continue
+            found = next(matches)
+            scans.append({
+                'found_test_keywords': found['test'],
+                'found_async_keywords': found['async'],
+                'bytes_read': len(raw[0]),
+                'truncated': raw[1],
+                'early_exit': False
+            })
+        return scans
+    
+    def mirror_pr_sha(self, repo_name: str, pr_number: int) -> Optional[str]:
+        """
+        SHA do PR pelo espelho git local (o ref do PR é buscado se ainda não estiver nele)
+        
+        Returns:
+            SHA do commit ou None sem espelhos, se o PR não existir ou se o git falhar
+        """
+        if self.git_mirrors is None:
+            return None
+        try:
+            return self.git_mirrors.mirror(repo_name).head_sha(pr_number)
+        except GitMirrorError as e:
+            log_event("mirror.error", f"Espelho git indisponível para {repo_name}#{pr_number}: {e}", WARNING,
+                      repo=repo_name, pr_number=pr_number)
+            return None
+    
+    def scan_files_from_mirror(self, repo_name: str, file_paths: List[str], pr_sha: str) -> List[Optional[Dict]]:
+        """
+        Mesmo resultado de scan_files_offloaded, lendo os arquivos do espelho git local
+        
+        Arquivos que o espelho não consegue entregar são obtidos pela API (scan_file_content).
+        """
+        mirror = self.git_mirrors.mirror(repo_name)
+        keyword_groups = {'test': self.test_keywords, 'async': self.async_keywords}
+        scans = []
+        for file_path in file_paths:
+            try:
+                content = mirror.file_content(pr_sha, file_path)
+            except GitMirrorError:
+                content = None
+            if content is None:
+                scans.append(self.scan_file_content(repo_name, file_path, pr_sha))
+                continue
+            truncated = len(content) > self.max_content_bytes
+            content = content[:self.max_content_bytes]
+            found = scan_bytes(content, keyword_groups)
+            scans.append({
+                'found_test_keywords': found['test'],
+                'found_async_keywords': found['async'],
+                'bytes_read': len(content),
+                'truncated': truncated,
+                'early_exit': False
+            })
+        return scans
+    
+    def get_pr_commit_sha(self, repo_name: str, pr_number: int) -> Optional[str]:
+        """
+        Obtém o SHA do commit de um PR
+        
+        Args:
+            repo_name: Nome do repositório
+            pr_number: Número do PR
+            
+        Returns:
+            SHA do commit ou None se não encontrado
+        """
+        try:
+            url = f"https://api.github.com/repos/{repo_name}/pulls/{pr_number}"
+            response, failure = self.guarded_get(repo_name, url, self.headers)
+            
+            if failure is None:
+                pr_data = shared_json(response)
+                return pr_data['head']['sha']
+            elif response is None:
+                log_event("pr.skipped", f"Repositório ignorado ({failure}): {repo_name}#{pr_number}",
+                          repo=repo_name, pr_number=pr_number, reason=failure)
+                return None
+            else:
+                log_event("pr.error", f"Erro ao obter PR {pr_number} do repo {repo_name}: {response.status_code} ({failure})",
+                          WARNING, repo=repo_name, pr_number=pr_number, status=response.status_code)
+                return None
+                
+        except Exception as e:
+            log_event("pr.error", f"Erro ao obter SHA do PR {repo_name}#{pr_number}: {e}", WARNING,
+                      repo=repo_name, pr_number=pr_number)
+            return None
     
     def analyze_pr(self, pr_data: Dict) -> Dict:
         """
@@ -153,10 +526,7 @@ class GitHubTestAnalyzer:
         pr_url = pr_data['pr_url']
         pr_number = int(pr_url.split('/')[-1])
         
-        print(f"\nAnalisando PR: {pr_url}")
-        
-        # Obter SHA do commit do PR
-        pr_sha = self.get_pr_commit_sha(repo_name, pr_number)
+        log_event("analysis.pr", f"\nAnalisando PR: {pr_url}", pr_url=pr_url)
         
         results = {
             'repo_name': repo_name,
@@ -173,9 +543,37 @@ class GitHubTestAnalyzer:
             'error_message': None
         }
         
+        # Obter SHA do commit do PR, a menos que o repositório já esteja com o breaker aberto
+        skip_reason = self.breakers.repo_open_reason(repo_name)
+        mirrored = False
+        if not skip_reason:
+            # Com o espelho git, o PR inteiro sai do disco; a API fica como reserva
+            pr_sha = self.mirror_pr_sha(repo_name, pr_number)
+            mirrored = pr_sha is not None
+            if not mirrored:
+                pr_sha = self.get_pr_commit_sha(repo_name, pr_number)
+                skip_reason = self.breakers.repo_open_reason(repo_name)
+        
+        # Repositório removido, privado ou bloqueado: nada do PR é requisitado até o próximo teste
+        if skip_reason:
+            log_event("analysis.skipped", f"Repositório {repo_name} ignorado pelo circuit breaker ({skip_reason})",
+                      pr_url=pr_url, reason=skip_reason)
+            self.breakers.note_skipped(skip_reason)
+            results['analysis_success'] = False
+            results['error_message'] = f"circuit open: {skip_reason}"
+            return results
+        
         try:
-            for file_path in pr_data.get('js_test_files', []):
-                print(f"  Analisando arquivo: {file_path}")
+            file_paths = pr_data.get('js_test_files', [])
+            # Com a etapa de CPU em processos, todos os arquivos do PR são baixados e analisados juntos
+            if mirrored:
+                prefetched = self.scan_files_from_mirror(repo_name, file_paths, pr_sha)
+            elif self.scan_pool:
+                prefetched = self.scan_files_offloaded(repo_name, file_paths, pr_sha)
+            else:
+                prefetched = None
+            
+            for index, file_path in enumerate(file_paths):
                 
                 file_result = {
                     'file_path': file_path,
@@ -186,175 +584,285 @@ class GitHubTestAnalyzer:
                     'content_retrieved': False
                 }
                 
-                # Obter conteúdo do arquivo
-                content = self.get_file_content(repo_name, file_path, pr_sha)
+                # Obter conteúdo do arquivo em streaming, verificando as palavras-chave
+                if prefetched is not None:
+                    scan = prefetched[index]
+                else:
+                    scan = self.scan_file_content(repo_name, file_path, pr_sha)
                 
-                if content:
+                if scan and scan['bytes_read']:
                     file_result['content_retrieved'] = True
                     
-                    # Verificar palavras-chave
-                    has_test, has_async = self.check_keywords_in_content(content)
+                    # Palavras-chave específicas encontradas
+                    file_result['found_test_keywords'] = scan['found_test_keywords']
+                    file_result['found_async_keywords'] = scan['found_async_keywords']
+                    
+                    has_test = bool(scan['found_test_keywords'])
+                    has_async = bool(scan['found_async_keywords'])
                     file_result['has_test_keywords'] = has_test
                     file_result['has_async_keywords'] = has_async
                     
-                    # Encontrar palavras-chave específicas encontradas
-                    content_lower = content.lower()
-                    file_result['found_test_keywords'] = [kw for kw in self.test_keywords if kw.lower() in content_lower]
-                    file_result['found_async_keywords'] = [kw for kw in self.async_keywords if kw.lower() in content_lower]
-                    
                     # Verificar se tem ambos os tipos de keywords
                     if has_test and has_async:
                         results['files_with_test_and_async'] += 1
                         file_result['matches_criteria'] = True
                         results['files_with_keywords'].append(file_result)
-                        print(f"    ✓ Arquivo atende aos critérios!")
+                        outcome = "    ✓ Arquivo atende aos critérios!"
                     else:
                         file_result['matches_criteria'] = False
-                        print(f"    - Test keywords: {has_test}, Async keywords: {has_async}")
+                        outcome = f"    - Test keywords: {has_test}, Async keywords: {has_async}"
                 else:
-                    print(f"    ✗ Não foi possível obter o conteúdo do arquivo")
+                    outcome = "    ✗ Não foi possível obter o conteúdo do arquivo"
+                
+                # Uma linha por arquivo (antes eram duas prints), amostrada no console
+                log_event("analysis.file", f"  Analisando arquivo: {file_path}\n{outcome}",
+                          pr_url=pr_url, file=file_path, retrieved=file_result['content_retrieved'],
+                          matches=file_result.get('matches_criteria', False))
                 
                 results['files_analyzed'].append(file_result)
                 
                 # Pequena pausa entre requisições
-                time.sleep(0.1)
+                if prefetched is None and self.request_delay:
+                    time.sleep(self.request_delay)
                 
         except Exception as e:
             results['analysis_success'] = False
             results['error_message'] = str(e)
-            print(f"Erro durante análise do PR: {e}")
+            log_event("analysis.error", f"Erro durante análise do PR: {e}", WARNING, pr_url=pr_url)
         
         return results
     
-    def analyze_and_save_matching_projects(self, input_json_path: str, output_json_path: str) -> Dict:
+    def build_matching_project(self, pr_data: Dict, pr_result: Dict) -> Dict:
         """
-        Analisa todos os PRs e salva apenas os projetos que atendem aos critérios
+        Monta o registro de saída de um PR que atende aos critérios
         
         Args:
-            input_json_path: Caminho para o arquivo JSON de entrada
-            output_json_path: Caminho para o arquivo JSON de saída
+            pr_data: Dados do PR do JSON de entrada
+            pr_result: Resultado retornado por analyze_pr
             
         Returns:
-            Dicionário com estatísticas da análise
+            Dicionário no formato de 'matching_projects'
         """
-        try:
-            with open(input_json_path, 'r', encoding='utf-8') as file:
-                data = json.load(file)
-            
-            pull_requests = data.get('pull_requests', [])
-            print(f"Encontrados {len(pull_requests)} PRs para analisar")
-            
-            matching_projects = []
-            analysis_stats = {
-                'total_prs_analyzed': 0,
-                'successful_analyses': 0,
-                'prs_with_matching_files': 0,
-                'total_files_analyzed': 0,
-                'total_matching_files': 0,
-                'errors': []
+        return {
+            'repo_url': pr_data.get('repo_url'),
+            'repo_name': pr_data['repo_name'],
+            'pr_url': pr_data['pr_url'],
+            'author': pr_data.get('author'),
+            'title': pr_data.get('title'),
+            'body': pr_data.get('body'),
+            'created_at': pr_data.get('created_at'),
+            'merged_at': pr_data.get('merged_at'),
+            'matched_terms': pr_data.get('matched_terms', []),
+            'matching_js_test_files': [f['file_path'] for f in pr_result['files_with_keywords']],
+            'analysis_results': {
+                'total_test_files': pr_result['total_files'],
+                'files_with_test_and_async': pr_result['files_with_test_and_async'],
+                'matching_files_details': pr_result['files_with_keywords']
             }
+        }
+    
+    def record_analysis(self, entry: Dict, analysis_stats: Dict, matching_projects: List[Dict],
+                        aggregates: RunAggregates) -> None:
+        """
+        Aplica às estatísticas o resultado de um PR, recém-analisado ou lido do diário
+        
+        Args:
+            entry: Registro do diário (ver journal_entry)
+            analysis_stats: Estatísticas acumuladas
+            matching_projects: Projetos que atendem aos critérios até agora
+            aggregates: Agregados por repositório, termo, mês e keyword
+        """
+        analysis_stats['total_prs_analyzed'] += 1
+        aggregates.add_analysis(entry['analysis_success'], entry['matching_project'])
+        
+        if entry['analysis_success']:
+            analysis_stats['successful_analyses'] += 1
+            analysis_stats['total_files_analyzed'] += entry['total_files']
+            analysis_stats['total_matching_files'] += entry['files_with_test_and_async']
             
-            for i, pr_data in enumerate(pull_requests, 1):
-                print(f"\n{'='*60}")
-                print(f"Progresso: {i}/{len(pull_requests)}")
-                
-                analysis_stats['total_prs_analyzed'] += 1
-                
-                try:
-                    pr_result = self.analyze_pr(pr_data)
-                    
-                    if pr_result['analysis_success']:
-                        analysis_stats['successful_analyses'] += 1
-                        analysis_stats['total_files_analyzed'] += pr_result['total_files']
-                        analysis_stats['total_matching_files'] += pr_result['files_with_test_and_async']
-                        
-                        # Se o PR tem arquivos que atendem aos critérios, adiciona aos matching_projects
-                        if pr_result['files_with_test_and_async'] > 0:
-                            analysis_stats['prs_with_matching_files'] += 1
-                            
-                            # Criar estrutura do projeto que atende aos critérios
-                            matching_project = {
-                                'repo_url': pr_data.get('repo_url'),
-                                'repo_name': pr_data['repo_name'],
-                                'pr_url': pr_data['pr_url'],
-                                'author': pr_data.get('author'),
-                                'title': pr_data.get('title'),
-                                'body': pr_data.get('body'),
-                                'created_at': pr_data.get('created_at'),
-                                'merged_at': pr_data.get('merged_at'),
-                                'matched_terms': pr_data.get('matched_terms', []),
-                                'matching_js_test_files': [f['file_path'] for f in pr_result['files_with_keywords']],
-                                'analysis_results': {
-                                    'total_test_files': pr_result['total_files'],
-                                    'files_with_test_and_async': pr_result['files_with_test_and_async'],
-                                    'matching_files_details': pr_result['files_with_keywords']
-                                }
-                            }
-                            
-                            matching_projects.append(matching_project)
-                            print(f"✓ PR adicionado - {pr_result['files_with_test_and_async']} arquivo(s) correspondentes")
-                        else:
-                            print(f"- PR não tem arquivos que atendem aos critérios")
-                    else:
-                        analysis_stats['errors'].append({
-                            'pr_url': pr_data.get('pr_url', 'unknown'),
-                            'error': pr_result.get('error_message', 'Unknown error')
-                        })
-                        
-                except Exception as e:
-                    error_msg = f"Erro ao analisar PR {pr_data.get('pr_url', 'unknown')}: {e}"
-                    print(error_msg)
-                    analysis_stats['errors'].append({
-                        'pr_url': pr_data.get('pr_url', 'unknown'),
-                        'error': str(e)
-                    })
-                
-                # Pausa entre PRs para evitar rate limiting
-                if i % 10 == 0:
-                    print("Pausa de 2 segundos...")
-                    time.sleep(2)
-            
-            # Calcular estatísticas finais
-            analysis_stats['success_rate'] = (analysis_stats['successful_analyses'] / analysis_stats['total_prs_analyzed'] * 100) if analysis_stats['total_prs_analyzed'] > 0 else 0
-            analysis_stats['match_rate'] = (analysis_stats['prs_with_matching_files'] / analysis_stats['successful_analyses'] * 100) if analysis_stats['successful_analyses'] > 0 else 0
-            analysis_stats['unique_repositories'] = len(set(p['repo_name'] for p in matching_projects))
-            
-            # Preparar dados para salvar
-            output_data = {
-                'metadata': {
-                    'analysis_date': time.strftime('%Y-%m-%d %H:%M:%S'),
-                    'input_file': input_json_path,
-                    'search_criteria': {
-                        'test_keywords': self.test_keywords,
-                        'async_keywords': self.async_keywords,
-                        'requirement': 'Files must contain at least one test keyword AND one async keyword'
-                    },
-                    'statistics': analysis_stats
+            if entry['matching_project']:
+                analysis_stats['prs_with_matching_files'] += 1
+                # Registro compacto (keywords em bitmask, corpo longo em disco); o JSON de saída não muda
+                matching_projects.append(
+                    compact_matching_project(entry['matching_project'], self.test_keywords, self.async_keywords)
+                )
+        else:
+            analysis_stats['errors'].append({
+                'pr_url': entry['pr_url'],
+                'error': entry['error']
+            })
+    
+    def journal_entry(self, pr_data: Dict, pr_result: Optional[Dict] = None, error: Optional[str] = None) -> Dict:
+        """Monta a linha do diário de um PR a partir do resultado de analyze_pr ou de um erro"""
+        success = pr_result is not None and pr_result['analysis_success']
+        matching = success and pr_result['files_with_test_and_async'] > 0
+        return {
+            'pr_url': pr_data.get('pr_url', 'unknown'),
+            'analysis_success': success,
+            'total_files': pr_result['total_files'] if success else 0,
+            'files_with_test_and_async': pr_result['files_with_test_and_async'] if success else 0,
+            'matching_project': self.build_matching_project(pr_data, pr_result) if matching else None,
+            'error': None if success else (error or (pr_result or {}).get('error_message', 'Unknown error'))
+        }
+    
+    def write_output(self, output_json_path: str, input_json_path: str, analysis_stats: Dict,
+                     matching_projects: List[Dict], aggregates: RunAggregates, complete: bool) -> None:
+        """
+        Grava o arquivo de saída (de forma atômica, para nunca deixar um JSON pela metade)
+        
+        Args:
+            complete: False enquanto ainda há PRs a analisar
+        """
+        analysis_stats['success_rate'] = (analysis_stats['successful_analyses'] / analysis_stats['total_prs_analyzed'] * 100) if analysis_stats['total_prs_analyzed'] > 0 else 0
+        analysis_stats['match_rate'] = (analysis_stats['prs_with_matching_files'] / analysis_stats['successful_analyses'] * 100) if analysis_stats['successful_analyses'] > 0 else 0
+        analysis_stats['unique_repositories'] = len(aggregates.by_repo)
+        
+        output_data = {
+            'metadata': {
+                'analysis_date': time.strftime('%Y-%m-%d %H:%M:%S'),
+                'input_file': input_json_path,
+                'complete': complete,
+                'search_criteria': {
+                    'test_keywords': self.test_keywords,
+                    'async_keywords': self.async_keywords,
+                    'requirement': 'Files must contain at least one test keyword AND one async keyword'
                 },
-                'matching_projects': matching_projects
-            }
-            
-            # Salvar projetos correspondentes
-            with open(output_json_path, 'w', encoding='utf-8') as f:
-                json.dump(output_data, f, indent=2, ensure_ascii=False)
-            
-            print(f"\n{'='*80}")
-            print("ANÁLISE CONCLUÍDA")
-            print(f"{'='*80}")
-            print(f"Projetos que atendem aos critérios salvos em: {output_json_path}")
-            print(f"Total de projetos encontrados: {len(matching_projects)}")
-            
-            return analysis_stats
+                'statistics': analysis_stats,
+                'aggregates': aggregates.to_dict(),
+                'circuit_breakers': self.breakers.summary(),
+                'coalesced_requests': self.flights.stats()
+            },
+            'matching_projects': DictView(matching_projects)
+        }
+        
+        tmp_path = f"{output_json_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(output_data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, output_json_path)
+    
+    def analyze_and_save_matching_projects(self, input_json_path: str, output_json_path: str,
+                                           prioritize: bool = True, resume: bool = True,
+                                           journal_path: Optional[str] = None) -> Dict:
+        """
+        Analisa todos os PRs e salva apenas os projetos que atendem aos critérios
+        
+        Cada PR analisado é registrado em um diário NDJSON e a saída parcial é regravada
+        a cada 10 PRs. Uma nova execução retoma pelo diário e só analisa os PRs
+        (identificados por pr_url) que ainda não foram analisados com sucesso.
+        
+        Args:
+            input_json_path: Caminho para o arquivo de entrada (JSON do search_github_prs ou NDJSON)
+            output_json_path: Caminho para o arquivo JSON de saída
+            prioritize: Analisa primeiro os PRs com maior rendimento esperado (dentro de lotes de PRIORITY_BATCH)
+            resume: Reaproveita o diário de execuções anteriores (False recomeça do zero)
+            journal_path: Caminho do diário (padrão: saída + '.journal.ndjson')
             
-        except FileNotFoundError:
+        Returns:
+            Dicionário com estatísticas da análise
+        """
+        journal_path = journal_path or f"{output_json_path}{JOURNAL_SUFFIX}"
+        
+        matching_projects = []
+        aggregates = RunAggregates()
+        analysis_stats = {
+            'total_prs_analyzed': 0,
+            'successful_analyses': 0,
+            'prs_with_matching_files': 0,
+            'total_files_analyzed': 0,
+            'total_matching_files': 0,
+            'resumed_from_journal': 0,
+            'errors': []
+        }
+        
+        if not resume and os.path.exists(journal_path):
+            os.remove(journal_path)
+        
+        # PRs que falharam antes não contam como feitos e são analisados de novo
+        done = {entry['pr_url']: entry for entry in load_journal(journal_path) if entry['analysis_success']}
+        for entry in done.values():
+            self.record_analysis(entry, analysis_stats, matching_projects, aggregates)
+        analysis_stats['resumed_from_journal'] = len(done)
+        if done:
+            print(f"Retomando: {len(done)} PRs já analisados em {journal_path}")
+        
+        if not os.path.exists(input_json_path):
             print(f"Arquivo não encontrado: {input_json_path}")
             return {}
+        
+        # A entrada é lida sob demanda: o primeiro PR é decodificado aqui para que um
+        # arquivo malformado seja rejeitado antes de qualquer análise
+        records = iter_pull_requests(input_json_path)
+        try:
+            first = next(records, None)
         except json.JSONDecodeError as e:
             print(f"Erro ao decodificar JSON: {e}")
             return {}
-        except Exception as e:
-            print(f"Erro inesperado: {e}")
-            return {}
+        
+        records = chain([first], records) if first is not None else records
+        pending = (pr for pr in records if pr.get('pr_url') not in done)
+        
+        if prioritize:
+            # Com cota limitada, os PRs mais promissores são analisados antes; a ordenação
+            # é feita por lotes para não carregar a entrada inteira na memória
+            history = RepoHistory.load()
+            pending = prioritized(pending, lambda pr: score_candidate(pr, pr.get('repo_name'), history))
+        
+        if self.git_mirrors is not None:
+            # Os refs dos PRs de um repositório vêm num único fetch por lote de PRs lidos
+            pending = self.git_mirrors.plan_ahead(pending)
+        
+        complete = False
+        try:
+            with open_journal(journal_path) as journal:
+                for i, pr_data in enumerate(pending, 1):
+                    log_event("analysis.progress",
+                              f"\n{'='*60}\nProgresso: {i}", done=i)
+                    
+                    try:
+                        pr_result = self.analyze_pr(pr_data)
+                        entry = self.journal_entry(pr_data, pr_result)
+                    except Exception as e:
+                        log_event("analysis.error", f"Erro ao analisar PR {pr_data.get('pr_url', 'unknown')}: {e}",
+                                  WARNING, pr_url=pr_data.get('pr_url'))
+                        entry = self.journal_entry(pr_data, error=str(e))
+                    
+                    journal.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                    journal.flush()
+                    self.record_analysis(entry, analysis_stats, matching_projects, aggregates)
+                    
+                    if entry['matching_project']:
+                        log_event("analysis.match",
+                                  f"✓ PR adicionado - {entry['files_with_test_and_async']} arquivo(s) correspondentes",
+                                  pr_url=entry['pr_url'], files=entry['files_with_test_and_async'])
+                    elif entry['analysis_success']:
+                        log_event("analysis.no_match", "- PR não tem arquivos que atendem aos critérios",
+                                  pr_url=entry['pr_url'])
+                    
+                    # Pausa entre PRs para evitar rate limiting, com a saída parcial em dia
+                    if i % 10 == 0:
+                        self.write_output(output_json_path, input_json_path, analysis_stats, matching_projects, aggregates, False)
+                        log_event("analysis.pause", "Pausa de 2 segundos...")
+                        time.sleep(2)
+            
+            complete = True
+        except KeyboardInterrupt:
+            print(f"\nAnálise interrompida; execute novamente para retomar a partir de {journal_path}")
+        except json.JSONDecodeError as e:
+            print(f"Erro ao decodificar JSON: {e}")
+        finally:
+            # Mesmo em caso de erro, a saída reflete tudo o que já foi analisado
+            self.write_output(output_json_path, input_json_path, analysis_stats, matching_projects, aggregates, complete)
+            # As linhas ainda na fila saem antes do resumo
+            flush_event_log()
+        
+        print(f"\n{'='*80}")
+        print("ANÁLISE CONCLUÍDA" if complete else "ANÁLISE PARCIAL")
+        print(f"{'='*80}")
+        print(f"Projetos que atendem aos critérios salvos em: {output_json_path}")
+        print(f"Total de projetos encontrados: {len(matching_projects)}")
+        aggregates.print_summary()
+        
+        return analysis_stats
     
     def generate_summary_report(self, results: List[Dict]) -> Dict:
         """
@@ -399,21 +907,34 @@ class GitHubTestAnalyzer:
         return summary
 
 
-def analyze_projects_with_criteria(headers: Dict[str, str], input_json_path: str, output_json_path: str) -> Dict:
+def analyze_projects_with_criteria(headers: Dict[str, str], input_json_path: str, output_json_path: str,
+                                   resume: bool = True, io_workers: int = 1, cpu_workers: int = 0,
+                                   prefetch_cache: Optional[str] = None, git_mirror_dir: Optional[str] = None) -> Dict:
     """
     Função principal para analisar projetos e salvar apenas os que atendem aos critérios
     
     Args:
         headers: Headers para requisições GitHub (incluindo Authorization token)
-        input_json_path: Caminho para o arquivo JSON de entrada
+        input_json_path: Caminho para o arquivo JSON (ou NDJSON) de entrada
         output_json_path: Caminho para o arquivo JSON de saída
+        resume: Retoma a partir do diário de uma execução anterior
+        io_workers: Threads de download por PR
+        cpu_workers: Processos para decodificar e buscar keywords (0 = sem pool)
+        prefetch_cache: Diretório do cache preenchido pelo prefetch especulativo (ver prefetch.py)
+        git_mirror_dir: Diretório dos espelhos git locais (ver git_mirror.py); None usa só a API
         
     Returns:
         Dicionário com estatísticas da análise
     """
     
     # Criar analisador
-    analyzer = GitHubTestAnalyzer(headers=headers)
+    session = ArchivingSession(cache=RawArchive(prefetch_cache)) if prefetch_cache else None
+    git_mirrors = None
+    if git_mirror_dir:
+        token = headers.get('Authorization', '').split()[-1] if headers.get('Authorization') else None
+        git_mirrors = GitMirrorPool(git_mirror_dir, token=token)
+    analyzer = GitHubTestAnalyzer(headers=headers, io_workers=io_workers, cpu_workers=cpu_workers, session=session,
+                                  git_mirrors=git_mirrors)
     
     print("Iniciando análise dos arquivos de teste JavaScript...")
     print(f"Arquivo de entrada: {input_json_path}")
@@ -430,7 +951,10 @@ def analyze_projects_with_criteria(headers: Dict[str, str], input_json_path: str
         print(f"\n✓ Executando com token de autenticação do GitHub")
     
     # Executar análise e salvar resultados
-    stats = analyzer.analyze_and_save_matching_projects(input_json_path, output_json_path)
+    try:
+        stats = analyzer.analyze_and_save_matching_projects(input_json_path, output_json_path, resume=resume)
+    finally:
+        analyzer.close()
     
     if stats:
         print(f"\n{'='*80}")
@@ -453,9 +977,30 @@ def analyze_projects_with_criteria(headers: Dict[str, str], input_json_path: str
     return stats
 
 
-def main():
+def main(argv=None):
     """Função de exemplo para executar a análise"""
     
+    parser = argparse.ArgumentParser(description="Analisa os arquivos de teste dos PRs encontrados")
+    parser.add_argument("--profile", action="store_true",
+                        help="Gera perfil de CPU, tempos por etapa e alocações")
+    parser.add_argument("--profile-dir", default="profiles")
+    parser.add_argument("--fresh", action="store_true",
+                        help="Ignora o diário de execuções anteriores e analisa todos os PRs")
+    parser.add_argument("--io-workers", type=int, default=1, help="Threads de download por PR")
+    parser.add_argument("--cpu-workers", type=int, default=0,
+                        help="Processos para decodificar e buscar keywords (0 = na thread de download)")
+    parser.add_argument("--archive", help="Grava as respostas cruas da API neste diretório (ver refilter)")
+    parser.add_argument("--prefetch-cache", help="Usa o cache do prefetch especulativo deste diretório")
+    parser.add_argument("--git-mirrors", nargs="?", const=DEFAULT_MIRROR_DIR,
+                        help="Lê SHA e arquivos dos PRs de espelhos git locais (parciais) neste diretório")
+    parser.add_argument("--log-jsonl", help="Grava todos os eventos como JSON lines neste arquivo")
+    parser.add_argument("--console", choices=["lines", "progress", "off"], default="lines",
+                        help="lines: linhas amostradas; progress: uma linha de status; off: sem eventos no console")
+    args = parser.parse_args(argv)
+    configure_event_log(jsonl_path=args.log_jsonl, console=args.console)
+    if args.archive:
+        configure_archive(args.archive)
+    
     # Exemplo de configuração
     token = "YOUR_GITHUB_TOKEN_HERE"  # Substitua pelo seu token
     
@@ -468,7 +1013,10 @@ def main():
     output_file = "matching_projects.json"  # Arquivo JSON de saída
     
     # Executar análise
-    stats = analyze_projects_with_criteria(headers, input_file, output_file)
+    with profiled_run(enabled=args.profile, output_dir=args.profile_dir):
+        stats = analyze_projects_with_criteria(headers, input_file, output_file, resume=not args.fresh,
+                                               io_workers=args.io_workers, cpu_workers=args.cpu_workers,
+                                               prefetch_cache=args.prefetch_cache, git_mirror_dir=args.git_mirrors)
     
     return stats
 
@@ -0,0 +1,196 @@
+import argparse
+import glob
+import gzip
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from config.filters import LANGUAGES, SEARCH_START_DATE, SEARCH_END_DATE
+from src.auth.get_token import get_github_token
+from src.github_searches.pr_search import (
+    create_session_with_retries,
+    match_pr_terms,
+    fetch_pr_files,
+    save_final_results
+)
+from src.github_searches.metadata_filter import RepositoryMetadataPrefilter
+
+# Cheap byte check before json.loads; nearly all lines of an hourly file are other event types
+PR_EVENT_MARKER = b'"PullRequestEvent"'
+
+def candidate_from_event(event, languages, start_date, end_date):
+    """
+    Turn a GH Archive PullRequestEvent into the candidate record process_pr produces
+    (with js_test_files still empty), or None if it doesn't qualify
+    """
+    if event.get("type") != "PullRequestEvent":
+        return None
+
+    payload = event.get("payload") or {}
+    pr = payload.get("pull_request") or {}
+    if payload.get("action") != "closed" or not pr.get("merged"):
+        return None
+
+    base_repo = (pr.get("base") or {}).get("repo") or {}
+    if (base_repo.get("language") or "").lower() not in languages:
+        return None
+
+    created_at = pr.get("created_at") or ""
+    if not (start_date <= created_at[:10] < end_date):
+        return None
+
+    matching_terms = match_pr_terms(pr)
+    if not matching_terms:
+        return None
+
+    repo_name = base_repo.get("full_name") or event.get("repo", {}).get("name")
+    return {
+        "repo_url": f"https://api.github.com/repos/{repo_name}",
+        "repo_name": repo_name,
+        "pr_url": pr.get("html_url"),
+        "author": (pr.get("user") or {}).get("login"),
+        "js_test_files": [],
+        "matched_terms": matching_terms,
+        "title": pr.get("title"),
+        "body": pr.get("body", ''),
+        "created_at": created_at,
+        "merged_at": pr.get("merged_at")
+    }
+
+def scan_archive_file(path, languages=None, start_date=SEARCH_START_DATE, end_date=SEARCH_END_DATE):
+    """
+    Stream-decompress one hourly .json.gz file and return (candidates, counters).
+    Runs in a worker process, one file per task.
+    """
+    languages = {lang.lower() for lang in (languages or LANGUAGES)}
+    candidates = []
+    counters = {'lines': 0, 'pr_events': 0, 'candidates': 0, 'bad_lines': 0}
+
+    try:
+        with gzip.open(path, "rb") as f:
+            for line in f:
+                counters['lines'] += 1
+                if PR_EVENT_MARKER not in line:
+                    continue
+
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    counters['bad_lines'] += 1
+                    continue
+
+                counters['pr_events'] += 1
+                candidate = candidate_from_event(event, languages, start_date, end_date)
+                if candidate:
+                    candidates.append(candidate)
+    except (OSError, EOFError) as e:
+        # Truncated downloads are common; keep what was read
+        print(f"⚠️ Error reading {path}: {str(e)}")
+        counters['bad_lines'] += 1
+
+    counters['candidates'] = len(candidates)
+    return candidates, counters
+
+def ingest_gharchive(archive_dir, pattern="*.json.gz", max_workers=None, languages=None):
+    """
+    Scan every GH Archive file in archive_dir with a process pool (one file per task)
+
+    Returns:
+        (candidates deduplicated by pr_url, aggregated counters)
+    """
+    paths = sorted(glob.glob(os.path.join(archive_dir, pattern)))
+    print(f"🗄️ Scanning {len(paths)} GH Archive files in {archive_dir}")
+
+    candidates = {}
+    totals = {'files': len(paths), 'lines': 0, 'pr_events': 0, 'candidates': 0, 'bad_lines': 0}
+    started = time.time()
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = executor.map(scan_archive_file, paths, [languages] * len(paths), chunksize=1)
+        for i, (file_candidates, counters) in enumerate(futures, 1):
+            for name, value in counters.items():
+                totals[name] += value
+            for candidate in file_candidates:
+                # A PR merged once shows up once, but keep the first if it was re-closed
+                candidates.setdefault(candidate['pr_url'], candidate)
+
+            if i % 24 == 0 or i == len(paths):
+                print(f"⚡ {i}/{len(paths)} files, {len(candidates)} candidates ({time.time() - started:.0f}s)")
+
+    totals['unique_candidates'] = len(candidates)
+    return list(candidates.values()), totals
+
+def confirm_candidates(headers, candidates, metadata_prefilter=True):
+    """
+    The only online step: drop repositories failing METADATA_FILTERS, then fetch
+    each remaining PR's file list and keep the ones with JS test files
+    """
+    session = create_session_with_retries()
+    stats = {
+        'total_found': len(candidates),
+        'processed': len(candidates),
+        'term_matches': len(candidates),
+        'dropped_by_metadata': 0,
+        'with_terms': 0,
+        'with_js_test_files': 0,
+        'matching_all_criteria': 0,
+        'errors': 0
+    }
+
+    if metadata_prefilter:
+        prefilter = RepositoryMetadataPrefilter(headers)
+        kept, _ = prefilter.filter_repos(sorted({c['repo_name'] for c in candidates}))
+        stats['dropped_by_metadata'] = sum(1 for c in candidates if c['repo_name'] not in kept)
+        candidates = [c for c in candidates if c['repo_name'] in kept]
+
+    confirmed = []
+    for i, candidate in enumerate(candidates, 1):
+        pr_number = candidate['pr_url'].rstrip('/').split('/')[-1]
+        pr_api_url = f"{candidate['repo_url']}/pulls/{pr_number}"
+
+        js_test_files = fetch_pr_files(pr_api_url, session, headers)
+        stats['with_terms'] += 1
+
+        if js_test_files:
+            candidate['js_test_files'] = js_test_files
+            stats['with_js_test_files'] += 1
+            stats['matching_all_criteria'] += 1
+            confirmed.append(candidate)
+            print(f"✅ Match found: {candidate['pr_url']}")
+
+        if i % 50 == 0:
+            print(f"⚡ Confirmed {i}/{len(candidates)} candidates...")
+        time.sleep(0.2)
+
+    return confirmed, stats
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Find candidate PRs in local GH Archive files without the search API")
+    parser.add_argument("archive_dir", help="Directory with hourly GH Archive .json.gz files")
+    parser.add_argument("--pattern", default="*.json.gz")
+    parser.add_argument("--workers", type=int, default=None, help="Processes (default: CPU count)")
+    parser.add_argument("--candidates-output", default="data_repos/gharchive_candidates.json")
+    parser.add_argument("--confirm", action="store_true",
+                        help="Fetch file lists online and save the confirmed PRs like search_github_prs")
+    parser.add_argument("--output", default="data_repos/race_condition_prs.json")
+    args = parser.parse_args(argv)
+
+    candidates, totals = ingest_gharchive(args.archive_dir, args.pattern, args.workers)
+
+    with open(args.candidates_output, "w", encoding="utf-8") as f:
+        json.dump({"metadata": {"archive_dir": args.archive_dir, "statistics": totals},
+                   "pull_requests": candidates}, f, indent=2, ensure_ascii=False)
+    print(f"💾 {len(candidates)} candidates saved to {args.candidates_output}")
+
+    if args.confirm:
+        token = get_github_token()
+        headers = {
+            "Accept": "application/vnd.github.v3+json",
+            "Authorization": f"token {token}"
+        }
+        confirmed, stats = confirm_candidates(headers, candidates)
+        save_final_results(confirmed, stats, output_file=args.output)
+
+if __name__ == "__main__":
+    main()
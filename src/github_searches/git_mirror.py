@@ -0,0 +1,297 @@
+import argparse
+import base64
+import os
+import subprocess
+import threading
+from collections import defaultdict
+
+try:
+    import fcntl
+except ImportError:  # Windows: only the in-process lock is used
+    fcntl = None
+
+DEFAULT_MIRROR_DIR = "data_repos/mirrors"
+# Refspecs per git fetch call
+FETCH_BATCH = 100
+# PRs read ahead by GitMirrorPool.plan_ahead before their refs are fetched together
+PLAN_BATCH = 500
+
+class GitMirrorError(Exception):
+    """A git command failed"""
+
+class GitMirror:
+    """
+    Local git view of one repository, answering content, tree and diff queries
+    with git plumbing instead of one contents API call per file per ref.
+
+    - GitMirror.for_repo keeps a blobless (partial) bare clone per repository in a
+      shared cache directory; PR head refs are fetched in bulk and blobs are only
+      downloaded when a file is actually read
+    - GitMirror.from_path wraps an existing local repository (no network), which
+      is also how the backend is tested offline
+    """
+
+    def __init__(self, git_dir, remote_url=None, token=None):
+        self.git_dir = git_dir
+        self.remote_url = remote_url
+        self.token = token
+        self.lock = threading.Lock()
+        self.fetched_prs = set()
+
+    @classmethod
+    def from_path(cls, path):
+        git_dir = cls._run_git(["rev-parse", "--absolute-git-dir"], cwd=path).decode().strip()
+        return cls(git_dir)
+
+    @classmethod
+    def for_repo(cls, repo_name, cache_dir=DEFAULT_MIRROR_DIR, token=None):
+        git_dir = os.path.join(cache_dir, repo_name.replace("/", "__") + ".git")
+        mirror = cls(git_dir, f"https://github.com/{repo_name}.git", token)
+        if not os.path.exists(os.path.join(git_dir, "HEAD")):
+            os.makedirs(cache_dir, exist_ok=True)
+            with mirror._file_lock():
+                if not os.path.exists(os.path.join(git_dir, "HEAD")):
+                    mirror._git(["clone", "--bare", "--filter=blob:none", "--quiet", mirror.remote_url, git_dir],
+                                in_repo=False)
+        return mirror
+
+    @staticmethod
+    def _run_git(args, cwd=None, config=()):
+        # Config goes through GIT_CONFIG_* variables, not -c: the argv of the process
+        # is readable by every local user, its environment is not
+        env = dict(os.environ)
+        count = int(env.get("GIT_CONFIG_COUNT", 0) or 0)
+        for index, (key, value) in enumerate(config, count):
+            env[f"GIT_CONFIG_KEY_{index}"] = key
+            env[f"GIT_CONFIG_VALUE_{index}"] = value
+        env["GIT_CONFIG_COUNT"] = str(count + len(config))
+        result = subprocess.run(["git"] + args, cwd=cwd, env=env, capture_output=True)
+        if result.returncode != 0:
+            raise GitMirrorError(f"git {' '.join(args[:2])} failed: {result.stderr.decode(errors='replace').strip()}")
+        return result.stdout
+
+    def _git(self, args, in_repo=True):
+        config = [("core.askPass", "true")]
+        if self.token:
+            # Sent only to github.com remotes, never stored in the mirror's config
+            credentials = base64.b64encode(f"x-access-token:{self.token}".encode()).decode()
+            config.append(("http.https://github.com/.extraHeader", f"Authorization: Basic {credentials}"))
+        prefix = ["--git-dir", self.git_dir] if in_repo else []
+        return self._run_git(prefix + args, config=config)
+
+    def _file_lock(self):
+        return _FileLock(self.git_dir + ".lock")
+
+    def fetch_prs(self, pr_numbers):
+        """Fetch the head refs of these PRs (commits and trees only) in as few calls as possible"""
+        with self.lock:
+            missing = sorted(set(pr_numbers) - self.fetched_prs)
+            if not missing or self.remote_url is None:
+                self.fetched_prs.update(missing)
+                return
+            with self._file_lock():
+                for i in range(0, len(missing), FETCH_BATCH):
+                    refspecs = [f"+refs/pull/{n}/head:refs/pull/{n}/head" for n in missing[i:i + FETCH_BATCH]]
+                    try:
+                        self._git(["fetch", "--quiet", "--no-tags", "--filter=blob:none", self.remote_url] + refspecs)
+                    except GitMirrorError:
+                        # One missing ref fails the whole batch: fall back to one fetch per PR
+                        for refspec in refspecs:
+                            try:
+                                self._git(["fetch", "--quiet", "--no-tags", "--filter=blob:none",
+                                           self.remote_url, refspec])
+                            except GitMirrorError:
+                                pass
+            self.fetched_prs.update(missing)
+
+    def resolve(self, ref):
+        """Commit SHA of a ref, or None if the mirror doesn't have it"""
+        try:
+            return self._git(["rev-parse", "--verify", "--quiet", f"{ref}^{{commit}}"]).decode().strip()
+        except GitMirrorError:
+            return None
+
+    def head_sha(self, pr_number):
+        self.fetch_prs([pr_number])
+        return self.resolve(f"refs/pull/{pr_number}/head")
+
+    def ensure_commit(self, sha):
+        """Fetch a commit (without blobs) the mirror doesn't have yet; False if it can't be had"""
+        if self.resolve(sha) is not None:
+            return True
+        if self.remote_url is None:
+            return False
+        with self.lock, self._file_lock():
+            try:
+                self._git(["fetch", "--quiet", "--no-tags", "--filter=blob:none", self.remote_url, sha])
+            except GitMirrorError:
+                return False
+        return self.resolve(sha) is not None
+
+    def merged_into(self, head, branch="HEAD"):
+        """
+        First-parent commit of branch that brought head in (the merge commit of a PR
+        merged without squash/rebase), or None if head is not in branch
+        """
+        output = self._git(["rev-list", "--first-parent", "--ancestry-path", "--merges",
+                            f"{head}..{branch}"]).decode().split()
+        # Newest first: the last one is where head entered the branch
+        return output[-1] if output else None
+
+    def base_sha(self, head, base=None):
+        """
+        Commit the PR's diff starts from: merge-base of its head and base (the
+        API's base.sha when known, otherwise the default branch). A head merged
+        with a merge commit is already part of the default branch, so the first
+        parent of that merge is used instead.
+        """
+        try:
+            if base is not None:
+                if not self.ensure_commit(base):
+                    return None
+            else:
+                merge = self.merged_into(head)
+                base = f"{merge}^1" if merge else "HEAD"
+            return self._git(["merge-base", base, head]).decode().strip()
+        except GitMirrorError:
+            return None
+
+    def file_content(self, ref, path):
+        """Bytes of path at ref (a partial clone downloads just this blob), or None if absent"""
+        try:
+            return self._git(["cat-file", "blob", f"{ref}:{path}"])
+        except GitMirrorError:
+            return None
+
+    def tree(self, ref, path=""):
+        """[{'path', 'type', 'sha'}] of every entry under path at ref"""
+        output = self._git(["ls-tree", "-r", "-z", ref, "--", path] if path else ["ls-tree", "-r", "-z", ref])
+        entries = []
+        for line in output.decode(errors="replace").split("\0"):
+            if not line:
+                continue
+            info, entry_path = line.split("\t", 1)
+            _, entry_type, sha = info.split()
+            entries.append({"path": entry_path, "type": entry_type, "sha": sha})
+        return entries
+
+    def changed_files(self, base, head):
+        """[(status, path)] between two refs, like the PR files listing (renames as the new path)"""
+        output = self._git(["diff", "--name-status", "-z", "--no-renames", base, head])
+        fields = output.decode(errors="replace").split("\0")
+        return [(fields[i], fields[i + 1]) for i in range(0, len(fields) - 1, 2)]
+
+    def diff(self, base, head, paths=None):
+        """Unified diff text between two refs, optionally limited to some paths"""
+        return self._git(["diff", base, head, "--"] + list(paths or [])).decode(errors="replace")
+
+    def before_after(self, pr_number, path, base=None):
+        """
+        (content before the PR, content at its head) of one file; None where the file
+        doesn't exist. base is the PR's base.sha when the caller has it (see base_sha).
+        """
+        head = self.head_sha(pr_number)
+        if head is None:
+            return None, None
+        base = self.base_sha(head, base)
+        return (self.file_content(base, path) if base else None), self.file_content(head, path)
+
+class _FileLock:
+    """Cross-process lock on the shared cache directory (fcntl where available)"""
+
+    def __init__(self, path):
+        self.path = path
+        self.handle = None
+
+    def __enter__(self):
+        if fcntl is not None:
+            self.handle = open(self.path, "w")
+            fcntl.flock(self.handle, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if self.handle is not None:
+            fcntl.flock(self.handle, fcntl.LOCK_UN)
+            self.handle.close()
+            self.handle = None
+
+class GitMirrorPool:
+    """
+    One GitMirror per repository, created on first use. plan() lets a caller
+    that knows its PRs up front fetch each repository's refs in one go.
+
+    local_paths maps repository names to existing checkouts used instead of a mirror.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_MIRROR_DIR, token=None, local_paths=None):
+        self.cache_dir = cache_dir
+        self.token = token
+        self.local_paths = {name.lower(): path for name, path in (local_paths or {}).items()}
+        self.mirrors = {}
+        self.planned = defaultdict(set)
+        self.lock = threading.Lock()
+
+    def mirror(self, repo_name):
+        key = repo_name.lower()
+        with self.lock:
+            if key not in self.mirrors:
+                if key in self.local_paths:
+                    self.mirrors[key] = GitMirror.from_path(self.local_paths[key])
+                else:
+                    self.mirrors[key] = GitMirror.for_repo(repo_name, self.cache_dir, self.token)
+            mirror = self.mirrors[key]
+            planned = self.planned.pop(key, None)
+        if planned:
+            mirror.fetch_prs(planned)
+        return mirror
+
+    def plan(self, prs):
+        """Remember the PR numbers per repository (records with repo_name and pr_url)"""
+        with self.lock:
+            for pr in prs:
+                self.planned[pr['repo_name'].lower()].add(int(pr['pr_url'].rstrip('/').split('/')[-1]))
+
+    def plan_ahead(self, prs, batch=PLAN_BATCH):
+        """Pass the PRs of an iterable through, planning each batch of them before it is handed out"""
+        chunk = []
+        for pr in prs:
+            chunk.append(pr)
+            if len(chunk) >= batch:
+                self.plan(chunk)
+                yield from chunk
+                chunk = []
+        self.plan(chunk)
+        yield from chunk
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect a PR through a local git mirror")
+    parser.add_argument("repo", help="owner/repo, or a local repository path with --local")
+    parser.add_argument("pr", type=int)
+    parser.add_argument("--local", action="store_true", help="repo is an existing local repository")
+    parser.add_argument("--cache-dir", default=DEFAULT_MIRROR_DIR)
+    parser.add_argument("--path", action="append", help="Show the diff of this file only (repeatable)")
+    parser.add_argument("--base", help="The PR's base.sha (default: found from the default branch)")
+    args = parser.parse_args(argv)
+
+    if args.local:
+        mirror = GitMirror.from_path(args.repo)
+    else:
+        from src.auth.get_token import get_github_token
+        mirror = GitMirror.for_repo(args.repo, args.cache_dir, get_github_token())
+
+    head = mirror.head_sha(args.pr)
+    if head is None:
+        print(f"❌ PR #{args.pr} not found in the mirror")
+        return
+    base = mirror.base_sha(head, args.base)
+    if base is None:
+        print(f"❌ Base of PR #{args.pr} not found in the mirror")
+        return
+    print(f"🔀 PR #{args.pr}: {base} -> {head}")
+    for status, path in mirror.changed_files(base, head):
+        print(f"   {status} {path}")
+    if args.path:
+        print(mirror.diff(base, head, args.path))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+import json
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from config.filters import KEYWORDS, EXTENSIONS, MAX_FILES, MAX_BLOB_BYTES, MIN_ASYNC_DENSITY
+from src.auth.get_token import get_github_token
+from src.github_searches.pr_search import create_session_with_retries, safe_api_request, is_test_file
+
+DEFAULT_BLOB_CACHE_DIR = "data_repos/cache/blobs"
+
+# Paths that hold generated or third-party code, never the project's own async usage
+EXCLUDED_PATH_PARTS = ("node_modules/", "dist/", "build/", "vendor/", "coverage/", ".min.", "bundle.")
+
+RAW_MEDIA_TYPE = "application/vnd.github.raw"
+
+# Tree answers that settle the question (missing, empty, removed or blocked repository);
+# any other failure (quota, 5xx, network) leaves the repo unscanned and kept
+DEFINITIVE_TREE_STATUSES = (404, 409, 410, 451)
+# Blob answers after which the file is just left out of the sample
+DEFINITIVE_BLOB_STATUSES = (404, 410, 451)
+
+class BlobCache:
+    """On-disk cache of git blobs keyed by SHA (blobs are immutable, so entries never expire)"""
+
+    def __init__(self, cache_dir=DEFAULT_BLOB_CACHE_DIR):
+        self.cache_dir = cache_dir
+
+    def _path(self, sha):
+        return os.path.join(self.cache_dir, sha[:2], sha[2:])
+
+    def get(self, sha):
+        try:
+            with open(self._path(sha), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, sha, content):
+        path = self._path(sha)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp{os.getpid()}-{threading.get_ident()}"
+        with open(tmp_path, "wb") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+def select_candidate_files(tree_entries, max_files=MAX_FILES, extensions=EXTENSIONS, max_bytes=MAX_BLOB_BYTES):
+    """
+    Pick up to max_files blobs worth scanning from a recursive tree listing:
+    files with one of EXTENSIONS and at most max_bytes, test files first, then the shallowest paths
+    """
+    candidates = [
+        entry for entry in tree_entries
+        if entry.get("type") == "blob"
+        and entry.get("size", 0) <= max_bytes
+        and entry["path"].lower().endswith(tuple(extensions))
+        and not any(part in entry["path"].lower() for part in EXCLUDED_PATH_PARTS)
+    ]
+    candidates.sort(key=lambda entry: (not is_test_file(entry["path"]), entry["path"].count("/"), entry["path"]))
+    return candidates[:max_files]
+
+def count_keywords(content, keywords=KEYWORDS):
+    """Occurrences of each keyword as a whole word (so 'async' doesn't count 'asyncio')"""
+    return {
+        keyword: len(re.findall(rf"\b{re.escape(keyword)}\b", content))
+        for keyword in keywords
+    }
+
+class RepositoryKeywordScanner:
+    """
+    Cheap async-usage scan of a repository before any PR crawling:
+    - one recursive git/trees call lists every file
+    - up to MAX_FILES candidates are chosen by EXTENSIONS and test-path heuristics
+    - their blobs are fetched concurrently through the BlobCache
+    - the repo is scored by KEYWORDS hits per KB of scanned code
+    """
+
+    def __init__(self, headers, max_files=MAX_FILES, min_density=MIN_ASYNC_DENSITY,
+                 blob_cache=None, max_workers=8, session=None):
+        self.headers = headers
+        self.max_files = max_files
+        self.min_density = min_density
+        self.blob_cache = blob_cache or BlobCache()
+        self.max_workers = max_workers
+        self.session = session or create_session_with_retries()
+        self.stats = {'tree_requests': 0, 'blob_requests': 0, 'blob_cache_hits': 0}
+        self.lock = threading.Lock()
+
+    def list_tree(self, repo_name, ref="HEAD"):
+        """
+        Returns:
+            (tree entries, None), or (None, HTTP status or None without a response) on failure
+        """
+        url = f"https://api.github.com/repos/{repo_name}/git/trees/{ref}?recursive=1"
+        self.stats['tree_requests'] += 1
+        try:
+            response = safe_api_request(self.session, url, self.headers)
+        except Exception as e:
+            print(f"⚠️ Could not list tree of {repo_name}: {e}")
+            return None, None
+
+        if response is None or response.status_code != 200:
+            status = response.status_code if response is not None else None
+            print(f"⚠️ Could not list tree of {repo_name}: {status or 'no response'}")
+            return None, status
+
+        data = response.json()
+        if data.get("truncated"):
+            # Very large repos: the listing is partial but still a fair sample
+            print(f"ℹ️ Tree of {repo_name} is truncated, scanning the listed part")
+        return data.get("tree", []), None
+
+    def fetch_blob(self, repo_name, sha):
+        """
+        Returns:
+            (blob bytes, None), or (None, HTTP status or None without a response) on failure
+        """
+        content = self.blob_cache.get(sha)
+        if content is not None:
+            with self.lock:
+                self.stats['blob_cache_hits'] += 1
+            return content, None
+
+        url = f"https://api.github.com/repos/{repo_name}/git/blobs/{sha}"
+        with self.lock:
+            self.stats['blob_requests'] += 1
+        try:
+            response = safe_api_request(self.session, url, {**self.headers, "Accept": RAW_MEDIA_TYPE})
+        except Exception as e:
+            print(f"⚠️ Could not fetch blob {sha} of {repo_name}: {e}")
+            return None, None
+
+        if response is None or response.status_code != 200:
+            return None, (response.status_code if response is not None else None)
+
+        self.blob_cache.put(sha, response.content)
+        return response.content, None
+
+    def scan(self, repo_name):
+        """
+        Returns:
+            Scan report for the repository, with 'passes' telling whether it is worth crawling.
+            A repo whose tree or one of whose blobs could not be fetched for a transient
+            reason is kept, with 'unscanned' set, like the metadata prefilter keeps repos
+            whose lookup failed.
+        """
+        report = {
+            'repo_name': repo_name,
+            'files_scanned': 0,
+            'bytes_scanned': 0,
+            'files_with_keywords': 0,
+            'keyword_hits': {keyword: 0 for keyword in KEYWORDS},
+            'density_per_kb': 0.0,
+            'passes': False,
+            'unscanned': False,
+            'error': None
+        }
+
+        tree, status = self.list_tree(repo_name)
+        if tree is None:
+            if status in DEFINITIVE_TREE_STATUSES:
+                report['error'] = f'tree not available ({status})'
+            else:
+                report['error'] = f'tree fetch failed ({status or "no response"})'
+                report['unscanned'] = True
+                report['passes'] = True
+            return report
+
+        candidates = select_candidate_files(tree, self.max_files)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            blobs = list(executor.map(lambda entry: self.fetch_blob(repo_name, entry["sha"]), candidates))
+
+        failed = [status for content, status in blobs
+                  if content is None and status not in DEFINITIVE_BLOB_STATUSES]
+        if failed:
+            # A partial sample could drop a repo that does use async code
+            report['error'] = f'blob fetch failed ({failed[0] or "no response"})'
+            report['unscanned'] = True
+            report['passes'] = True
+            return report
+
+        for content, _ in blobs:
+            if content is None:
+                continue
+            text = content.decode("utf-8", errors="replace")
+            hits = count_keywords(text)
+
+            report['files_scanned'] += 1
+            report['bytes_scanned'] += len(content)
+            if any(hits.values()):
+                report['files_with_keywords'] += 1
+            for keyword, count in hits.items():
+                report['keyword_hits'][keyword] += count
+
+        if report['bytes_scanned']:
+            total_hits = sum(report['keyword_hits'].values())
+            report['density_per_kb'] = round(total_hits / (report['bytes_scanned'] / 1024), 3)
+        report['passes'] = report['density_per_kb'] >= self.min_density
+        return report
+
+    def filter_repos(self, repo_names):
+        """
+        Returns:
+            (list of repo names that pass, {repo name: report})
+        """
+        reports = {}
+        for repo_name in repo_names:
+            report = self.scan(repo_name)
+            reports[repo_name] = report
+            if report['unscanned']:
+                print(f"❔ {repo_name}: not scanned ({report['error']}), kept")
+                continue
+            status = "✅" if report['passes'] else "➖"
+            print(f"{status} {repo_name}: {report['density_per_kb']} async hits/KB "
+                  f"in {report['files_scanned']} files")
+        return [name for name in repo_names if reports[name]['passes']], reports
+
+def filter_by_keywords(headers=None, input_json_path="awesomeLists/linksGithub.json",
+                       output_json_path="data_repos/keyword_filtered_repos.json"):
+    """
+    Scan every repository of a repo list (plain list of URLs or an ingestao.py version)
+    and save the ones that use async code heavily, with the per-repo reports
+    """
+    if headers is None:
+        headers = {
+            "Accept": "application/vnd.github.v3+json",
+            "Authorization": f"token {get_github_token()}"
+        }
+
+    with open(input_json_path, "r", encoding="utf-8") as f:
+        repos = json.load(f)
+    if isinstance(repos, dict):
+        repos = repos.get("repositorios") or repos.get("repositories", [])
+
+    repo_names = ["/".join(url.rstrip("/").split("/")[-2:]) for url in repos]
+    scanner = RepositoryKeywordScanner(headers)
+    passing, reports = scanner.filter_repos(repo_names)
+
+    with open(output_json_path, "w", encoding="utf-8") as f:
+        json.dump({
+            "metadata": {
+                "input_file": input_json_path,
+                "keywords": KEYWORDS,
+                "extensions": EXTENSIONS,
+                "max_files": MAX_FILES,
+                "max_blob_bytes": MAX_BLOB_BYTES,
+                "min_density_per_kb": MIN_ASYNC_DENSITY,
+                "statistics": scanner.stats
+            },
+            "repositories": [f"https://github.com/{name}" for name in passing],
+            "reports": reports
+        }, f, indent=2, ensure_ascii=False)
+
+    print(f"💾 {len(passing)} of {len(repo_names)} repositories pass the keyword scan, saved to {output_json_path}")
+    return passing
@@ -0,0 +1,194 @@
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from requests.exceptions import RequestException, Timeout
+
+from src.github_searches.single_flight import DEFAULT_FLIGHTS, request_flight_key
+
+# Flat timeout used until an endpoint class has enough samples, and the ceiling afterwards
+DEFAULT_TIMEOUT = 30
+MIN_TIMEOUT = 5
+CONNECT_TIMEOUT = 10
+# Read timeout once warmed up: this many times the endpoint's p99
+TIMEOUT_P99_FACTOR = 4
+
+MIN_SAMPLES = 20
+SAMPLE_WINDOW = 256
+
+# A hedge is sent when a request outlives the endpoint's p95; each request earns
+# HEDGE_RATIO of a hedge, so at most ~5% extra calls are spent on duplicates
+HEDGE_PERCENTILE = 95
+HEDGE_RATIO = 0.05
+HEDGE_BURST = 10
+
+ENDPOINT_PATTERNS = [
+    ("search", re.compile(r"/search/")),
+    ("pull_files", re.compile(r"/pulls/\d+/files")),
+    ("pulls", re.compile(r"/pulls/\d+")),
+    ("contents", re.compile(r"/contents/")),
+    ("trees", re.compile(r"/git/trees/")),
+    ("blobs", re.compile(r"/git/blobs/")),
+    ("graphql", re.compile(r"/graphql")),
+]
+
+def endpoint_class(url):
+    """Group URLs whose latency behaves alike ('search', 'pulls', 'contents', ...)"""
+    for name, pattern in ENDPOINT_PATTERNS:
+        if pattern.search(url):
+            return name
+    return "other"
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+class HedgeBudget:
+    """Token bucket: every request adds `ratio` of a token, every hedge spends one"""
+
+    def __init__(self, ratio=HEDGE_RATIO, burst=HEDGE_BURST):
+        self.ratio = ratio
+        self.burst = burst
+        self.tokens = 0.0
+        self.lock = threading.Lock()
+
+    def earn(self):
+        with self.lock:
+            self.tokens = min(self.burst, self.tokens + self.ratio)
+
+    def try_spend(self):
+        with self.lock:
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+class LatencyTracker:
+    """
+    Recent latencies per endpoint class, used to size timeouts and decide when to hedge.
+    Timed-out requests are recorded at their timeout so slow endpoints keep long timeouts.
+    """
+
+    def __init__(self, window=SAMPLE_WINDOW, budget=None):
+        self.window = window
+        self.budget = budget or HedgeBudget()
+        self.samples = {}
+        self.counts = {}
+        self.lock = threading.Lock()
+
+    def record(self, endpoint, seconds, outcome='ok'):
+        with self.lock:
+            self.samples.setdefault(endpoint, deque(maxlen=self.window)).append(seconds)
+            counts = self.counts.setdefault(endpoint, {'requests': 0, 'timeouts': 0, 'hedged': 0, 'hedge_wins': 0})
+            counts['requests'] += 1
+            if outcome == 'timeout':
+                counts['timeouts'] += 1
+        self.budget.earn()
+
+    def count(self, endpoint, name):
+        with self.lock:
+            self.counts.setdefault(endpoint, {'requests': 0, 'timeouts': 0, 'hedged': 0, 'hedge_wins': 0})[name] += 1
+
+    def percentile(self, endpoint, q):
+        with self.lock:
+            samples = list(self.samples.get(endpoint, ()))
+        if len(samples) < MIN_SAMPLES:
+            return None
+        return percentile(samples, q)
+
+    def timeout_for(self, endpoint):
+        """(connect, read) timeout for the next request to this endpoint class"""
+        p99 = self.percentile(endpoint, 99)
+        if p99 is None:
+            return (CONNECT_TIMEOUT, DEFAULT_TIMEOUT)
+        return (CONNECT_TIMEOUT, max(MIN_TIMEOUT, min(DEFAULT_TIMEOUT, p99 * TIMEOUT_P99_FACTOR)))
+
+    def hedge_delay(self, endpoint):
+        """Seconds after which a duplicate request is worth sending, or None while warming up"""
+        return self.percentile(endpoint, HEDGE_PERCENTILE)
+
+    def timed_get(self, endpoint, session, url, **kwargs):
+        started = time.monotonic()
+        try:
+            response = session.get(url, **kwargs)
+        except Timeout:
+            timeout = kwargs.get('timeout', DEFAULT_TIMEOUT)
+            self.record(endpoint, timeout[1] if isinstance(timeout, tuple) else timeout, 'timeout')
+            raise
+        self.record(endpoint, time.monotonic() - started)
+        return response
+
+    def summary(self):
+        """{endpoint class: counts plus p50/p95/p99 in seconds}"""
+        with self.lock:
+            endpoints = {name: (list(self.samples.get(name, ())), dict(counts)) for name, counts in self.counts.items()}
+        report = {}
+        for name, (samples, counts) in sorted(endpoints.items()):
+            for q in (50, 95, 99):
+                counts[f'p{q}'] = round(percentile(samples, q), 3) if samples else None
+            report[name] = counts
+        return report
+
+# Shared by every caller in the process so all requests feed the same percentiles
+DEFAULT_TRACKER = LatencyTracker()
+
+_hedge_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="hedge")
+
+def _discard(future):
+    """Close the losing response so its connection goes back to the pool"""
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
+
+def hedged_get(session, url, tracker=None, flights=None, **kwargs):
+    """
+    session.get with an adaptive timeout per endpoint class. When the request outlives
+    the endpoint's p95 and the hedge budget allows, a duplicate is sent and whichever
+    answers first is returned; the slower reply is discarded.
+
+    Identical non-streamed GETs already in flight in another thread are not sent
+    again: the caller waits for that request and shares its response (see single_flight.py).
+    """
+    if kwargs.get('stream'):
+        return _hedged_get(session, url, tracker, **kwargs)
+    key = request_flight_key(url, kwargs.get('headers'), kwargs.get('params'))
+    return (flights or DEFAULT_FLIGHTS).do(key, lambda: _hedged_get(session, url, tracker, **kwargs))
+
+def _hedged_get(session, url, tracker=None, **kwargs):
+    tracker = tracker or DEFAULT_TRACKER
+    endpoint = endpoint_class(url)
+    kwargs.setdefault('timeout', tracker.timeout_for(endpoint))
+
+    delay = tracker.hedge_delay(endpoint)
+    if delay is None:
+        return tracker.timed_get(endpoint, session, url, **kwargs)
+
+    primary = _hedge_executor.submit(tracker.timed_get, endpoint, session, url, **kwargs)
+    done, _ = wait([primary], timeout=delay)
+    if done or not tracker.budget.try_spend():
+        return primary.result()
+
+    tracker.count(endpoint, 'hedged')
+    hedge = _hedge_executor.submit(tracker.timed_get, endpoint, session, url, **kwargs)
+    pending = {primary, hedge}
+    error = None
+
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            try:
+                response = future.result()
+            except RequestException as e:
+                error = error or e
+                continue
+            for other in pending:
+                other.add_done_callback(_discard)
+            for other in done - {future}:
+                _discard(other)
+            if future is hedge:
+                tracker.count(endpoint, 'hedge_wins')
+            return response
+
+    raise error
@@ -0,0 +1,232 @@
+import json
+import os
+import threading
+import time
+
+import requests
+
+from config.filters import METADATA_FILTERS, METADATA_CACHE_TTL_HOURS
+
+GRAPHQL_URL = "https://api.github.com/graphql"
+GRAPHQL_BATCH_SIZE = 100
+DEFAULT_CACHE_PATH = "data_repos/cache/repo_metadata.json"
+
+REPOSITORY_FIELDS = """
+    nameWithOwner
+    stargazerCount
+    forkCount
+    pushedAt
+    isArchived
+    isFork
+    primaryLanguage { name }
+"""
+
+def build_metadata_query(repo_names):
+    """One GraphQL query with an aliased repository() lookup per 'owner/repo'"""
+    lookups = []
+    for i, repo_name in enumerate(repo_names):
+        owner, name = repo_name.split("/", 1)
+        lookups.append(
+            f"r{i}: repository(owner: {json.dumps(owner)}, name: {json.dumps(name)}) {{{REPOSITORY_FIELDS}}}"
+        )
+    return "query {\n" + "\n".join(lookups) + "\nrateLimit { cost remaining resetAt }\n}"
+
+def parse_repository(node):
+    if node is None:
+        return None
+    return {
+        "name_with_owner": node["nameWithOwner"],
+        "stars": node["stargazerCount"],
+        "forks": node["forkCount"],
+        "pushed_at": node["pushedAt"],
+        "is_archived": node["isArchived"],
+        "is_fork": node["isFork"],
+        "primary_language": (node.get("primaryLanguage") or {}).get("name"),
+    }
+
+def check_metadata_filters(metadata, filters=METADATA_FILTERS):
+    """
+    Apply METADATA_FILTERS to one repository's metadata
+
+    Returns:
+        None if the repository passes, otherwise the reason it was dropped
+    """
+    if metadata is None:
+        return "not found"
+    if filters.get("exclude_archived") and metadata["is_archived"]:
+        return "archived"
+    if filters.get("exclude_forks") and metadata["is_fork"]:
+        return "fork"
+    if metadata["stars"] < filters.get("min_stars", 0):
+        return f"stars {metadata['stars']} < {filters['min_stars']}"
+    if metadata["forks"] < filters.get("min_forks", 0):
+        return f"forks {metadata['forks']} < {filters['min_forks']}"
+    if filters.get("updated_since") and (metadata["pushed_at"] or "") < filters["updated_since"]:
+        return f"last push {metadata['pushed_at']}"
+    languages = [lang.lower() for lang in filters.get("primary_languages") or []]
+    if languages and (metadata["primary_language"] or "").lower() not in languages:
+        return f"language {metadata['primary_language']}"
+    return None
+
+class RepositoryMetadataPrefilter:
+    """
+    Drops repositories that fail METADATA_FILTERS before any per-PR call.
+
+    - Metadata is looked up for up to 100 repositories per GraphQL query
+    - Lookups are cached on disk for METADATA_CACHE_TTL_HOURS, including
+      repositories that no longer exist
+    - Repositories whose lookup failed (network/quota) are kept, never dropped
+    """
+
+    def __init__(self, headers, cache_path=DEFAULT_CACHE_PATH, ttl_hours=METADATA_CACHE_TTL_HOURS,
+                 filters=METADATA_FILTERS, session=None):
+        self.headers = {"Authorization": headers.get("Authorization", "")} if headers else {}
+        self.cache_path = cache_path
+        self.ttl_seconds = ttl_hours * 3600
+        self.filters = filters
+        self.session = session or requests.Session()
+        self.lock = threading.Lock()
+        self.stats = {'graphql_requests': 0, 'cache_hits': 0, 'looked_up': 0, 'dropped': 0}
+        self.cache = self.load_cache()
+
+    def load_cache(self):
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def save_cache(self):
+        os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+        with self.lock:
+            snapshot = dict(self.cache)
+        tmp_path = f"{self.cache_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f, ensure_ascii=False)
+        os.replace(tmp_path, self.cache_path)
+
+    def _fresh(self, key):
+        entry = self.cache.get(key)
+        return entry is not None and time.time() - entry["fetched_at"] < self.ttl_seconds
+
+    def _query_batch(self, repo_names):
+        try:
+            response = self.session.post(
+                GRAPHQL_URL,
+                headers=self.headers,
+                json={"query": build_metadata_query(repo_names)},
+                timeout=30
+            )
+        except requests.RequestException as e:
+            print(f"⚠️ GraphQL metadata lookup failed: {str(e)}")
+            return {}
+
+        self.stats['graphql_requests'] += 1
+        if response.status_code != 200:
+            print(f"⚠️ GraphQL metadata lookup failed: {response.status_code} - {response.text[:200]}")
+            return {}
+
+        payload = response.json()
+        data = payload.get("data") or {}
+        # Missing repositories come back as null together with a NOT_FOUND error;
+        # any other error leaves the alias out so the repository isn't judged
+        failed_aliases = {
+            error["path"][0] for error in payload.get("errors", [])
+            if error.get("path") and error.get("type") != "NOT_FOUND"
+        }
+
+        results = {}
+        for i, repo_name in enumerate(repo_names):
+            alias = f"r{i}"
+            if alias in data and alias not in failed_aliases:
+                results[repo_name] = parse_repository(data[alias])
+        return results
+
+    def lookup(self, repo_names):
+        """
+        Return {'owner/repo': metadata or None (not found)} for every name that could be looked up
+        """
+        keys = {name.lower(): name for name in repo_names if name and "/" in name}
+        missing = [name for key, name in keys.items() if not self._fresh(key)]
+        self.stats['cache_hits'] += len(keys) - len(missing)
+
+        for i in range(0, len(missing), GRAPHQL_BATCH_SIZE):
+            batch = missing[i:i + GRAPHQL_BATCH_SIZE]
+            results = self._query_batch(batch)
+            self.stats['looked_up'] += len(results)
+            now = time.time()
+            with self.lock:
+                for repo_name, metadata in results.items():
+                    self.cache[repo_name.lower()] = {"fetched_at": now, "data": metadata}
+
+        if missing:
+            self.save_cache()
+
+        return {
+            name: self.cache[key]["data"]
+            for key, name in keys.items() if key in self.cache
+        }
+
+    def cached_metadata(self, repo_name):
+        """Metadata already in the cache for 'owner/repo' (stale or not), without any request"""
+        entry = self.cache.get((repo_name or "").lower())
+        return entry["data"] if entry else None
+
+    def filter_repos(self, repo_names):
+        """
+        Split repositories into the ones to keep and the ones dropped by METADATA_FILTERS
+
+        Returns:
+            (set of kept names, {dropped name: reason})
+        """
+        metadata = self.lookup(repo_names)
+        kept, dropped = set(), {}
+        for name in repo_names:
+            if name not in metadata:
+                kept.add(name)
+                continue
+            reason = check_metadata_filters(metadata[name], self.filters)
+            if reason:
+                dropped[name] = reason
+            else:
+                kept.add(name)
+        self.stats['dropped'] += len(dropped)
+        return kept, dropped
+
+def repo_name_from_api_url(repository_url):
+    """'https://api.github.com/repos/owner/repo' -> 'owner/repo'"""
+    return "/".join(repository_url.rstrip("/").split("/")[-2:])
+
+def filter_metadata(headers, input_json_path="data_repos/race_condition_prs.json",
+                    output_json_path="data_repos/metadata_filtered_prs.json"):
+    """
+    Drop the collected PRs whose repository fails METADATA_FILTERS
+
+    Reads and writes the format saved by search_github_prs.
+    """
+    try:
+        with open(input_json_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        print(f"❌ File not found: {input_json_path}")
+        return {}
+
+    pull_requests = data.get("pull_requests", [])
+    prefilter = RepositoryMetadataPrefilter(headers)
+    kept, dropped = prefilter.filter_repos(sorted({pr["repo_name"] for pr in pull_requests}))
+
+    data["pull_requests"] = [pr for pr in pull_requests if pr["repo_name"] in kept]
+    data.setdefault("metadata", {})["metadata_filter"] = {
+        "filters": METADATA_FILTERS,
+        "dropped_repositories": dropped,
+        "prs_before": len(pull_requests),
+        "prs_after": len(data["pull_requests"]),
+    }
+
+    with open(output_json_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+
+    print(f"🏷️ Metadata filter kept {len(data['pull_requests'])} of {len(pull_requests)} PRs "
+          f"({len(dropped)} repositories dropped, {prefilter.stats['graphql_requests']} GraphQL requests)")
+    print(f"💾 Results saved to {output_json_path}")
+    return prefilter.stats
@@ -0,0 +1,77 @@
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+from src.github_searches.rate_limit import DEFAULT_SCHEDULER
+
+PER_PAGE = 100
+DEFAULT_WORKERS = 4
+
+def parse_link_header(value):
+    """{rel: url} from a Link header"""
+    links = {}
+    for part in (value or "").split(","):
+        if "<" not in part or ">" not in part:
+            continue
+        url = part[part.index("<") + 1:part.index(">")]
+        for param in part[part.index(">") + 1:].split(";"):
+            name, _, rel = param.strip().partition("=")
+            if name == "rel":
+                links[rel.strip('"')] = url
+    return links
+
+def with_query(url, **params):
+    """url with the given query parameters set (replacing existing ones)"""
+    parts = urlsplit(url)
+    query = [(key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True) if key not in params]
+    query += [(key, str(value)) for key, value in params.items()]
+    return urlunsplit(parts._replace(query=urlencode(query, safe=":")))
+
+def last_page(response):
+    """Page number of rel="last", 1 when the listing fits in one page"""
+    last = parse_link_header(response.headers.get("Link")).get("last")
+    if not last:
+        return 1
+    page = dict(parse_qsl(urlsplit(last).query)).get("page", "1")
+    return int(page) if page.isdigit() else 1
+
+def fetch_pages(get, url, per_page=PER_PAGE, max_pages=None, max_workers=DEFAULT_WORKERS, scheduler=None):
+    """
+    Fetch every page of a GitHub listing: page 1 first, then the pages up to
+    rel="last" concurrently, each one going through the quota scheduler.
+
+    Args:
+        get: get(url) -> response (or None), e.g. a safe_api_request partial
+        max_pages: Cap on the number of pages fetched
+
+    Returns:
+        (responses, failure): the 200 responses in page order, up to the first
+        page that failed; failure is None or (page, response or exception)
+    """
+    scheduler = scheduler or DEFAULT_SCHEDULER
+    url = with_query(url, per_page=per_page)
+
+    def fetch(page):
+        try:
+            return scheduler.get(get, with_query(url, page=page) if page > 1 else url)
+        except Exception as e:
+            return e
+
+    first = fetch(1)
+    if first is None or isinstance(first, Exception) or first.status_code != 200:
+        return [], (1, first)
+
+    pages = last_page(first)
+    if max_pages is not None:
+        pages = min(pages, max_pages)
+    if pages == 1:
+        return [first], None
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, pages - 1)) as executor:
+        rest = list(executor.map(fetch, range(2, pages + 1)))
+
+    responses = [first]
+    for page, response in enumerate(rest, 2):
+        if response is None or isinstance(response, Exception) or response.status_code != 200:
+            return responses, (page, response)
+        responses.append(response)
+    return responses, None
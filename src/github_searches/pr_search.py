@@ -8,23 +8,31 @@ import re
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 from requests.exceptions import RequestException, ConnectionError, Timeout
-import logging
+from logging import WARNING, ERROR
 
 from config.filters import (
     LANGUAGES,
     PR_DESCRIPTION_TERMS,
-    TEST_FILE_PATTERNS
+    TEST_FILE_PATTERNS,
+    SEARCH_START_DATE,
+    SEARCH_END_DATE,
+    SEARCH_WINDOW_DAYS
 )
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+from src.github_searches.metadata_filter import RepositoryMetadataPrefilter, repo_name_from_api_url
+from src.github_searches.search_cache import SearchCache, compact_search_item
+from src.github_searches.prioritizer import RepoHistory, PriorityScheduler, score_candidate, PRIORITY_BATCH
+from src.github_searches.latency import DEFAULT_TRACKER, hedged_get
+from src.github_searches.single_flight import DEFAULT_FLIGHTS, shared_json
+from src.github_searches.aggregates import RunAggregates
+from src.github_searches.records import compact_pr, as_dict, DictView
+from src.github_searches.event_log import log_event, flush_event_log
+from src.github_searches.pagination import fetch_pages
+from src.github_searches.raw_archive import ArchivingSession
+from src.github_searches.search_streams import LanguageStreams
 
-def get_next_page_url(response):
-    links = response.headers.get('Link', '')
-    for link in links.split(', '):
-        if 'rel="next"' in link:
-            return link[link.index('<') + 1:link.index('>')]
-    return None
+# GitHub lists at most 3000 files per PR
+MAX_PR_FILE_PAGES = 30
 
 def is_js_file(filename):
     return filename.lower().endswith(('.js', '.jsx', '.ts', '.tsx'))
@@ -39,9 +47,123 @@ def daterange(start_date, end_date, delta_days):
         yield start_date, min(start_date + timedelta(days=delta_days), end_date)
         start_date += timedelta(days=delta_days)
 
-def create_session_with_retries():
-    """Create a requests session with retry strategy"""
-    session = requests.Session()
+def search_windows():
+    """Yield the (start, end) date windows configured in config/filters.py"""
+    start_date = datetime.strptime(SEARCH_START_DATE, '%Y-%m-%d')
+    end_date = datetime.strptime(SEARCH_END_DATE, '%Y-%m-%d')
+    return daterange(start_date, end_date, SEARCH_WINDOW_DAYS)
+
+def build_search_url(lang, start, end, terms=PR_DESCRIPTION_TERMS, per_page=100):
+    """Build the search/issues URL for merged PRs of one language and date window"""
+    quoted_phrases = [f'"{phrase}"' for phrase in terms]
+    search_terms_query = " OR ".join(quoted_phrases)
+    created_filter = f"created:{start.strftime('%Y-%m-%d')}..{end.strftime('%Y-%m-%d')}"
+    query_str = f"({search_terms_query}) language:{lang} is:pr is:merged {created_filter}"
+    return f"https://api.github.com/search/issues?q={quote(query_str)}&sort=updated&order=desc&per_page={per_page}"
+
+def match_pr_terms(pr):
+    """Return the PR_DESCRIPTION_TERMS found in the PR title or body"""
+    title = (pr.get('title', '') or '').lower()
+    body = (pr.get('body', '') or '').lower()
+    return [
+        term for term in PR_DESCRIPTION_TERMS
+        if term.lower() in title or term.lower() in body
+    ]
+
+def fetch_search_results(session, headers, url, stats):
+    """
+    Fetch every page of a search query: page 1, then the rest up to rel="last" in parallel.
+    Results stop at the first failed page; the items of the pages before it are returned.
+    
+    Returns:
+        (items, complete, failed): complete is False if a page failed or the 1000-result cap
+        was hit; failed tells the first case apart (the missing pages can still be fetched)
+    """
+    log_event("search.page", "📄 Fetching page 1...", page=1, url=url)
+    responses, failure = fetch_pages(lambda page_url: safe_api_request(session, page_url, headers), url)
+    
+    items = []
+    complete = failure is None
+    for page, response in enumerate(responses, 1):
+        try:
+            results = shared_json(response)
+        except ValueError as e:
+            failure = (page, e)
+            complete = False
+            break
+        
+        if page == 1:
+            total_in_period = min(results.get('total_count', 0), 1000)
+            stats['total_found'] += total_in_period
+            complete = complete and results.get('total_count', 0) <= 1000
+            log_event("search.total", f"📊 Found {total_in_period} PRs in {len(responses)} pages",
+                      total=total_in_period, pages=len(responses))
+        
+        items.extend(results.get('items', []))
+    
+    if failure is not None:
+        page, error = failure
+        stats['errors'] += 1
+        if isinstance(error, Exception):
+            log_event("search.error", f"❌ Error processing page {page}: {str(error)}", ERROR, page=page, url=url)
+        elif error is not None:
+            log_event("search.error", f"❌ API Error: {error.status_code} - {error.text}", ERROR,
+                      page=page, status=error.status_code, url=url)
+    
+    return items, complete, failure is not None
+
+def search_window(session, headers, lang, start, end, stats, cache=None):
+    """
+    Fetch the search result items for one language/date window.
+    
+    With a SearchCache, only the PR_DESCRIPTION_TERMS not cached for this window are
+    searched (in one OR query); the results are split per term by title/body match,
+    cached, and the window is returned as the union over all terms.
+    
+    Returns:
+        (items, failed) where failed is True if a page could not be fetched, so the
+        window is missing results (hitting the 1000-result cap doesn't count)
+    """
+    if cache is None:
+        items, _, failed = fetch_search_results(session, headers, build_search_url(lang, start, end), stats)
+        return items, failed
+    
+    window_start, window_end = start.strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d')
+    cached_terms = cache.cached_terms(lang, window_start, window_end)
+    missing_terms = [term for term in PR_DESCRIPTION_TERMS if term not in cached_terms]
+    stats['cached_term_windows'] = stats.get('cached_term_windows', 0) + len(PR_DESCRIPTION_TERMS) - len(missing_terms)
+    
+    uncached_items = []
+    failed = False
+    if missing_terms:
+        if cached_terms:
+            log_event("search.cache", f"🗃️ Searching only uncached terms: {missing_terms}", terms=missing_terms)
+        items, complete, failed = fetch_search_results(
+            session, headers, build_search_url(lang, start, end, terms=missing_terms), stats
+        )
+        
+        if complete:
+            items_by_term = {term: [] for term in missing_terms}
+            for pr in items:
+                for term in match_pr_terms(pr):
+                    if term in items_by_term:
+                        items_by_term[term].append(pr)
+            cache.store(missing_terms, lang, window_start, window_end, items_by_term)
+        else:
+            # Partial or capped results are used for this run but not cached
+            uncached_items = items
+    
+    window_items = {pr['html_url']: pr for pr in cache.window_items(PR_DESCRIPTION_TERMS, lang, window_start, window_end)}
+    for pr in uncached_items:
+        window_items.setdefault(pr['html_url'], pr)
+    return list(window_items.values()), failed
+
+def create_session_with_retries(cache=None):
+    """
+    Create a requests session with retry strategy (archiving responses when configure_archive
+    was called, and answering immutable GETs from `cache` when given)
+    """
+    session = ArchivingSession(cache=cache)
     
     retry_strategy = Retry(
         total=5,  # Total number of retries
@@ -57,10 +179,13 @@ def create_session_with_retries():
     return session
 
 def safe_api_request(session, url, headers, max_retries=3, base_delay=1):
-    """Make API request with robust error handling and retries"""
+    """
+    Make API request with robust error handling and retries
+    (timeouts adapt per endpoint class and slow requests are hedged, see latency.py)
+    """
     for attempt in range(max_retries):
         try:
-            response = session.get(url, headers=headers, timeout=30)
+            response = hedged_get(session, url, headers=headers)
             
             # Handle rate limiting
             if response.status_code == 403 and 'X-RateLimit-Remaining' in response.headers:
@@ -69,7 +194,8 @@ def safe_api_request(session, url, headers, max_retries=3, base_delay=1):
                     reset_time = int(response.headers['X-RateLimit-Reset'])
                     wait_time = reset_time - time.time() + 1
                     if wait_time > 0:
-                        print(f"⏳ Rate limit reached. Waiting {int(wait_time)} seconds...")
+                        log_event("net.rate_limit", f"⏳ Rate limit reached. Waiting {int(wait_time)} seconds...",
+                                  WARNING, wait=int(wait_time))
                         time.sleep(wait_time)
                         continue
             
@@ -77,28 +203,29 @@ def safe_api_request(session, url, headers, max_retries=3, base_delay=1):
             
         except (ConnectionError, Timeout, RequestException) as e:
             wait_time = base_delay * (2 ** attempt)  # Exponential backoff
-            print(f"⚠️ Network error on attempt {attempt + 1}/{max_retries}: {str(e)}")
+            log_event("net.retry", f"⚠️ Network error on attempt {attempt + 1}/{max_retries}: {str(e)}",
+                      WARNING, url=url, attempt=attempt + 1)
             
             if attempt < max_retries - 1:
-                print(f"🔄 Retrying in {wait_time} seconds...")
+                log_event("net.retry", f"🔄 Retrying in {wait_time} seconds...", wait=wait_time)
                 time.sleep(wait_time)
             else:
-                print(f"❌ Failed after {max_retries} attempts")
+                log_event("net.failed", f"❌ Failed after {max_retries} attempts", ERROR, url=url)
                 raise e
     
     return None
 
 def fetch_pr_files(pr_api_url, session, headers):
-    """Fetch PR files with robust error handling"""
+    """Fetch every page of the PR's files (100 per page, fetched in parallel) with robust error handling"""
     files_url = f"{pr_api_url}/files"
     
     try:
-        files_response = safe_api_request(session, files_url, headers)
+        # Pages before a failed one are still used: they can only under-report test files
+        responses, _ = fetch_pages(
+            lambda page_url: safe_api_request(session, page_url, headers), files_url, max_pages=MAX_PR_FILE_PAGES
+        )
         
-        if files_response is None or files_response.status_code != 200:
-            return []
-        
-        files_data = files_response.json()
+        files_data = [f for response in responses for f in shared_json(response)]
         
         # Filter for JavaScript test files
         js_test_files = [
@@ -109,20 +236,14 @@ def fetch_pr_files(pr_api_url, session, headers):
         return js_test_files
         
     except Exception as e:
-        print(f"⚠️ Error fetching files for {pr_api_url}: {str(e)}")
+        log_event("pr.error", f"⚠️ Error fetching files for {pr_api_url}: {str(e)}", WARNING, url=pr_api_url)
         return []
 
 def process_pr(pr, session, headers):
     """Process individual PR to check if it matches criteria"""
     try:
-        title = pr["title"].lower()
-        body = (pr.get('body', '') or '').lower()
-        
         # Check if PR has any of the target terms
-        matching_terms = [
-            term for term in PR_DESCRIPTION_TERMS 
-            if term.lower() in title or term.lower() in body
-        ]
+        matching_terms = match_pr_terms(pr)
         
         if not matching_terms:
             return None
@@ -134,7 +255,7 @@ def process_pr(pr, session, headers):
         if pr_response is None or pr_response.status_code != 200:
             return None
         
-        pr_data = pr_response.json()
+        pr_data = shared_json(pr_response)
         
         # Check for JavaScript test files
         js_test_files = fetch_pr_files(pr_api_url, session, headers)
@@ -156,130 +277,215 @@ def process_pr(pr, session, headers):
         }
         
     except Exception as e:
-        print(f"⚠️ Error processing PR {pr.get('html_url', 'unknown')}: {str(e)}")
+        log_event("pr.error", f"⚠️ Error processing PR {pr.get('html_url', 'unknown')}: {str(e)}", WARNING,
+                  pr_url=pr.get('html_url'))
         return None
 
-def search_github_prs(headers, max_workers=5, save_checkpoint=True):
+def enrich_candidate(pr, session, headers, stats, collected_prs, seen_pr_urls, aggregates=None):
+    """Run the per-PR calls for one candidate and record it if it matches all criteria"""
+    processed_pr = process_pr(pr, session, headers)
+    
+    if processed_pr:
+        stats['with_terms'] += 1
+        
+        if processed_pr['js_test_files']:
+            stats['with_js_test_files'] += 1
+            stats['matching_all_criteria'] += 1
+            
+            # Kept as a slotted record (interned names, long bodies spilled to disk)
+            collected_prs.append(compact_pr(processed_pr))
+            seen_pr_urls.add(pr['html_url'])
+            if aggregates is not None:
+                aggregates.add_pr(processed_pr)
+            
+            log_event(
+                "pr.match",
+                f"✅ Match found: {pr['html_url']}\n"
+                f"   📁 Test files: {processed_pr['js_test_files'][:3]}{'...' if len(processed_pr['js_test_files']) > 3 else ''}\n"
+                f"   🏷️ Terms: {processed_pr['matched_terms']}",
+                pr_url=pr['html_url'], test_files=len(processed_pr['js_test_files']), terms=processed_pr['matched_terms']
+            )
+    
+    # Small delay to be respectful to API
+    time.sleep(0.2)
+
+def search_github_prs(headers, max_workers=5, save_checkpoint=True, metadata_prefilter=True, use_search_cache=True,
+                      prioritize=True, prefetcher=None):
     """
     Search GitHub PRs with robust error handling and recovery:
     - Network error recovery with retries
     - Connection pooling and session reuse
     - Checkpoint saving for recovery
     - Better error handling and logging
+    - Repositories failing METADATA_FILTERS are dropped before any per-PR call
+    - Search results cached per (term, language, window), so only new terms are searched
+    - With prioritize, candidates are scored and enriched best-first in batches of
+      PRIORITY_BATCH, so a run cut short by quota has spent it on the likeliest matches;
+      the candidates still waiting are kept in the checkpoint
+    - With a SpeculativePrefetcher, core quota about to expire during the search is spent
+      caching the best candidates' PR details, files and contents (see prefetch.py)
+    - Each language is searched by its own concurrent stream (see search_streams.py);
+      a PR returned under several languages is only processed once
+    
+    Returns the collected PRs as PRRecord objects (to_dict() gives the saved JSON form)
     """
     collected_prs = []
     seen_pr_urls = set()
+    # Search items already handed to the per-PR stage, whatever language returned them
+    queued_pr_urls = set()
+    aggregates = RunAggregates()
     
     # Create session with retry strategy
-    session = create_session_with_retries()
+    session = create_session_with_retries(cache=prefetcher.cache if prefetcher else None)
+    prefilter = RepositoryMetadataPrefilter(headers) if metadata_prefilter else None
+    history = RepoHistory.load() if prioritize else None
+    scheduler = PriorityScheduler()
     
     # Statistics
     stats = {
         'total_found': 0,
+        'cached_term_windows': 0,
         'processed': 0,
+        'term_matches': 0,
+        'dropped_by_metadata': 0,
         'with_terms': 0,
         'with_js_test_files': 0,
         'matching_all_criteria': 0,
-        'errors': 0
+        'cross_language_duplicates': 0,
+        'errors': 0,
+        'languages': {}
     }
     
-    start_date = datetime(2020, 1, 1)
-    end_date = datetime(2025, 5, 1)
-    delta_days = 7  # Can be increased to 30 for fewer API calls
-    
     checkpoint_file = "data_repos/checkpoint.json"
     
     # Load checkpoint if exists
     try:
         with open(checkpoint_file, 'r') as f:
             checkpoint = json.load(f)
-            collected_prs = checkpoint.get('collected_prs', [])
+            collected_prs = [compact_pr(pr) for pr in checkpoint.get('collected_prs', [])]
             seen_pr_urls = set(checkpoint.get('seen_pr_urls', []))
-            stats = checkpoint.get('stats', stats)
+            stats.update(checkpoint.get('stats', {}))
+            # Older checkpoints have no aggregates; rebuild them from the collected PRs
+            aggregates = (RunAggregates.from_dict(checkpoint['aggregates']) if checkpoint.get('aggregates')
+                          else RunAggregates.from_prs(as_dict(pr) for pr in collected_prs))
+            # Scored candidates not enriched yet go back in the queue
+            for entry in checkpoint.get('pending_candidates', []):
+                scheduler.push((entry['pr'], entry['lang']), entry['score'])
+                queued_pr_urls.add(entry['pr']['html_url'])
             print(f"📂 Loaded checkpoint: {len(collected_prs)} PRs already collected")
     except FileNotFoundError:
         print("🆕 Starting fresh search (no checkpoint found)")
     
+    for lang in LANGUAGES:
+        stats['languages'].setdefault(lang, {'windows': 0, 'found': 0, 'candidates': 0, 'duplicates': 0, 'matches': 0})
+    
+    def checkpoint():
+        if save_checkpoint:
+            save_checkpoint_data(checkpoint_file, collected_prs, seen_pr_urls, stats, aggregates, scheduler)
+    
+    def enrich(pr, lang):
+        enrich_candidate(pr, session, headers, stats, collected_prs, seen_pr_urls, aggregates)
+        if pr['html_url'] in seen_pr_urls and lang in stats['languages']:
+            stats['languages'][lang]['matches'] += 1
+    
+    def enrich_pending():
+        print(f"\n🎯 Enriching {len(scheduler)} candidates, highest expected yield first\n")
+        for i, (pr, lang) in enumerate(scheduler.drain(), 1):
+            if pr['html_url'] in seen_pr_urls:
+                continue
+            
+            enrich(pr, lang)
+            
+            if i % 50 == 0:
+                log_event("enrich.progress", f"⚡ Enriched {i} candidates, {len(scheduler)} left...",
+                          enriched=i, left=len(scheduler))
+                checkpoint()
+    
+    streams = LanguageStreams(
+        # A failed page is logged and counted in errors; the window's other results are still used
+        lambda lang, start, end, window_stats, cache: search_window(session, headers, lang, start, end,
+                                                                     window_stats, cache=cache)[0],
+        LANGUAGES, search_windows, cache_factory=SearchCache if use_search_cache else None
+    )
+    
+    if prefetcher:
+        prefetcher.start()
+    
+    completed = False
     try:
-        for lang in LANGUAGES:
-            print(f"\n🔎 Searching PRs in {lang} projects...\n")
+        # Windows arrive one language at a time, in turn; the per-PR stage stays on this thread
+        for lang, start, end, window_items, window_stats in streams:
+            lang_stats = stats['languages'][lang]
+            lang_stats['windows'] += 1
+            lang_stats['found'] += window_stats['total_found']
+            for key, value in window_stats.items():
+                stats[key] += value
+            
+            # The same PR can come back under another language: dropped before any per-PR call
+            fresh_items = []
+            for pr in window_items:
+                if pr['html_url'] in queued_pr_urls:
+                    stats['cross_language_duplicates'] += 1
+                    lang_stats['duplicates'] += 1
+                else:
+                    queued_pr_urls.add(pr['html_url'])
+                    fresh_items.append(pr)
+            window_items = fresh_items
             
-            # Build search query
-            quoted_phrases = [f'"{phrase}"' for phrase in PR_DESCRIPTION_TERMS]
-            search_terms_query = " OR ".join(quoted_phrases)
+            # One metadata lookup for all repositories with candidate PRs in this window
+            allowed_repos = None
+            if prefilter:
+                candidate_repos = {
+                    repo_name_from_api_url(pr['repository_url'])
+                    for pr in window_items if match_pr_terms(pr)
+                }
+                allowed_repos, dropped = prefilter.filter_repos(sorted(candidate_repos))
+                if dropped:
+                    log_event("search.metadata_drop",
+                              f"🏷️ Skipping {len(dropped)} repositories that fail METADATA_FILTERS",
+                              repositories=len(dropped))
             
-            for start, end in daterange(start_date, end_date, delta_days):
-                created_filter = f"created:{start.strftime('%Y-%m-%d')}..{end.strftime('%Y-%m-%d')}"
-                query_str = f"({search_terms_query}) language:{lang} is:pr is:merged {created_filter}"
+            # Process PRs
+            for pr in window_items:
+                if pr['html_url'] in seen_pr_urls:
+                    continue
                 
-                base_url = f"https://api.github.com/search/issues?q={quote(query_str)}&sort=updated&order=desc&per_page=100"
+                stats['processed'] += 1
                 
-                print(f"📅 Period: {start.strftime('%Y-%m-%d')} to {end.strftime('%Y-%m-%d')}")
+                if stats['processed'] % 50 == 0:
+                    log_event("search.progress", f"⚡ Processed {stats['processed']} PRs so far...",
+                              processed=stats['processed'])
+                    
+                    # Save checkpoint every 50 PRs
+                    checkpoint()
                 
-                url = base_url
-                page = 1
+                # PRs with a term in title/body are the ones that cost PR/file calls
+                if not match_pr_terms(pr):
+                    continue
+                stats['term_matches'] += 1
+                lang_stats['candidates'] += 1
                 
-                while url:
-                    print(f"📄 Fetching page {page}...")
-                    
-                    try:
-                        response = safe_api_request(session, url, headers)
-                        
-                        if response is None or response.status_code != 200:
-                            if response:
-                                print(f"❌ API Error: {response.status_code} - {response.text}")
-                            stats['errors'] += 1
-                            break
-                        
-                        results = response.json()
-                        
-                        if page == 1:
-                            total_in_period = min(results.get('total_count', 0), 1000)
-                            stats['total_found'] += total_in_period
-                            print(f"📊 Found {total_in_period} PRs in this period")
-                        
-                        # Process PRs
-                        for pr in results.get('items', []):
-                            if pr['html_url'] in seen_pr_urls:
-                                continue
-                            
-                            stats['processed'] += 1
-                            
-                            if stats['processed'] % 50 == 0:
-                                print(f"⚡ Processed {stats['processed']} PRs so far...")
-                                
-                                # Save checkpoint every 50 PRs
-                                if save_checkpoint:
-                                    save_checkpoint_data(checkpoint_file, collected_prs, seen_pr_urls, stats)
-                            
-                            processed_pr = process_pr(pr, session, headers)
-                            
-                            if processed_pr:
-                                stats['with_terms'] += 1
-                                
-                                if processed_pr['js_test_files']:
-                                    stats['with_js_test_files'] += 1
-                                    stats['matching_all_criteria'] += 1
-                                    
-                                    collected_prs.append(processed_pr)
-                                    seen_pr_urls.add(pr['html_url'])
-                                    
-                                    print(f"✅ Match found: {pr['html_url']}")
-                                    print(f"   📁 Test files: {processed_pr['js_test_files'][:3]}{'...' if len(processed_pr['js_test_files']) > 3 else ''}")
-                                    print(f"   🏷️ Terms: {processed_pr['matched_terms']}")
-                            
-                            # Small delay to be respectful to API
-                            time.sleep(0.2)
-                        
-                        url = get_next_page_url(response)
-                        page += 1
-                        time.sleep(2)  # Increased delay between pages
-                    
-                    except Exception as e:
-                        print(f"❌ Error processing page {page}: {str(e)}")
-                        stats['errors'] += 1
-                        time.sleep(5)  # Wait longer after errors
-                        break
+                repo_name = repo_name_from_api_url(pr['repository_url'])
+                if allowed_repos is not None and repo_name not in allowed_repos:
+                    stats['dropped_by_metadata'] += 1
+                    continue
+                
+                if prioritize:
+                    metadata = prefilter.cached_metadata(repo_name) if prefilter else None
+                    score = score_candidate(pr, repo_name, history, metadata)
+                    scheduler.push((compact_search_item(pr), lang), score)
+                    if prefetcher:
+                        prefetcher.add(pr, score)
+                else:
+                    enrich(pr, lang)
+            
+            # Enrichment starts once a batch of candidates is scored, not after the last window
+            if len(scheduler) >= PRIORITY_BATCH:
+                enrich_pending()
+        
+        if len(scheduler):
+            enrich_pending()
+        completed = True
     
     except KeyboardInterrupt:
         print("\n🛑 Search interrupted by user")
@@ -287,25 +493,51 @@ def search_github_prs(headers, max_workers=5, save_checkpoint=True):
         print(f"\n❌ Unexpected error: {str(e)}")
         stats['errors'] += 1
     finally:
+        streams.close()
+        if prefetcher:
+            prefetcher.stop()
+        
         # Always save final results
-        save_final_results(collected_prs, stats)
+        save_final_results(collected_prs, stats, aggregates=aggregates)
+        print_latency_summary()
         
-        # Clean up checkpoint file
-        try:
-            import os
-            os.remove(checkpoint_file)
-        except:
-            pass
+        # An interrupted run keeps its checkpoint (with the candidates still queued) to resume from
+        if completed:
+            try:
+                import os
+                os.remove(checkpoint_file)
+            except:
+                pass
+        else:
+            checkpoint()
     
     return collected_prs
 
-def save_checkpoint_data(checkpoint_file, collected_prs, seen_pr_urls, stats):
-    """Save checkpoint data for recovery"""
+def print_latency_summary(tracker=DEFAULT_TRACKER, flights=DEFAULT_FLIGHTS):
+    """Per-endpoint tail latency of the run; p99 stalls matter more than the average on long crawls"""
+    coalescing = flights.stats()
+    if coalescing['coalesced']:
+        print(f"\n🔗 {coalescing['coalesced']} of {coalescing['calls']} GETs joined an identical request already in flight")
+    summary = tracker.summary()
+    if not summary:
+        return
+    print("\n⏱️ API latency by endpoint:")
+    for endpoint, counts in summary.items():
+        print(f"   {endpoint}: {counts['requests']} requests, p50 {counts['p50']}s, p95 {counts['p95']}s, "
+              f"p99 {counts['p99']}s, {counts['timeouts']} timeouts, "
+              f"{counts['hedged']} hedged ({counts['hedge_wins']} won)")
+
+def save_checkpoint_data(checkpoint_file, collected_prs, seen_pr_urls, stats, aggregates=None, scheduler=None):
+    """Save checkpoint data for recovery (with the scored candidates of `scheduler` not enriched yet)"""
     try:
         checkpoint_data = {
-            'collected_prs': collected_prs,
+            'collected_prs': DictView(collected_prs),
             'seen_pr_urls': list(seen_pr_urls),
             'stats': stats,
+            'aggregates': aggregates.to_dict() if aggregates is not None else None,
+            'pending_candidates': [
+                {'score': score, 'lang': lang, 'pr': pr} for score, (pr, lang) in scheduler.entries()
+            ] if scheduler is not None else [],
             'timestamp': datetime.now().isoformat()
         }
         with open(checkpoint_file, 'w', encoding='utf-8') as f:
@@ -313,22 +545,36 @@ def save_checkpoint_data(checkpoint_file, collected_prs, seen_pr_urls, stats):
     except Exception as e:
         print(f"⚠️ Failed to save checkpoint: {str(e)}")
 
-def save_final_results(collected_prs, stats):
-    """Save final results with statistics"""
+def save_final_results(collected_prs, stats, output_file="data_repos/race_condition_prs.json", aggregates=None):
+    """
+    Save final results with statistics
+    (aggregates kept during the run are reused; otherwise they are built in one pass here)
+    """
+    if aggregates is None:
+        aggregates = RunAggregates.from_prs(as_dict(pr) for pr in collected_prs)
+    # Queued event lines go out before the summary
+    flush_event_log()
+    
     # Print final statistics
     print("\n" + "="*60)
     print("📊 FINAL STATISTICS")
     print("="*60)
     print(f"Total PRs found by search: {stats['total_found']}")
     print(f"Total PRs processed: {stats['processed']}")
+    print(f"PRs skipped by metadata filter: {stats.get('dropped_by_metadata', 0)}")
     print(f"PRs with target terms: {stats['with_terms']}")
     print(f"PRs with JS test files: {stats['with_js_test_files']}")
     print(f"PRs matching ALL criteria: {stats['matching_all_criteria']}")
     print(f"Errors encountered: {stats['errors']}")
     print(f"Success rate: {(stats['matching_all_criteria']/max(stats['processed'], 1)*100):.2f}%")
+    if stats.get('languages'):
+        print(f"Duplicates across languages: {stats.get('cross_language_duplicates', 0)}")
+        for lang, counts in stats['languages'].items():
+            print(f"   {lang}: {counts['windows']} windows, {counts['found']} found, {counts['candidates']} candidates, "
+                  f"{counts['duplicates']} duplicates, {counts['matches']} matches")
+    aggregates.print_summary()
     
     # Save results
-    output_file = "data_repos/race_condition_prs.json"
     try:
         with open(output_file, "w", encoding="utf-8") as f:
             json.dump({
@@ -336,14 +582,15 @@ def save_final_results(collected_prs, stats):
                     "search_date": datetime.now().isoformat(),
                     "total_prs_collected": len(collected_prs),
                     "search_criteria": {
-                        "date_range": "2020-01-01 to 2024-12-31",
+                        "date_range": f"{SEARCH_START_DATE} to {SEARCH_END_DATE}",
                         "terms": PR_DESCRIPTION_TERMS,
                         "languages": LANGUAGES,
                         "test_file_patterns": TEST_FILE_PATTERNS
                     },
-                    "statistics": stats
+                    "statistics": stats,
+                    "aggregates": aggregates.to_dict()
                 },
-                "pull_requests": collected_prs
+                "pull_requests": DictView(collected_prs)
             }, f, indent=2, ensure_ascii=False)
         
         print(f"\n💾 Results saved to {output_file}")
@@ -355,7 +602,7 @@ def save_final_results(collected_prs, stats):
         try:
             backup_file = "data_repos/race_condition_prs_backup.json"
             with open(backup_file, "w", encoding="utf-8") as f:
-                json.dump(collected_prs, f, indent=2, ensure_ascii=False)
+                json.dump(DictView(collected_prs), f, indent=2, ensure_ascii=False)
             print(f"💾 Backup saved to {backup_file}")
         except:
             print("❌ Failed to save backup as well")
\ No newline at end of file
@@ -0,0 +1,154 @@
+import heapq
+import itertools
+import threading
+import time
+
+from src.github_searches.raw_archive import RawArchive, ArchivingSession
+from src.github_searches.rate_limit import DEFAULT_SCHEDULER
+from src.github_searches.pagination import fetch_pages
+from src.github_searches.pr_search import is_js_file, is_test_file
+from src.github_searches.filter_search import RAW_MEDIA_TYPE, contents_url
+from src.github_searches.event_log import log_event
+
+DEFAULT_PREFETCH_DIR = "data_repos/prefetch"
+RATE_LIMIT_URL = "https://api.github.com/rate_limit"
+
+# Only core budget that would expire within this many seconds is spent
+EXPIRY_WINDOW_SECONDS = 15 * 60
+# Requests always left in the window for the pipeline's own calls
+CORE_RESERVE = 300
+POLL_SECONDS = 30
+MAX_FILES_PER_PR = 20
+
+class SpeculativePrefetcher:
+    """
+    Spends core quota that would otherwise expire unused (typically while the
+    search phase is bound by the 30/min search limit) on the candidates found
+    so far, best score first: PR details (head SHA), file list and the
+    contents of the JS test files at that SHA, all stored in a RawArchive cache.
+
+    Sessions built with ArchivingSession(cache=prefetcher.cache) - the search
+    enrichment and GitHubTestAnalyzer - then answer those calls from disk.
+    Quota is read from the free /rate_limit endpoint and every request goes
+    through the shared QuotaScheduler, so prefetching never eats into the
+    CORE_RESERVE requests kept for the pipeline.
+    """
+
+    def __init__(self, headers, cache_dir=DEFAULT_PREFETCH_DIR, scheduler=None,
+                 window_seconds=EXPIRY_WINDOW_SECONDS, reserve=CORE_RESERVE,
+                 poll_seconds=POLL_SECONDS, max_files=MAX_FILES_PER_PR):
+        self.headers = headers
+        self.cache = RawArchive(cache_dir)
+        self.session = ArchivingSession(cache=self.cache)
+        self.scheduler = scheduler or DEFAULT_SCHEDULER
+        self.window_seconds = window_seconds
+        self.reserve = reserve
+        self.poll_seconds = poll_seconds
+        self.max_files = max_files
+        self.stats = {'candidates': 0, 'prefetched_prs': 0, 'requests': 0, 'cache_hits': 0}
+
+        self._heap = []
+        self._counter = itertools.count()
+        self._queued = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def add(self, pr, score):
+        """Offer a search item (with 'url', 'html_url', 'repository_url') for prefetching"""
+        with self._lock:
+            if pr['html_url'] in self._queued:
+                return
+            self._queued.add(pr['html_url'])
+            heapq.heappush(self._heap, (-score, next(self._counter), pr))
+            self.stats['candidates'] += 1
+
+    def _pop(self):
+        with self._lock:
+            return heapq.heappop(self._heap)[2] if self._heap else None
+
+    def refresh_quota(self):
+        """Read the core quota from /rate_limit (not counted against any quota)"""
+        try:
+            response = self.session.get(RATE_LIMIT_URL, headers=self.headers, timeout=10)
+            core = response.json()['resources']['core']
+            self.scheduler.set_quota('core', int(core['remaining']), int(core['reset']))
+        except Exception as e:
+            log_event("prefetch.error", f"⚠️ Could not read the rate limit: {e}")
+
+    def spare_budget(self):
+        """Core requests that can be spent now without touching budget the pipeline will use"""
+        quota = self.scheduler.quota('core')
+        if quota is None or quota['reset'] - time.time() > self.window_seconds:
+            return 0
+        return max(quota['remaining'] - self.reserve, 0)
+
+    def _get(self, url, headers):
+        if self.session.has_cached(url):
+            self.stats['cache_hits'] += 1
+            return self.session.get(url, headers=headers)
+        self.stats['requests'] += 1
+        return self.scheduler.get(lambda page_url: self.session.get(page_url, headers=headers, timeout=30), url)
+
+    def prefetch(self, pr):
+        """Cache one candidate's PR details, file list and test-file contents"""
+        repo_name = "/".join(pr['repository_url'].split("/")[-2:])
+        pr_api_url = pr['url'].replace('issues', 'pulls')
+
+        response = self._get(pr_api_url, self.headers)
+        if response.status_code != 200:
+            return
+        sha = response.json()['head']['sha']
+
+        responses, _ = fetch_pages(lambda url: self._get(url, self.headers), f"{pr_api_url}/files",
+                                   max_workers=1, scheduler=_PassThrough())
+        test_files = [
+            f['filename'] for page in responses for f in page.json()
+            if is_js_file(f['filename']) and is_test_file(f['filename'])
+        ]
+
+        raw_headers = {**self.headers, "Accept": RAW_MEDIA_TYPE}
+        for file_path in test_files[:self.max_files]:
+            if self.spare_budget() <= 0:
+                break
+            self._get(contents_url(repo_name, file_path, sha), raw_headers).close()
+        self.stats['prefetched_prs'] += 1
+
+    def run_once(self):
+        """Prefetch candidates while there is expiring budget; returns how many were handled"""
+        self.refresh_quota()
+        handled = 0
+        while not self._stop.is_set() and self.spare_budget() > 0:
+            pr = self._pop()
+            if pr is None:
+                break
+            try:
+                self.prefetch(pr)
+            except Exception as e:
+                log_event("prefetch.error", f"⚠️ Prefetch failed for {pr['html_url']}: {e}", pr_url=pr['html_url'])
+            handled += 1
+        if handled:
+            log_event("prefetch.batch", f"🧺 Prefetched {handled} candidates with expiring core quota",
+                      handled=handled, **self.stats)
+        return handled
+
+    def start(self):
+        def loop():
+            while not self._stop.is_set():
+                self.run_once()
+                self._stop.wait(self.poll_seconds)
+
+        self._thread = threading.Thread(target=loop, name="prefetcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+class _PassThrough:
+    """Scheduler stand-in for fetch_pages: _get already goes through the real one"""
+
+    def get(self, get, url):
+        return get(url)
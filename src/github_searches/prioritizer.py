@@ -0,0 +1,112 @@
+import glob
+import heapq
+import itertools
+import json
+import math
+from collections import Counter
+
+from config.filters import PR_DESCRIPTION_TERMS, PR_TERM_WEIGHTS
+
+# A term in the title says more about the PR than one buried in the body
+TITLE_HIT_WEIGHT = 2.0
+BODY_HIT_WEIGHT = 1.0
+STAR_WEIGHT = 0.25
+# Candidates reordered together: bounds memory and how long the first enrichment waits
+PRIORITY_BATCH = 1000
+
+class RepoHistory:
+    """
+    Per-repository yield of earlier runs: PRs collected by the search versus PRs
+    that passed the content analysis. Repos never seen get the neutral prior.
+    """
+
+    def __init__(self, collected=None, matched=None):
+        self.collected = collected or Counter()
+        self.matched = matched or Counter()
+
+    @classmethod
+    def load(cls, search_glob="data_repos/race_condition_prs*.json",
+             analysis_glob="data_repos/filtered_race_condition_prs*.json"):
+        collected, matched = Counter(), Counter()
+
+        for path in glob.glob(search_glob):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    for pr in json.load(f).get("pull_requests", []):
+                        collected[pr["repo_name"].lower()] += 1
+            except (OSError, ValueError, KeyError):
+                continue
+
+        for path in glob.glob(analysis_glob):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    for project in json.load(f).get("matching_projects", []):
+                        matched[project["repo_name"].lower()] += 1
+            except (OSError, ValueError, KeyError):
+                continue
+
+        return cls(collected, matched)
+
+    def yield_rate(self, repo_name):
+        """Laplace-smoothed share of the repo's collected PRs that matched (0.5 when unknown)"""
+        key = (repo_name or "").lower()
+        return (self.matched[key] + 1) / (self.collected[key] + 2)
+
+def term_score(pr, terms=PR_DESCRIPTION_TERMS, weights=PR_TERM_WEIGHTS):
+    title = (pr.get('title', '') or '').lower()
+    body = (pr.get('body', '') or '').lower()
+    score = 0.0
+    for term in terms:
+        term_lower = term.lower()
+        weight = weights.get(term, 1.0)
+        if term_lower in title:
+            score += weight * TITLE_HIT_WEIGHT
+        elif term_lower in body:
+            score += weight * BODY_HIT_WEIGHT
+    return score
+
+def score_candidate(pr, repo_name, history=None, metadata=None):
+    """
+    Expected-yield score of a candidate PR, computed before any per-PR call:
+    term hits (title over body, weighted by specificity) x repo popularity x repo history
+    """
+    score = term_score(pr)
+    if metadata:
+        score *= 1 + STAR_WEIGHT * math.log10(1 + metadata.get("stars", 0))
+    if history:
+        score *= 0.5 + history.yield_rate(repo_name)
+    return round(score, 4)
+
+class PriorityScheduler:
+    """Max-priority queue of candidates; equal scores keep their insertion order"""
+
+    def __init__(self):
+        self._heap = []
+        self._counter = itertools.count()
+
+    def push(self, item, score):
+        heapq.heappush(self._heap, (-score, next(self._counter), item))
+
+    def pop(self):
+        return heapq.heappop(self._heap)[2]
+
+    def __len__(self):
+        return len(self._heap)
+
+    def drain(self):
+        while self._heap:
+            yield self.pop()
+
+    def entries(self):
+        """(score, item) pairs best first, without removing them (for checkpoints)"""
+        return [(-score, item) for score, _, item in sorted(self._heap, key=lambda entry: entry[:2])]
+
+def prioritized(items, score, batch=PRIORITY_BATCH):
+    """Best-first order within consecutive batches of an iterable, so it is never read in full"""
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= batch:
+            yield from sorted(chunk, key=score, reverse=True)
+            chunk = []
+    yield from sorted(chunk, key=score, reverse=True)
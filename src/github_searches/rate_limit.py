@@ -0,0 +1,83 @@
+import threading
+import time
+
+# Requests kept in hand per resource; callers wait for the reset below this
+DEFAULT_RESERVE = 1
+
+def quota_resource(url):
+    """GitHub quota bucket a URL is charged to ('search' has its own, much smaller one)"""
+    if "/search/" in url:
+        return "search"
+    if "/graphql" in url:
+        return "graphql"
+    return "core"
+
+class QuotaScheduler:
+    """
+    Shared view of the GitHub quotas, fed by the X-RateLimit-* headers of the
+    responses. Concurrent callers take one request each from the last known
+    remaining count, so a burst of parallel requests cannot overdraw the quota;
+    when it runs out they sleep until the reset instead of collecting 403s.
+    """
+
+    def __init__(self, reserve=DEFAULT_RESERVE):
+        self.reserve = reserve
+        self.quotas = {}
+        self.waited = 0.0
+        self.condition = threading.Condition()
+
+    def acquire(self, resource):
+        with self.condition:
+            while True:
+                quota = self.quotas.get(resource)
+                if quota is None or quota["remaining"] > self.reserve:
+                    if quota is not None:
+                        quota["remaining"] -= 1
+                    return
+                wait = quota["reset"] - time.time() + 1
+                if wait <= 0:
+                    # Window rolled over: the next response tells the new numbers
+                    del self.quotas[resource]
+                    return
+                self.waited += wait
+                self.condition.wait(wait)
+
+    def quota(self, resource):
+        """Last known {'remaining', 'reset'} of a resource, or None"""
+        with self.condition:
+            quota = self.quotas.get(resource)
+            return dict(quota) if quota else None
+
+    def set_quota(self, resource, remaining, reset):
+        """Record a quota read elsewhere (e.g. the /rate_limit endpoint, which costs nothing)"""
+        with self.condition:
+            self.quotas[resource] = {"remaining": remaining, "reset": reset}
+            self.condition.notify_all()
+
+    def update(self, resource, response):
+        """Record the quota reported by a response (any status)"""
+        headers = getattr(response, "headers", None) or {}
+        try:
+            remaining = int(headers["X-RateLimit-Remaining"])
+            reset = int(headers["X-RateLimit-Reset"])
+        except (KeyError, ValueError):
+            return
+        resource = headers.get("X-RateLimit-Resource", resource)
+        with self.condition:
+            quota = self.quotas.get(resource)
+            # Responses of one window can arrive out of order: keep the lowest count
+            if quota is None or reset != quota["reset"] or remaining < quota["remaining"]:
+                self.quotas[resource] = {"remaining": remaining, "reset": reset}
+            self.condition.notify_all()
+
+    def get(self, get, url):
+        """Call get(url) once the quota of the URL's resource allows it"""
+        resource = quota_resource(url)
+        self.acquire(resource)
+        response = get(url)
+        if response is not None:
+            self.update(resource, response)
+        return response
+
+# Shared by the paginators of the process so parallel page fetches see one quota
+DEFAULT_SCHEDULER = QuotaScheduler()
@@ -0,0 +1,231 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from src.github_searches.latency import endpoint_class
+from src.github_searches.circuit_breaker import classify_response
+
+DEFAULT_ARCHIVE_DIR = "data_repos/archive"
+# A new segment file is started past this size
+SEGMENT_BYTES = 256 * 1024 * 1024
+# Headers the pipeline reads from a response (pagination and quota bookkeeping)
+ARCHIVED_HEADERS = ("Link", "Content-Type", "X-RateLimit-Resource")
+# Responses that say nothing about the payload: a replay must not see them
+TRANSIENT_FAILURES = ("quota", "server")
+# Endpoint classes whose answer never changes once the PR is merged (contents only at a fixed ref)
+CACHEABLE_KINDS = ("pulls", "pull_files", "contents")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS payloads (
+    url TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    status INTEGER NOT NULL,
+    headers TEXT NOT NULL,
+    segment TEXT NOT NULL,
+    offset INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    fetched_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS payloads_kind ON payloads (kind);
+"""
+
+def request_key(url, params=None):
+    """Archive key of a GET: the URL as requests sends it (params included)"""
+    if not params:
+        return url
+    return requests.Request("GET", url, params=params).prepare().url
+
+class RawArchive:
+    """
+    Append-only store of raw GitHub responses (search pages, PR details, file
+    lists, file contents), keyed by request URL.
+
+    - Bodies are zlib-compressed one by one and appended to segment files, so
+      any payload can be read back without decompressing its neighbours
+    - Each process writes its own segment; the SQLite index (WAL) points every
+      URL at its latest copy, older copies are left in place
+    """
+
+    def __init__(self, directory=DEFAULT_ARCHIVE_DIR, segment_bytes=SEGMENT_BYTES):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.conn = sqlite3.connect(os.path.join(directory, "index.db"), timeout=60, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self.lock = threading.Lock()
+        self._segment = None
+        self._segment_name = None
+        self._readers = {}
+
+    def close(self):
+        with self.lock:
+            if self._segment is not None:
+                self._segment.close()
+            for reader in self._readers.values():
+                reader.close()
+            self._readers.clear()
+            self.conn.close()
+
+    def _writable_segment(self):
+        if self._segment is None or self._segment.tell() >= self.segment_bytes:
+            if self._segment is not None:
+                self._segment.close()
+            self._segment_name = f"segment-{int(time.time() * 1000)}-{os.getpid()}.zz"
+            self._segment = open(os.path.join(self.directory, self._segment_name), "ab")
+        return self._segment
+
+    def put(self, url, status, headers, body):
+        data = zlib.compress(body or b"")
+        kept = {name: headers[name] for name in ARCHIVED_HEADERS if name in headers}
+        with self.lock:
+            segment = self._writable_segment()
+            offset = segment.tell()
+            segment.write(data)
+            segment.flush()
+            with self.conn:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO payloads (url, kind, status, headers, segment, offset, length, size, fetched_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (url, endpoint_class(url), status, json.dumps(kept), self._segment_name,
+                     offset, len(data), len(body or b""), time.time())
+                )
+
+    def record(self, url, response):
+        """Store a response unless it is a transient failure (quota, 5xx)"""
+        if classify_response(response) in TRANSIENT_FAILURES:
+            return
+        self.put(url, response.status_code, response.headers, response.content)
+
+    def get(self, url):
+        """(status, headers, body) of the latest copy of url, or None"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT status, headers, segment, offset, length FROM payloads WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            status, headers, segment, offset, length = row
+            if segment == self._segment_name:
+                self._segment.flush()
+            reader = self._readers.get(segment)
+            if reader is None:
+                reader = self._readers[segment] = open(os.path.join(self.directory, segment), "rb")
+            reader.seek(offset)
+            data = reader.read(length)
+        return status, json.loads(headers), zlib.decompress(data)
+
+    def contains(self, url):
+        with self.lock:
+            return self.conn.execute("SELECT 1 FROM payloads WHERE url = ?", (url,)).fetchone() is not None
+
+    def urls(self, kind=None):
+        with self.lock:
+            if kind is None:
+                rows = self.conn.execute("SELECT url FROM payloads ORDER BY url").fetchall()
+            else:
+                rows = self.conn.execute("SELECT url FROM payloads WHERE kind = ? ORDER BY url", (kind,)).fetchall()
+        return [row[0] for row in rows]
+
+    def stats(self):
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT kind, COUNT(*), SUM(size), SUM(length) FROM payloads GROUP BY kind ORDER BY kind"
+            ).fetchall()
+        return {kind: {"payloads": count, "bytes": size, "stored_bytes": stored} for kind, count, size, stored in rows}
+
+_archive = None
+_archive_lock = threading.Lock()
+
+def configure_archive(directory=DEFAULT_ARCHIVE_DIR):
+    """Start archiving every GET made through an ArchivingSession in this process"""
+    global _archive
+    with _archive_lock:
+        if _archive is not None:
+            _archive.close()
+        _archive = RawArchive(directory) if directory else None
+        return _archive
+
+def active_archive():
+    return _archive
+
+def is_cacheable(url):
+    kind = endpoint_class(url)
+    return kind in CACHEABLE_KINDS and (kind != "contents" or "ref=" in url)
+
+def archived_response(url, stored):
+    """requests.Response for a (status, headers, body) read from an archive"""
+    status, headers, body = stored
+    response = requests.models.Response()
+    response.url = url
+    response.encoding = "utf-8"
+    response.status_code = status
+    response.headers = CaseInsensitiveDict(headers)
+    response._content = body
+    # The body is already in memory: iter_content slices it and close() has nothing to release
+    response._content_consumed = True
+    return response
+
+class ArchivingSession(requests.Session):
+    """
+    requests.Session that copies every GET response into the configured archive.
+    Streamed bodies are read in full first, so the archive never holds a cut-off
+    file; without configure_archive it is a plain Session.
+
+    With a cache (a RawArchive, e.g. filled by the speculative prefetcher),
+    GETs of immutable payloads (PR details, PR file lists, contents at a ref)
+    are answered from it when present and stored in it otherwise. A streamed
+    GET that misses the cache is left alone: storing it would read the whole
+    body and undo the caller's byte cap and early exit.
+    """
+
+    def __init__(self, cache=None):
+        super().__init__()
+        self.cache = cache
+
+    def has_cached(self, url):
+        return self.cache is not None and is_cacheable(url) and self.cache.contains(url)
+
+    def request(self, method, url, *args, **kwargs):
+        get = method.upper() == "GET"
+        key = request_key(url, kwargs.get("params"))
+        cacheable = get and self.cache is not None and is_cacheable(key)
+        if cacheable:
+            stored = self.cache.get(key)
+            if stored is not None:
+                return archived_response(key, stored)
+
+        response = super().request(method, url, *args, **kwargs)
+        if cacheable and not kwargs.get("stream"):
+            self.cache.record(key, response)
+        archive = _archive
+        if archive is not None and get:
+            archive.record(key, response)
+        return response
+
+class ArchiveReplaySession(requests.Session):
+    """
+    Stand-in for the network: GETs are answered from a RawArchive. A URL that
+    was never archived answers 404, which the pipeline treats as a missing
+    payload; misses are counted.
+    """
+
+    def __init__(self, archive):
+        super().__init__()
+        self.archive = archive
+        self.misses = 0
+
+    def request(self, method, url, params=None, **kwargs):
+        key = request_key(url, params)
+        stored = self.archive.get(key) if method.upper() == "GET" else None
+        if stored is None:
+            self.misses += 1
+            stored = (404, {"Content-Type": "application/json"}, b'{"message": "Not archived"}')
+        return archived_response(key, stored)
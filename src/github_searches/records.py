@@ -0,0 +1,224 @@
+import json
+import sys
+import tempfile
+import threading
+
+# Bodies at least this long are written to the BodyStore and read back only when serialized
+SPILL_THRESHOLD = 512
+
+_interned_tuples = {}
+
+def intern_text(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+def intern_tuple(values):
+    """One shared tuple per distinct list of interned strings (term lists repeat across PRs)"""
+    key = tuple(intern_text(value) for value in values or ())
+    return _interned_tuples.setdefault(key, key)
+
+def keywords_to_mask(found, vocabulary):
+    """Bit i set when vocabulary[i] was found"""
+    mask = 0
+    for i, keyword in enumerate(vocabulary):
+        if keyword in found:
+            mask |= 1 << i
+    return mask
+
+def mask_to_keywords(mask, vocabulary):
+    """Found keywords in vocabulary order, which is the order the scanners report them in"""
+    return [keyword for i, keyword in enumerate(vocabulary) if mask & (1 << i)]
+
+class SpilledText:
+    __slots__ = ("offset", "length")
+
+    def __init__(self, offset, length):
+        self.offset = offset
+        self.length = length
+
+class BodyStore:
+    """Append-only spill file for long PR bodies; lives as long as the process"""
+
+    def __init__(self, threshold=SPILL_THRESHOLD, directory=None):
+        self.threshold = threshold
+        self._file = tempfile.TemporaryFile(dir=directory)
+        self._lock = threading.Lock()
+        self._size = 0
+
+    def put(self, text):
+        if not isinstance(text, str) or len(text) < self.threshold:
+            return text
+        data = text.encode("utf-8")
+        with self._lock:
+            offset = self._size
+            self._file.seek(offset)
+            self._file.write(data)
+            self._size += len(data)
+        return SpilledText(offset, len(data))
+
+    def get(self, value):
+        if not isinstance(value, SpilledText):
+            return value
+        with self._lock:
+            self._file.seek(value.offset)
+            return self._file.read(value.length).decode("utf-8")
+
+DEFAULT_BODY_STORE = None
+
+def default_body_store():
+    global DEFAULT_BODY_STORE
+    if DEFAULT_BODY_STORE is None:
+        DEFAULT_BODY_STORE = BodyStore()
+    return DEFAULT_BODY_STORE
+
+class PRRecord:
+    """A collected PR (the dict process_pr returns), with interned strings and a spillable body"""
+
+    __slots__ = ("repo_url", "repo_name", "pr_url", "author", "js_test_files", "matched_terms",
+                 "title", "_body", "created_at", "merged_at", "_store")
+
+    @classmethod
+    def from_dict(cls, data, store=None):
+        record = cls()
+        record._store = store or default_body_store()
+        record.repo_url = intern_text(data.get("repo_url"))
+        record.repo_name = intern_text(data.get("repo_name"))
+        record.pr_url = data.get("pr_url")
+        record.author = intern_text(data.get("author"))
+        record.js_test_files = tuple(data.get("js_test_files") or ())
+        record.matched_terms = intern_tuple(data.get("matched_terms"))
+        record.title = data.get("title")
+        record._body = record._store.put(data.get("body"))
+        record.created_at = data.get("created_at")
+        record.merged_at = data.get("merged_at")
+        return record
+
+    @property
+    def body(self):
+        return self._store.get(self._body)
+
+    def to_dict(self):
+        return {
+            "repo_url": self.repo_url,
+            "repo_name": self.repo_name,
+            "pr_url": self.pr_url,
+            "author": self.author,
+            "js_test_files": list(self.js_test_files),
+            "matched_terms": list(self.matched_terms),
+            "title": self.title,
+            "body": self.body,
+            "created_at": self.created_at,
+            "merged_at": self.merged_at
+        }
+
+# FileResult flags
+_CONTENT_RETRIEVED = 1
+_MATCHES_SET = 2
+_MATCHES = 4
+
+class FileResult:
+    """One analyzed test file: keyword hits as bitmasks over the analyzer's keyword lists"""
+
+    __slots__ = ("file_path", "test_mask", "async_mask", "flags", "test_keywords", "async_keywords")
+
+    @classmethod
+    def from_dict(cls, data, test_keywords, async_keywords):
+        record = cls()
+        record.file_path = data["file_path"]
+        record.test_keywords = intern_tuple(test_keywords)
+        record.async_keywords = intern_tuple(async_keywords)
+        record.test_mask = keywords_to_mask(data.get("found_test_keywords") or [], record.test_keywords)
+        record.async_mask = keywords_to_mask(data.get("found_async_keywords") or [], record.async_keywords)
+        record.flags = _CONTENT_RETRIEVED if data.get("content_retrieved") else 0
+        if "matches_criteria" in data:
+            record.flags |= _MATCHES_SET | (_MATCHES if data["matches_criteria"] else 0)
+        return record
+
+    def to_dict(self):
+        data = {
+            "file_path": self.file_path,
+            "has_test_keywords": bool(self.test_mask),
+            "has_async_keywords": bool(self.async_mask),
+            "found_test_keywords": mask_to_keywords(self.test_mask, self.test_keywords),
+            "found_async_keywords": mask_to_keywords(self.async_mask, self.async_keywords),
+            "content_retrieved": bool(self.flags & _CONTENT_RETRIEVED)
+        }
+        if self.flags & _MATCHES_SET:
+            data["matches_criteria"] = bool(self.flags & _MATCHES)
+        return data
+
+class MatchingProjectRecord:
+    """A matching_projects entry (see GitHubTestAnalyzer.build_matching_project)"""
+
+    __slots__ = ("pr", "total_test_files", "files_with_test_and_async", "files")
+
+    @classmethod
+    def from_dict(cls, data, test_keywords, async_keywords, store=None):
+        record = cls()
+        record.pr = PRRecord.from_dict(data, store)
+        results = data["analysis_results"]
+        record.total_test_files = results["total_test_files"]
+        record.files_with_test_and_async = results["files_with_test_and_async"]
+        record.files = tuple(
+            FileResult.from_dict(file_result, test_keywords, async_keywords)
+            for file_result in results["matching_files_details"]
+        )
+        return record
+
+    @property
+    def repo_name(self):
+        return self.pr.repo_name
+
+    def to_dict(self):
+        pr = self.pr
+        return {
+            "repo_url": pr.repo_url,
+            "repo_name": pr.repo_name,
+            "pr_url": pr.pr_url,
+            "author": pr.author,
+            "title": pr.title,
+            "body": pr.body,
+            "created_at": pr.created_at,
+            "merged_at": pr.merged_at,
+            "matched_terms": list(pr.matched_terms),
+            "matching_js_test_files": [f.file_path for f in self.files],
+            "analysis_results": {
+                "total_test_files": self.total_test_files,
+                "files_with_test_and_async": self.files_with_test_and_async,
+                "matching_files_details": [f.to_dict() for f in self.files]
+            }
+        }
+
+def compact_pr(data, store=None):
+    """PRRecord for a process_pr dict; a dict the record can't reproduce exactly is kept as is"""
+    record = PRRecord.from_dict(data, store)
+    return record if _same_json(record.to_dict(), data) else data
+
+def compact_matching_project(data, test_keywords, async_keywords, store=None):
+    """MatchingProjectRecord for a matching_projects dict, or the dict itself (e.g. keywords of an older run)"""
+    record = MatchingProjectRecord.from_dict(data, test_keywords, async_keywords, store)
+    return record if _same_json(record.to_dict(), data) else data
+
+def _same_json(a, b):
+    # Key order matters for the output files, so compare the serialized form
+    return json.dumps(a, ensure_ascii=False) == json.dumps(b, ensure_ascii=False)
+
+def as_dict(record):
+    """Records to their JSON dict; plain dicts pass through"""
+    return record.to_dict() if hasattr(record, "to_dict") else record
+
+class DictView(list):
+    """
+    Stand-in for a list of dicts when calling json.dump with indent: each record
+    becomes a dict only while it is being written, so the output is identical
+    to dumping [r.to_dict() for r in records] without building that list
+    """
+
+    def __init__(self, records):
+        super().__init__()
+        self._records = records
+
+    def __iter__(self):
+        return (as_dict(record) for record in self._records)
+
+    def __len__(self):
+        return len(self._records)
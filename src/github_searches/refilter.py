@@ -0,0 +1,168 @@
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from src.github_searches.raw_archive import DEFAULT_ARCHIVE_DIR, RawArchive, ArchiveReplaySession
+from src.github_searches.pr_search import match_pr_terms, process_pr, save_final_results
+from src.github_searches.filter_search import GitHubTestAnalyzer
+from src.github_searches.aggregates import RunAggregates
+from src.github_searches.records import compact_pr
+from src.github_searches.event_log import configure_event_log
+from src.github_searches.circuit_breaker import BreakerBoard, REPO_FAILURE_THRESHOLDS
+
+DEFAULT_BATCH_SIZE = 200
+
+class OfflineAnalyzer(GitHubTestAnalyzer):
+    """
+    GitHubTestAnalyzer over an archive: no quota to pace, and breakers that never
+    open, since archive misses answer 404 and the output must not depend on batch order
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        never = float("inf")
+        self.breakers = BreakerBoard(repo_thresholds={reason: never for reason in REPO_FAILURE_THRESHOLDS},
+                                     endpoint_threshold=never)
+
+    def check_rate_limit(self):
+        pass
+
+def archived_search_items(archive):
+    """Every PR seen in an archived search page, once per html_url, in archive order"""
+    items = {}
+    for url in archive.urls("search"):
+        status, _, body = archive.get(url)
+        if status != 200:
+            continue
+        for pr in json.loads(body).get("items", []):
+            if "pull_request" in pr or "/pull/" in pr.get("html_url", ""):
+                items.setdefault(pr["html_url"], pr)
+    return list(items.values())
+
+def replay_batch(archive_dir, items, analyze=True, test_keywords=None, async_keywords=None):
+    """
+    Run process_pr (and analyze_pr on its matches) for a batch of search items,
+    answering every request from the archive. Runs in a worker process.
+
+    Returns:
+        (processed PRs, analysis journal entries, counters)
+    """
+    configure_event_log(console="off")
+    archive = RawArchive(archive_dir)
+    session = ArchiveReplaySession(archive)
+    analyzer = OfflineAnalyzer({}, session=session, request_delay=0,
+                               test_keywords=test_keywords, async_keywords=async_keywords)
+    counters = {'with_terms': 0, 'with_js_test_files': 0}
+    processed_prs, entries = [], []
+
+    try:
+        for pr in items:
+            if match_pr_terms(pr):
+                counters['with_terms'] += 1
+            processed_pr = process_pr(pr, session, {})
+            if not processed_pr:
+                continue
+            counters['with_js_test_files'] += 1
+            processed_prs.append(processed_pr)
+            if analyze:
+                entries.append(analyzer.journal_entry(processed_pr, analyzer.analyze_pr(processed_pr)))
+    finally:
+        analyzer.close()
+        archive.close()
+
+    counters['archive_misses'] = session.misses
+    return processed_prs, entries, counters
+
+def refilter(archive_dir=DEFAULT_ARCHIVE_DIR, output_file="data_repos/refilter_prs.json",
+             analysis_output="data_repos/refilter_matching_projects.json", analyze=True,
+             workers=None, batch_size=DEFAULT_BATCH_SIZE, test_keywords=None, async_keywords=None):
+    """
+    Re-run the search and content-analysis decisions with the current
+    PR_DESCRIPTION_TERMS, TEST_FILE_PATTERNS and keywords over an archive
+    written by a crawl started with --archive. No network calls are made;
+    batches of PRs are replayed in parallel processes.
+
+    Only PRs the original search returned can be found again, and the
+    METADATA_FILTERS prefilter is not replayed (repository metadata is not archived).
+    """
+    archive = RawArchive(archive_dir)
+    try:
+        items = archived_search_items(archive)
+    finally:
+        archive.close()
+    print(f"🗄️ Replaying {len(items)} archived search results from {archive_dir}")
+
+    batches = [items[i:i + batch_size] for i in range(0, len(items), batch_size)]
+    collected_prs, entries = [], []
+    counters = {'with_terms': 0, 'with_js_test_files': 0, 'archive_misses': 0}
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(replay_batch, archive_dir, batch, analyze, test_keywords, async_keywords)
+            for batch in batches
+        ]
+        for future in futures:
+            batch_prs, batch_entries, batch_counters = future.result()
+            collected_prs.extend(compact_pr(pr) for pr in batch_prs)
+            entries.extend(batch_entries)
+            for name, value in batch_counters.items():
+                counters[name] += value
+
+    stats = {
+        'total_found': len(items),
+        'processed': len(items),
+        'with_terms': counters['with_terms'],
+        'with_js_test_files': counters['with_js_test_files'],
+        'matching_all_criteria': len(collected_prs),
+        'errors': 0,
+        'archive_misses': counters['archive_misses'],
+    }
+    save_final_results(collected_prs, stats, output_file)
+
+    if not analyze:
+        return stats, None
+
+    analyzer = OfflineAnalyzer({}, test_keywords=test_keywords, async_keywords=async_keywords)
+    matching_projects = []
+    aggregates = RunAggregates()
+    analysis_stats = {
+        'total_prs_analyzed': 0,
+        'successful_analyses': 0,
+        'prs_with_matching_files': 0,
+        'total_files_analyzed': 0,
+        'total_matching_files': 0,
+        'resumed_from_journal': 0,
+        'errors': []
+    }
+    try:
+        for entry in entries:
+            analyzer.record_analysis(entry, analysis_stats, matching_projects, aggregates)
+        analyzer.write_output(analysis_output, archive_dir, analysis_stats, matching_projects, aggregates, True)
+    finally:
+        analyzer.close()
+
+    print(f"💾 Analysis saved to {analysis_output} ({len(matching_projects)} matching PRs)")
+    if counters['archive_misses']:
+        print(f"⚠️ {counters['archive_misses']} requests were not in the archive and counted as not found")
+    return stats, analysis_stats
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-run the PR and content filters offline over a raw payload archive")
+    parser.add_argument("--archive", default=DEFAULT_ARCHIVE_DIR)
+    parser.add_argument("--output", default="data_repos/refilter_prs.json")
+    parser.add_argument("--analysis-output", default="data_repos/refilter_matching_projects.json")
+    parser.add_argument("--no-analysis", action="store_true", help="Only replay the search/process_pr stage")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--test-keywords", help="Comma-separated test keywords (default: the analyzer's)")
+    parser.add_argument("--async-keywords", help="Comma-separated async keywords (default: the analyzer's)")
+    args = parser.parse_args(argv)
+
+    split = lambda value: [keyword for keyword in value.split(",") if keyword] if value else None
+    refilter(args.archive, args.output, args.analysis_output, analyze=not args.no_analysis,
+             workers=args.workers, batch_size=args.batch_size,
+             test_keywords=split(args.test_keywords), async_keywords=split(args.async_keywords))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+import json
+import os
+import sqlite3
+import time
+
+DEFAULT_SEARCH_CACHE_PATH = "data_repos/cache/search_cache.db"
+
+# Search item fields process_pr needs; the rest of the payload is not stored
+SEARCH_ITEM_FIELDS = ["url", "html_url", "title", "body", "repository_url", "user", "created_at"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS term_windows (
+    term TEXT NOT NULL,
+    lang TEXT NOT NULL,
+    window_start TEXT NOT NULL,
+    window_end TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    PRIMARY KEY (term, lang, window_start, window_end)
+);
+CREATE TABLE IF NOT EXISTS term_window_prs (
+    term TEXT NOT NULL,
+    lang TEXT NOT NULL,
+    window_start TEXT NOT NULL,
+    window_end TEXT NOT NULL,
+    pr_url TEXT NOT NULL,
+    PRIMARY KEY (term, lang, window_start, window_end, pr_url)
+);
+CREATE TABLE IF NOT EXISTS search_items (
+    pr_url TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+"""
+
+def compact_search_item(pr):
+    return {field: pr.get(field) for field in SEARCH_ITEM_FIELDS}
+
+class SearchCache:
+    """
+    Search results cached per (term, language, window).
+
+    Each cached (term, window) pair stores the PRs whose title or body contains
+    the term, which are exactly the PRs process_pr can accept for it. A window
+    is then rebuilt as the union of its terms' PRs, and only the terms missing
+    from the cache are searched, so adding a term to PR_DESCRIPTION_TERMS only
+    costs that term's searches.
+    """
+
+    def __init__(self, db_path=DEFAULT_SEARCH_CACHE_PATH):
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(db_path, timeout=60)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def cached_terms(self, lang, window_start, window_end):
+        rows = self.conn.execute(
+            "SELECT term FROM term_windows WHERE lang = ? AND window_start = ? AND window_end = ?",
+            (lang, window_start, window_end)
+        )
+        return {row[0] for row in rows}
+
+    def store(self, terms, lang, window_start, window_end, items_by_term):
+        """
+        Record the PRs found for each searched term; terms with no PRs are stored too,
+        so an empty (term, window) is not searched again
+        """
+        now = time.time()
+        with self.conn:
+            for term in terms:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO term_windows (term, lang, window_start, window_end, fetched_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (term, lang, window_start, window_end, now)
+                )
+                for pr in items_by_term.get(term, []):
+                    self.conn.execute(
+                        "INSERT OR IGNORE INTO term_window_prs (term, lang, window_start, window_end, pr_url) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (term, lang, window_start, window_end, pr['html_url'])
+                    )
+                    self.conn.execute(
+                        "INSERT OR REPLACE INTO search_items (pr_url, data) VALUES (?, ?)",
+                        (pr['html_url'], json.dumps(compact_search_item(pr), ensure_ascii=False))
+                    )
+
+    def window_items(self, terms, lang, window_start, window_end):
+        """Union of the cached PRs of the given terms in one window, as search items"""
+        if not terms:
+            return []
+        placeholders = ",".join("?" for _ in terms)
+        rows = self.conn.execute(
+            f"SELECT DISTINCT i.data FROM term_window_prs p JOIN search_items i ON i.pr_url = p.pr_url "
+            f"WHERE p.lang = ? AND p.window_start = ? AND p.window_end = ? AND p.term IN ({placeholders}) "
+            f"ORDER BY p.pr_url",
+            [lang, window_start, window_end, *terms]
+        )
+        return [json.loads(row[0]) for row in rows]
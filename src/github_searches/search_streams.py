@@ -0,0 +1,99 @@
+import queue
+import threading
+from logging import ERROR
+
+from src.github_searches.event_log import log_event
+
+# Windows a stream may run ahead of the slowest language
+DEFAULT_LOOKAHEAD = 2
+
+_DONE = object()
+
+class _StreamError:
+    """A stream stopped early: its exception, handed to the consumer instead of a window"""
+
+    def __init__(self, error):
+        self.error = error
+
+class LanguageStreams:
+    """
+    One concurrent search stream per language, all sharing the quota scheduler
+    of the paginator, so adding a language adds its share of search calls
+    instead of another sequential pass over every window.
+
+    Iterating yields (lang, start, end, items, window_stats) taking one window
+    from each language in turn. A stream blocks once it is `lookahead` windows
+    ahead of the consumer, so a fast language cannot spend the search quota of
+    the others: every language gets a window in each round.
+
+    search(lang, start, end, stats, cache) runs one window (pr_search.search_window
+    bound to a session); cache_factory opens one cache per stream, as sqlite
+    connections are not shared between threads.
+    """
+
+    def __init__(self, search, languages, windows, cache_factory=None, lookahead=DEFAULT_LOOKAHEAD):
+        self.search = search
+        self.languages = list(languages)
+        self.windows = windows
+        self.cache_factory = cache_factory
+        self.queues = {lang: queue.Queue(maxsize=lookahead) for lang in self.languages}
+        self.failed = {}
+        self._stop = threading.Event()
+        self._threads = []
+
+    def _put(self, lang, item):
+        while not self._stop.is_set():
+            try:
+                self.queues[lang].put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _run(self, lang):
+        cache = self.cache_factory() if self.cache_factory else None
+        try:
+            log_event("search.language", f"\n🔎 Searching PRs in {lang} projects...\n", lang=lang)
+            for start, end in self.windows():
+                if self._stop.is_set():
+                    return
+                log_event("search.window", f"📅 [{lang}] Period: {start.strftime('%Y-%m-%d')} to {end.strftime('%Y-%m-%d')}",
+                          lang=lang, start=start.strftime('%Y-%m-%d'), end=end.strftime('%Y-%m-%d'))
+                window_stats = {'total_found': 0, 'cached_term_windows': 0, 'errors': 0}
+                items = self.search(lang, start, end, window_stats, cache)
+                if not self._put(lang, (lang, start, end, items, window_stats)):
+                    return
+        except Exception as e:
+            self._put(lang, _StreamError(e))
+        finally:
+            if cache is not None:
+                cache.close()
+            self._put(lang, _DONE)
+
+    def __iter__(self):
+        self._threads = [
+            threading.Thread(target=self._run, args=(lang,), name=f"search-{lang}", daemon=True)
+            for lang in self.languages
+        ]
+        for thread in self._threads:
+            thread.start()
+
+        active = list(self.languages)
+        try:
+            while active:
+                for lang in list(active):
+                    item = self.queues[lang].get()
+                    if item is _DONE:
+                        active.remove(lang)
+                    elif isinstance(item, _StreamError):
+                        self.failed[lang] = str(item.error)
+                        log_event("search.error", f"❌ Search stream for {lang} stopped: {item.error}", ERROR,
+                                  lang=lang)
+                    else:
+                        yield item
+        finally:
+            self.close()
+
+    def close(self):
+        """Stop the streams; a window already being searched is finished and dropped"""
+        self._stop.set()
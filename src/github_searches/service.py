@@ -0,0 +1,454 @@
+import argparse
+import http.client
+import json
+import os
+import socket
+import socketserver
+import sqlite3
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src.auth.get_token import get_github_token
+from src.github_searches.pr_search import (
+    create_session_with_retries,
+    search_window,
+    match_pr_terms,
+    enrich_candidate,
+    save_final_results
+)
+from src.github_searches.filter_search import GitHubTestAnalyzer
+from src.github_searches.keyword_filter import RepositoryKeywordScanner
+from src.github_searches.metadata_filter import RepositoryMetadataPrefilter, repo_name_from_api_url
+from src.github_searches.search_cache import SearchCache
+from src.github_searches.prioritizer import RepoHistory, PriorityScheduler, score_candidate
+from src.github_searches.aggregates import RunAggregates
+from src.github_searches.latency import DEFAULT_TRACKER
+from src.github_searches.event_log import log_event, subscribe, unsubscribe
+
+DEFAULT_DB_PATH = "data_repos/service.db"
+DEFAULT_JOB_OUTPUT_DIR = "data_repos/jobs"
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+# Seconds stop() waits for the running job before leaving it to be queued again
+STOP_TIMEOUT = 10
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    params TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    progress TEXT,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at);
+CREATE TABLE IF NOT EXISTS seen_prs (
+    pr_url TEXT PRIMARY KEY
+);
+"""
+
+class JobStore:
+    """
+    Persistent FIFO of service jobs (SQLite). Jobs still 'running' when the
+    service stopped are queued again at startup; their stages resume from
+    their own caches and journals.
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH):
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(db_path, timeout=60, isolation_level=None, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self.lock = threading.Lock()
+
+    def close(self):
+        self.conn.close()
+
+    def submit(self, kind, params):
+        job_id = uuid.uuid4().hex[:12]
+        with self.lock:
+            self.conn.execute(
+                "INSERT INTO jobs (job_id, kind, params, created_at) VALUES (?, ?, ?, ?)",
+                (job_id, kind, json.dumps(params), time.time())
+            )
+        return job_id
+
+    def requeue_interrupted(self):
+        with self.lock:
+            return self.conn.execute(
+                "UPDATE jobs SET status = 'queued', started_at = NULL WHERE status = 'running'"
+            ).rowcount
+
+    def claim(self):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT * FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+            self.conn.execute(
+                "UPDATE jobs SET status = 'running', started_at = ? WHERE job_id = ?", (time.time(), row['job_id'])
+            )
+        return self._job(row)
+
+    def finish(self, job_id, result, progress):
+        with self.lock:
+            self.conn.execute(
+                "UPDATE jobs SET status = 'done', result = ?, progress = ?, finished_at = ? WHERE job_id = ?",
+                (json.dumps(result), json.dumps(progress), time.time(), job_id)
+            )
+
+    def fail(self, job_id, error, progress):
+        with self.lock:
+            self.conn.execute(
+                "UPDATE jobs SET status = 'failed', error = ?, progress = ?, finished_at = ? WHERE job_id = ?",
+                (error, json.dumps(progress), time.time(), job_id)
+            )
+
+    def get(self, job_id):
+        with self.lock:
+            row = self.conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return self._job(row) if row else None
+
+    def list(self, limit=50):
+        with self.lock:
+            rows = self.conn.execute("SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)).fetchall()
+        return [self._job(row) for row in rows]
+
+    def seen_prs(self):
+        with self.lock:
+            return {row[0] for row in self.conn.execute("SELECT pr_url FROM seen_prs")}
+
+    def add_seen(self, pr_urls):
+        with self.lock:
+            self.conn.executemany("INSERT OR IGNORE INTO seen_prs (pr_url) VALUES (?)", [(url,) for url in pr_urls])
+
+    @staticmethod
+    def _job(row):
+        job = dict(row)
+        for field in ("params", "progress", "result"):
+            job[field] = json.loads(job[field]) if job[field] else None
+        return job
+
+class ScraperService:
+    """
+    Long-running scraper: one job at a time from the JobStore, with everything
+    that is expensive to build kept warm between jobs - the HTTP session and its
+    connection pool, latency/quota state, the metadata prefilter and search
+    cache, the analyzer with its circuit breakers, and the seen-PR index.
+
+    Job kinds:
+    - crawl_window: {lang, start, end, output?} search one window and enrich its candidates
+    - analyze_dataset: {input, output?, resume?} content analysis of a search output
+    - scan_repos: {repos | input, output?} keyword scan of a repository list
+    """
+
+    def __init__(self, headers, db_path=DEFAULT_DB_PATH, output_dir=DEFAULT_JOB_OUTPUT_DIR,
+                 metadata_prefilter=True, use_search_cache=True):
+        self.headers = headers
+        self.store = JobStore(db_path)
+        self.output_dir = output_dir
+        self.session = create_session_with_retries()
+        self.prefilter = RepositoryMetadataPrefilter(headers) if metadata_prefilter else None
+        self.search_cache = SearchCache() if use_search_cache else None
+        self.history = RepoHistory.load()
+        self.analyzer = GitHubTestAnalyzer(headers=headers)
+        self.scanner = RepositoryKeywordScanner(headers, session=self.session)
+        self.seen_pr_urls = self.store.seen_prs()
+
+        self.handlers = {
+            "crawl_window": self.crawl_window,
+            "analyze_dataset": self.analyze_dataset,
+            "scan_repos": self.scan_repos,
+        }
+        self.progress = {}
+        self._job_threads = {}
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._worker = None
+        os.makedirs(output_dir, exist_ok=True)
+
+    def submit(self, kind, params):
+        if kind not in self.handlers:
+            raise ValueError(f"unknown job kind '{kind}' (expected one of {sorted(self.handlers)})")
+        job_id = self.store.submit(kind, params or {})
+        self._wakeup.set()
+        return job_id
+
+    def job(self, job_id):
+        job = self.store.get(job_id)
+        if job is not None and job['status'] == 'running' and job_id in self.progress:
+            job['progress'] = self._progress_snapshot(job_id)
+        return job
+
+    def status(self):
+        return {
+            "seen_prs": len(self.seen_pr_urls),
+            "latency": DEFAULT_TRACKER.summary(),
+            "circuit_breakers": self.analyzer.breakers.summary(),
+            "jobs": Counter(job['status'] for job in self.store.list(limit=1000)),
+        }
+
+    # Progress: every event logged from the job's thread is counted against the job
+    def _on_event(self, record):
+        progress = self.progress.get(self._job_threads.get(record.thread))
+        if progress is None:
+            return
+        progress['events'][record.event] += 1
+        progress['last_message'] = record.getMessage().strip()
+        progress['updated_at'] = record.created
+
+    def _progress_snapshot(self, job_id):
+        progress = self.progress.get(job_id, {})
+        return {**progress, 'events': dict(progress.get('events', {}))}
+
+    def start(self):
+        requeued = self.store.requeue_interrupted()
+        if requeued:
+            print(f"🔁 {requeued} interrupted jobs queued again")
+        subscribe(self._on_event)
+        self._worker = threading.Thread(target=self._run, name="service-worker", daemon=True)
+        self._worker.start()
+
+    def stop(self, timeout=STOP_TIMEOUT):
+        self._stopping.set()
+        self._wakeup.set()
+        unsubscribe(self._on_event)
+        if self._worker is not None:
+            self._worker.join(timeout)
+            if self._worker.is_alive():
+                # A long job is not waited for: it stays 'running' in the store and is queued
+                # again on the next start. Nothing is closed under it (it would record a failure);
+                # the worker is a daemon thread and ends with the process.
+                return
+        self.analyzer.close()
+        self.store.close()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            job = self.store.claim()
+            if job is None:
+                self._wakeup.wait(timeout=5)
+                self._wakeup.clear()
+                continue
+            self._run_job(job)
+
+    def _run_job(self, job):
+        job_id = job['job_id']
+        self.progress[job_id] = {'events': Counter(), 'last_message': None, 'updated_at': None}
+        self._job_threads[threading.get_ident()] = job_id
+        print(f"▶️ Job {job_id}: {job['kind']} {job['params']}")
+        try:
+            result = self.handlers[job['kind']](job_id, job['params'])
+            self.store.finish(job_id, result, self._progress_snapshot(job_id))
+            print(f"✅ Job {job_id} done")
+        except Exception as e:
+            self.store.fail(job_id, f"{type(e).__name__}: {e}", self._progress_snapshot(job_id))
+            print(f"❌ Job {job_id} failed: {e}")
+        finally:
+            self._job_threads.pop(threading.get_ident(), None)
+            self.progress.pop(job_id, None)
+
+    def _output_path(self, job_id, params, suffix):
+        return params.get('output') or os.path.join(self.output_dir, f"{job_id}-{suffix}.json")
+
+    def crawl_window(self, job_id, params):
+        start = datetime.strptime(params['start'], '%Y-%m-%d')
+        end = datetime.strptime(params['end'], '%Y-%m-%d')
+        lang = params['lang']
+        stats = {'total_found': 0, 'cached_term_windows': 0, 'processed': 0, 'term_matches': 0,
+                 'dropped_by_metadata': 0, 'with_terms': 0, 'with_js_test_files': 0,
+                 'matching_all_criteria': 0, 'errors': 0}
+        collected_prs = []
+        aggregates = RunAggregates()
+        scheduler = PriorityScheduler()
+
+        items, _ = search_window(self.session, self.headers, lang, start, end, stats, cache=self.search_cache)
+        candidates = [pr for pr in items if pr['html_url'] not in self.seen_pr_urls and match_pr_terms(pr)]
+        stats['processed'] = len(items)
+        stats['term_matches'] = len(candidates)
+
+        allowed_repos = None
+        if self.prefilter:
+            allowed_repos, _ = self.prefilter.filter_repos(
+                sorted({repo_name_from_api_url(pr['repository_url']) for pr in candidates})
+            )
+        for pr in candidates:
+            repo_name = repo_name_from_api_url(pr['repository_url'])
+            if allowed_repos is not None and repo_name not in allowed_repos:
+                stats['dropped_by_metadata'] += 1
+                continue
+            metadata = self.prefilter.cached_metadata(repo_name) if self.prefilter else None
+            scheduler.push(pr, score_candidate(pr, repo_name, self.history, metadata))
+
+        newly_seen = set()
+        for pr in scheduler.drain():
+            enrich_candidate(pr, self.session, self.headers, stats, collected_prs, newly_seen, aggregates)
+        self.seen_pr_urls |= newly_seen
+        self.store.add_seen(newly_seen)
+
+        output = self._output_path(job_id, params, "prs")
+        save_final_results(collected_prs, stats, output, aggregates=aggregates)
+        return {'output': output, 'statistics': stats}
+
+    def analyze_dataset(self, job_id, params):
+        output = self._output_path(job_id, params, "matching_projects")
+        stats = self.analyzer.analyze_and_save_matching_projects(
+            params['input'], output, resume=params.get('resume', True)
+        )
+        return {'output': output, 'statistics': stats}
+
+    def scan_repos(self, job_id, params):
+        repos = params.get('repos')
+        if repos is None:
+            with open(params['input'], 'r', encoding='utf-8') as f:
+                repos = json.load(f)
+            if isinstance(repos, dict):
+                repos = repos.get('repositorios') or repos.get('repositories', [])
+        repo_names = ["/".join(repo.rstrip("/").split("/")[-2:]) for repo in repos]
+        passing, reports = self.scanner.filter_repos(repo_names)
+
+        output = self._output_path(job_id, params, "repos")
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump({'metadata': {'scanned': len(repo_names), 'passing': len(passing)},
+                       'repositories': passing, 'reports': reports}, f, indent=2, ensure_ascii=False)
+        return {'output': output, 'scanned': len(repo_names), 'passing': len(passing)}
+
+class ServiceRequestHandler(BaseHTTPRequestHandler):
+    """
+    POST /jobs {"kind": ..., "params": {...}} -> {"job_id": ...}
+    GET  /jobs, GET /jobs/<id>, GET /status
+    """
+
+    def _send(self, status, data):
+        body = json.dumps(data, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        service = self.server.service
+        parts = [part for part in self.path.split("?")[0].split("/") if part]
+        if parts == ["status"]:
+            return self._send(200, service.status())
+        if parts == ["jobs"]:
+            return self._send(200, service.store.list())
+        if len(parts) == 2 and parts[0] == "jobs":
+            job = service.job(parts[1])
+            return self._send(200, job) if job else self._send(404, {"error": "job not found"})
+        self._send(404, {"error": "not found"})
+
+    def do_POST(self):
+        if self.path.rstrip("/") != "/jobs":
+            return self._send(404, {"error": "not found"})
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            job_id = self.server.service.submit(request.get("kind"), request.get("params"))
+        except (ValueError, AttributeError) as e:
+            return self._send(400, {"error": str(e)})
+        self._send(202, {"job_id": job_id})
+
+    def log_message(self, format, *args):
+        log_event("service.request", format % args)
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def get_request(self):
+        request, _ = super().get_request()
+        # BaseHTTPRequestHandler expects a (host, port) client address
+        return request, ("local", 0)
+
+def serve(service, host=DEFAULT_HOST, port=DEFAULT_PORT, socket_path=None):
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        server = UnixHTTPServer(socket_path, ServiceRequestHandler)
+        where = socket_path
+    else:
+        server = ThreadingHTTPServer((host, port), ServiceRequestHandler)
+        where = f"http://{host}:{port}"
+    server.service = service
+
+    service.start()
+    print(f"🛰️ Scraper service listening on {where}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 Stopping service (the running job is queued again on the next start)")
+    finally:
+        server.server_close()
+        service.stop()
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, socket_path):
+        super().__init__("localhost")
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.socket_path)
+
+def call_service(method, path, data=None, host=DEFAULT_HOST, port=DEFAULT_PORT, socket_path=None):
+    connection = UnixHTTPConnection(socket_path) if socket_path else http.client.HTTPConnection(host, port)
+    try:
+        body = json.dumps(data) if data is not None else None
+        connection.request(method, path, body=body, headers={"Content-Type": "application/json"})
+        response = connection.getresponse()
+        return response.status, json.loads(response.read() or b"null")
+    finally:
+        connection.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Long-running scraper service with a persistent job queue")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--socket", help="Listen on / talk to this Unix socket instead of TCP")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = subparsers.add_parser("serve", help="Run the service")
+    serve_parser.add_argument("--db", default=DEFAULT_DB_PATH)
+    serve_parser.add_argument("--output-dir", default=DEFAULT_JOB_OUTPUT_DIR)
+    serve_parser.add_argument("--no-metadata-prefilter", action="store_true")
+
+    submit_parser = subparsers.add_parser("submit", help="Queue a job")
+    submit_parser.add_argument("kind", choices=["crawl_window", "analyze_dataset", "scan_repos"])
+    submit_parser.add_argument("params", help='Job parameters as JSON, e.g. \'{"lang": "JavaScript", ...}\'')
+
+    status_parser = subparsers.add_parser("status", help="Show one job, or the service and its recent jobs")
+    status_parser.add_argument("job_id", nargs="?")
+
+    args = parser.parse_args(argv)
+    target = {"host": args.host, "port": args.port, "socket_path": args.socket}
+
+    if args.command == "serve":
+        headers = {
+            "Accept": "application/vnd.github.v3+json",
+            "Authorization": f"token {get_github_token()}"
+        }
+        service = ScraperService(headers, db_path=args.db, output_dir=args.output_dir,
+                                 metadata_prefilter=not args.no_metadata_prefilter)
+        serve(service, **target)
+    elif args.command == "submit":
+        status, data = call_service("POST", "/jobs", {"kind": args.kind, "params": json.loads(args.params)}, **target)
+        print(json.dumps(data, indent=2))
+    else:
+        path = f"/jobs/{args.job_id}" if args.job_id else "/status"
+        status, data = call_service("GET", path, **target)
+        print(json.dumps(data, indent=2, ensure_ascii=False, default=str))
+        if not args.job_id:
+            print(json.dumps(call_service("GET", "/jobs", **target)[1], indent=2, ensure_ascii=False))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,396 @@
+import argparse
+import json
+import os
+import socket
+import time
+from datetime import datetime
+
+from config.filters import LANGUAGES
+from src.auth.get_token import get_github_token
+from src.github_searches.pr_search import (
+    create_session_with_retries,
+    search_windows,
+    search_window,
+    match_pr_terms,
+    process_pr,
+    save_final_results
+)
+from src.github_searches.filter_search import GitHubTestAnalyzer
+from src.github_searches.work_queue import WorkQueue
+from src.github_searches.metadata_filter import RepositoryMetadataPrefilter, repo_name_from_api_url
+from src.github_searches.search_cache import SearchCache, compact_search_item
+from src.github_searches.prioritizer import RepoHistory, score_candidate
+from src.github_searches.aggregates import RunAggregates
+from src.github_searches.event_log import log_event
+
+UNIT_SEARCH = "search_window"
+UNIT_ENRICH = "pr_enrichment"
+UNIT_ANALYSIS = "content_analysis"
+
+# Later stages are claimed first so the pipeline drains instead of piling up
+# search results that nobody is enriching yet
+UNIT_PRIORITY = {
+    UNIT_SEARCH: 0,
+    UNIT_ENRICH: 1,
+    UNIT_ANALYSIS: 2,
+}
+
+# A unit's priority is stage * STAGE_PRIORITY_SPAN + its best candidate's score * 100,
+# so the stage order above always wins and ties within a stage go to the likeliest matches
+STAGE_PRIORITY_SPAN = 1_000_000
+
+DEFAULT_DB_PATH = "data_repos/crawl_state.db"
+
+# Times a PR whose analysis failed for a transient reason goes back to the queue before
+# the failure is stored as its result
+MAX_ANALYSIS_RETRIES = 2
+
+class LeaseLost(Exception):
+    """Raised when another worker took over a unit whose lease expired"""
+
+class SearchWindowIncomplete(Exception):
+    """Raised when a page of a search window failed, so the unit is retried instead of completed"""
+
+def _batches(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+def _unit_priority(kind, score=0.0):
+    return UNIT_PRIORITY[kind] * STAGE_PRIORITY_SPAN + min(int(score * 100), STAGE_PRIORITY_SPAN - 1)
+
+def _make_units(kind, items, batch_size, score=None):
+    """Batch items into units; with a score function, best candidates share the first batches"""
+    if score:
+        items = sorted(items, key=score, reverse=True)
+    units = []
+    for batch in _batches(items, batch_size):
+        # The first key of a batch is unique because keys are only fanned out once
+        first_key = batch[0]['html_url'] if kind == UNIT_ENRICH else batch[0]['pr_url']
+        units.append({
+            'unit_id': f"{kind}:{first_key}",
+            'kind': kind,
+            'priority': _unit_priority(kind, score(batch[0]) if score else 0.0),
+            'payload': {'items': batch}
+        })
+    return units
+
+def plan_crawl(db_path=DEFAULT_DB_PATH):
+    """Enqueue one search unit per language and date window (already planned windows are kept)"""
+    queue = WorkQueue(db_path)
+    units = [
+        {
+            'unit_id': f"{UNIT_SEARCH}:{lang}:{start.strftime('%Y-%m-%d')}:{end.strftime('%Y-%m-%d')}",
+            'kind': UNIT_SEARCH,
+            'priority': _unit_priority(UNIT_SEARCH),
+            'payload': {
+                'lang': lang,
+                'start': start.strftime('%Y-%m-%d'),
+                'end': end.strftime('%Y-%m-%d')
+            }
+        }
+        for lang in LANGUAGES
+        for start, end in search_windows()
+    ]
+    inserted = queue.enqueue(units)
+    print(f"🗂️ Planned {inserted} new search windows ({len(units)} total) in {db_path}")
+    queue.close()
+    return inserted
+
+def run_search_unit(queue, unit, session, headers, batch_size, prefilter=None, search_cache=None,
+                    history=None):
+    payload = unit['payload']
+    stats = {'total_found': 0, 'errors': 0}
+    start = datetime.strptime(payload['start'], '%Y-%m-%d')
+    end = datetime.strptime(payload['end'], '%Y-%m-%d')
+
+    log_event("search.window", f"📅 [{payload['lang']}] Period: {payload['start']} to {payload['end']}",
+              lang=payload['lang'], start=payload['start'], end=payload['end'])
+    items, failed = search_window(session, headers, payload['lang'], start, end, stats, cache=search_cache)
+    if failed:
+        raise SearchWindowIncomplete(f"a search page of {payload['lang']} {payload['start']}..{payload['end']} failed")
+
+    # Only PRs with a term in title/body cost further calls, so only those are fanned out
+    candidates = [compact_search_item(pr) for pr in items if match_pr_terms(pr)]
+    counters = {
+        'total_found': stats['total_found'],
+        'processed': len(items),
+        'term_matches': len(candidates),
+        'errors': stats['errors'],
+    }
+
+    if prefilter:
+        allowed_repos, _ = prefilter.filter_repos(
+            sorted({repo_name_from_api_url(pr['repository_url']) for pr in candidates})
+        )
+        kept = [pr for pr in candidates if repo_name_from_api_url(pr['repository_url']) in allowed_repos]
+        counters['dropped_by_metadata'] = len(candidates) - len(kept)
+        candidates = kept
+
+    scores = {}
+    for pr in candidates:
+        repo_name = repo_name_from_api_url(pr['repository_url'])
+        metadata = prefilter.cached_metadata(repo_name) if prefilter else None
+        scores[pr['html_url']] = score_candidate(pr, repo_name, history, metadata)
+
+    fanout = (
+        UNIT_ENRICH,
+        [(pr['html_url'], pr) for pr in candidates],
+        lambda new_items: _make_units(UNIT_ENRICH, new_items, batch_size,
+                                      score=lambda pr: scores[pr['html_url']])
+    )
+    return queue.complete(unit, counters=counters, fanout=fanout)
+
+def run_enrich_unit(queue, unit, session, headers, batch_size):
+    counters = {'with_terms': 0, 'with_js_test_files': 0, 'matching_all_criteria': 0}
+    matched = []
+    aggregates = RunAggregates()
+
+    for pr in unit['payload']['items']:
+        processed_pr = process_pr(pr, session, headers)
+
+        if processed_pr:
+            counters['with_terms'] += 1
+
+            if processed_pr['js_test_files']:
+                counters['with_js_test_files'] += 1
+                counters['matching_all_criteria'] += 1
+                matched.append(processed_pr)
+                aggregates.add_pr(processed_pr)
+                log_event("pr.match", f"✅ Match found: {pr['html_url']}", pr_url=pr['html_url'],
+                          test_files=len(processed_pr['js_test_files']), terms=processed_pr['matched_terms'])
+
+        if not queue.renew(unit):
+            raise LeaseLost(unit['unit_id'])
+        time.sleep(0.2)
+
+    fanout = (
+        UNIT_ANALYSIS,
+        [(pr['pr_url'], pr) for pr in matched],
+        lambda new_items: _make_units(UNIT_ANALYSIS, new_items, batch_size,
+                                      score=lambda pr: score_candidate(pr, pr['repo_name']))
+    )
+    results = [("pr", pr['pr_url'], pr) for pr in matched]
+    # Each unit stores its own aggregates once; export merges them instead of rescanning
+    results.append(("search_aggregates", unit['unit_id'], aggregates.to_dict()))
+    return queue.complete(unit, results=results, counters=counters, fanout=fanout)
+
+def is_definitive_analysis(pr_result):
+    """A success, or a failure that retrying won't change (repository breaker open: 404/410/451/403)"""
+    return pr_result['analysis_success'] or (pr_result.get('error_message') or '').startswith('circuit open')
+
+def _retry_units(items, batch_size, retry):
+    units = _make_units(UNIT_ANALYSIS, items, batch_size)
+    for unit in units:
+        unit['unit_id'] = f"{UNIT_ANALYSIS}:retry{retry}:{unit['payload']['items'][0]['pr_url']}"
+        unit['payload']['retry'] = retry
+    return units
+
+def run_analysis_unit(queue, unit, analyzer):
+    results = []
+    aggregates = RunAggregates()
+    retry = unit['payload'].get('retry', 0)
+    retry_items = []
+
+    for pr_data in unit['payload']['items']:
+        pr_result = analyzer.analyze_pr(pr_data)
+        if not is_definitive_analysis(pr_result) and retry < MAX_ANALYSIS_RETRIES:
+            # Results are insert-once: a transient error is queued again instead of becoming the answer
+            retry_items.append(pr_data)
+        else:
+            results.append(("analysis", pr_data['pr_url'], pr_result))
+
+            matching = pr_result['analysis_success'] and pr_result['files_with_test_and_async'] > 0
+            aggregates.add_analysis(pr_result['analysis_success'],
+                                    analyzer.build_matching_project(pr_data, pr_result) if matching else None)
+
+        if not queue.renew(unit):
+            raise LeaseLost(unit['unit_id'])
+        time.sleep(0.1)
+
+    counters = {'analyzed': len(results), 'analysis_retries': len(retry_items)}
+    results.append(("analysis_aggregates", unit['unit_id'], aggregates.to_dict()))
+    fanout = None
+    if retry_items:
+        fanout = (
+            f"analysis_retry_{retry + 1}",
+            [(pr['pr_url'], pr) for pr in retry_items],
+            lambda new_items: _retry_units(new_items, len(unit['payload']['items']), retry + 1)
+        )
+    return queue.complete(unit, results=results, counters=counters, fanout=fanout)
+
+def run_worker(headers, db_path=DEFAULT_DB_PATH, worker_id=None, lease_seconds=900,
+               batch_size=25, kinds=None, max_attempts=3, poll_interval=30, metadata_prefilter=True,
+               use_search_cache=True):
+    """
+    Claim and run work units until the queue has nothing left:
+    - search_window units run one search window and fan out PR enrichment batches
+    - pr_enrichment units run process_pr and fan out content-analysis batches
+    - content_analysis units run GitHubTestAnalyzer.analyze_pr
+
+    Start as many workers as the tokens allow, on one or several hosts, against the same db_path.
+    Within a stage, units holding the highest-scored candidates are claimed first.
+    """
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+    queue = WorkQueue(db_path)
+    session = create_session_with_retries()
+    analyzer = GitHubTestAnalyzer(headers=headers)
+    prefilter = RepositoryMetadataPrefilter(headers) if metadata_prefilter else None
+    search_cache = SearchCache() if use_search_cache else None
+    history = RepoHistory.load()
+    completed = 0
+
+    print(f"👷 Worker {worker_id} started on {db_path}")
+
+    try:
+        while True:
+            unit = queue.claim(worker_id, lease_seconds=lease_seconds, kinds=kinds, max_attempts=max_attempts)
+
+            if unit is None:
+                if not queue.has_open_units(max_attempts):
+                    break
+                # Other workers still hold leases that may expire or fan out new units
+                time.sleep(poll_interval)
+                continue
+
+            print(f"\n🔒 [{worker_id}] Claimed {unit['unit_id']} (attempt {unit['attempt']})")
+
+            try:
+                if unit['kind'] == UNIT_SEARCH:
+                    accepted = run_search_unit(queue, unit, session, headers, batch_size, prefilter, search_cache,
+                                               history)
+                elif unit['kind'] == UNIT_ENRICH:
+                    accepted = run_enrich_unit(queue, unit, session, headers, batch_size)
+                elif unit['kind'] == UNIT_ANALYSIS:
+                    accepted = run_analysis_unit(queue, unit, analyzer)
+                else:
+                    raise ValueError(f"Unknown unit kind: {unit['kind']}")
+            except LeaseLost:
+                print(f"⚠️ Lease lost on {unit['unit_id']}, discarding its results")
+                continue
+            except Exception as e:
+                print(f"❌ Error on {unit['unit_id']}: {str(e)}")
+                queue.fail(unit, e, max_attempts=max_attempts)
+                continue
+
+            if accepted:
+                completed += 1
+            else:
+                print(f"⚠️ Lease lost on {unit['unit_id']}, discarding its results")
+
+    except KeyboardInterrupt:
+        # Leases of the interrupted unit expire and are picked up by another worker
+        print(f"\n🛑 Worker {worker_id} interrupted")
+    finally:
+        queue.close()
+
+    print(f"🏁 Worker {worker_id} finished {completed} units")
+    return completed
+
+def export_results(db_path=DEFAULT_DB_PATH,
+                   prs_output="data_repos/race_condition_prs.json",
+                   analysis_output="data_repos/filtered_race_condition_prs.json"):
+    """Merge the shard results into the usual search and analysis JSON files"""
+    queue = WorkQueue(db_path)
+    counters = queue.counters()
+
+    collected_prs = [pr for _, pr in queue.results("pr")]
+    stats = {
+        name: counters.get(name, 0)
+        for name in ['total_found', 'processed', 'term_matches', 'dropped_by_metadata', 'with_terms', 'with_js_test_files',
+                     'matching_all_criteria', 'errors']
+    }
+    search_aggregates = RunAggregates()
+    for _, unit_aggregates in queue.results("search_aggregates"):
+        search_aggregates.merge(RunAggregates.from_dict(unit_aggregates))
+    save_final_results(collected_prs, stats, output_file=prs_output, aggregates=search_aggregates)
+
+    analyzer = GitHubTestAnalyzer(headers={})
+    prs_by_url = {pr['pr_url']: pr for pr in collected_prs}
+    matching_projects = []
+    analysis_stats = {
+        'total_prs_analyzed': 0,
+        'successful_analyses': 0,
+        'prs_with_matching_files': 0,
+        'total_files_analyzed': 0,
+        'total_matching_files': 0,
+        'errors': []
+    }
+
+    for pr_url, pr_result in queue.results("analysis"):
+        analysis_stats['total_prs_analyzed'] += 1
+
+        if not pr_result['analysis_success']:
+            analysis_stats['errors'].append({'pr_url': pr_url, 'error': pr_result.get('error_message')})
+            continue
+
+        analysis_stats['successful_analyses'] += 1
+        analysis_stats['total_files_analyzed'] += pr_result['total_files']
+        analysis_stats['total_matching_files'] += pr_result['files_with_test_and_async']
+
+        if pr_result['files_with_test_and_async'] > 0 and pr_url in prs_by_url:
+            analysis_stats['prs_with_matching_files'] += 1
+            matching_projects.append(analyzer.build_matching_project(prs_by_url[pr_url], pr_result))
+
+    analysis_stats['success_rate'] = (analysis_stats['successful_analyses'] / analysis_stats['total_prs_analyzed'] * 100) if analysis_stats['total_prs_analyzed'] > 0 else 0
+    analysis_stats['match_rate'] = (analysis_stats['prs_with_matching_files'] / analysis_stats['successful_analyses'] * 100) if analysis_stats['successful_analyses'] > 0 else 0
+    analysis_stats['unique_repositories'] = len(set(p['repo_name'] for p in matching_projects))
+
+    analysis_aggregates = RunAggregates()
+    for _, unit_aggregates in queue.results("analysis_aggregates"):
+        analysis_aggregates.merge(RunAggregates.from_dict(unit_aggregates))
+
+    with open(analysis_output, 'w', encoding='utf-8') as f:
+        json.dump({
+            'metadata': {
+                'analysis_date': time.strftime('%Y-%m-%d %H:%M:%S'),
+                'input_file': db_path,
+                'search_criteria': {
+                    'test_keywords': analyzer.test_keywords,
+                    'async_keywords': analyzer.async_keywords,
+                    'requirement': 'Files must contain at least one test keyword AND one async keyword'
+                },
+                'statistics': analysis_stats,
+                'aggregates': analysis_aggregates.to_dict()
+            },
+            'matching_projects': matching_projects
+        }, f, indent=2, ensure_ascii=False)
+
+    print(f"💾 Analysis results saved to {analysis_output} ({len(matching_projects)} matching PRs)")
+    queue.close()
+    return analysis_stats
+
+def print_status(db_path=DEFAULT_DB_PATH):
+    queue = WorkQueue(db_path)
+    for kind, statuses in sorted(queue.status_summary().items()):
+        print(f"{kind}: " + ", ".join(f"{status}={count}" for status, count in sorted(statuses.items())))
+    print(f"counters: {queue.counters()}")
+    queue.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sharded PR crawl over a shared SQLite work queue")
+    parser.add_argument("command", choices=["plan", "work", "status", "export"])
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="Shared state database")
+    parser.add_argument("--worker-id", default=None)
+    parser.add_argument("--lease-seconds", type=int, default=900)
+    parser.add_argument("--batch-size", type=int, default=25)
+    parser.add_argument("--kinds", nargs="*", choices=[UNIT_SEARCH, UNIT_ENRICH, UNIT_ANALYSIS],
+                        help="Only claim these unit kinds")
+    args = parser.parse_args(argv)
+
+    if args.command == "plan":
+        plan_crawl(args.db)
+    elif args.command == "work":
+        token = get_github_token()
+        headers = {
+            "Accept": "application/vnd.github.v3+json",
+            "Authorization": f"token {token}"
+        }
+        run_worker(headers, args.db, worker_id=args.worker_id, lease_seconds=args.lease_seconds,
+                   batch_size=args.batch_size, kinds=args.kinds)
+    elif args.command == "status":
+        print_status(args.db)
+    else:
+        export_results(args.db)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import threading
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """
+    Coalesces identical calls that are in flight at the same moment: the first
+    caller of a key runs the function, callers arriving before it returns wait
+    and get the same result (or exception). Nothing is kept once the call ends,
+    so this only closes the gap before a response reaches any persistent cache.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.flights = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        with self.lock:
+            self.calls += 1
+            flight = self.flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self.flights[key] = _Flight()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = fn()
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.flights[key]
+            flight.done.set()
+
+    def stats(self):
+        with self.lock:
+            return {'calls': self.calls, 'coalesced': self.coalesced}
+
+def shared_json(response):
+    """response.json(), parsed once per response even when several callers share it"""
+    parsed = getattr(response, "_shared_json", None)
+    if parsed is None:
+        parsed = response._shared_json = response.json()
+    return parsed
+
+def request_flight_key(url, headers=None, params=None):
+    """Identity of a GET for coalescing: URL, query params and request headers (auth, media type)"""
+    if isinstance(params, dict):
+        params = tuple(sorted(params.items()))
+    return (url, params, tuple(sorted((headers or {}).items())))
+
+# Shared by every HTTP caller of the process (search pages, PR details, files, contents)
+DEFAULT_FLIGHTS = SingleFlight()
@@ -0,0 +1,238 @@
+import json
+import sqlite3
+import time
+import uuid
+
+DEFAULT_PRIORITY = 0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS work_units (
+    unit_id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_token TEXT,
+    lease_expires REAL,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    completed_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_work_units_claim ON work_units (status, priority, created_at);
+CREATE TABLE IF NOT EXISTS results (
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    unit_id TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (kind, key)
+);
+CREATE TABLE IF NOT EXISTS seen_keys (
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    PRIMARY KEY (kind, key)
+);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+class WorkQueue:
+    """
+    SQLite-backed queue of leased work units shared by several crawl workers.
+
+    - A unit is claimed with a time-limited lease; if the worker dies the lease
+      expires and another worker picks the unit up again
+    - Completion is only accepted from the current lease holder, and results are
+      written in the same transaction, so each unit's results land exactly once
+    - Results are keyed (e.g. by pr_url), so overlapping units never duplicate rows
+
+    Every worker opens its own WorkQueue on the same database file. Several hosts
+    can share it over a network filesystem only if that filesystem honours SQLite
+    locking; otherwise run the workers on one host.
+    """
+
+    def __init__(self, db_path, timeout=60):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path, timeout=timeout, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def _begin(self):
+        # IMMEDIATE takes the write lock up front so two workers can't claim the same unit
+        self.conn.execute("BEGIN IMMEDIATE")
+
+    def _insert_units(self, units):
+        now = time.time()
+        inserted = 0
+        for unit in units:
+            cursor = self.conn.execute(
+                "INSERT OR IGNORE INTO work_units (unit_id, kind, payload, priority, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (unit['unit_id'], unit['kind'], json.dumps(unit.get('payload', {}), ensure_ascii=False),
+                 unit.get('priority', DEFAULT_PRIORITY), now)
+            )
+            inserted += cursor.rowcount
+        return inserted
+
+    def enqueue(self, units):
+        """Add units ({'unit_id', 'kind', 'payload', 'priority'}); existing unit_ids are kept as they are"""
+        self._begin()
+        try:
+            inserted = self._insert_units(units)
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return inserted
+
+    def claim(self, worker_id, lease_seconds=900, kinds=None, max_attempts=3):
+        """Lease the next available unit (pending or with an expired lease), or return None"""
+        now = time.time()
+        query = (
+            "SELECT unit_id, kind, payload, attempts FROM work_units "
+            "WHERE attempts < ? AND (status = 'pending' OR (status = 'leased' AND lease_expires < ?))"
+        )
+        params = [max_attempts, now]
+        if kinds:
+            query += f" AND kind IN ({','.join('?' for _ in kinds)})"
+            params.extend(kinds)
+        query += " ORDER BY priority DESC, created_at LIMIT 1"
+
+        self._begin()
+        try:
+            # Units whose last lease expired with no attempts left are given up on
+            self.conn.execute(
+                "UPDATE work_units SET status = 'failed', last_error = 'lease expired' "
+                "WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?",
+                (now, max_attempts)
+            )
+            row = self.conn.execute(query, params).fetchone()
+            if row is None:
+                self.conn.execute("COMMIT")
+                return None
+
+            token = uuid.uuid4().hex
+            self.conn.execute(
+                "UPDATE work_units SET status = 'leased', attempts = attempts + 1, lease_owner = ?, "
+                "lease_token = ?, lease_expires = ? WHERE unit_id = ?",
+                (worker_id, token, now + lease_seconds, row['unit_id'])
+            )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+        return {
+            'unit_id': row['unit_id'],
+            'kind': row['kind'],
+            'payload': json.loads(row['payload']),
+            'attempt': row['attempts'] + 1,
+            'lease_token': token,
+            'lease_seconds': lease_seconds
+        }
+
+    def renew(self, unit, lease_seconds=None):
+        """Extend the lease on a unit; returns False if the lease was lost to another worker"""
+        lease_seconds = lease_seconds or unit['lease_seconds']
+        cursor = self.conn.execute(
+            "UPDATE work_units SET lease_expires = ? WHERE unit_id = ? AND lease_token = ? AND status = 'leased'",
+            (time.time() + lease_seconds, unit['unit_id'], unit['lease_token'])
+        )
+        return cursor.rowcount == 1
+
+    def complete(self, unit, results=(), counters=None, fanout=None):
+        """
+        Mark a unit done and store its output atomically.
+
+        Args:
+            unit: The unit returned by claim()
+            results: Iterable of (kind, key, data); rows with an existing (kind, key) are ignored
+            counters: Dict of counter increments
+            fanout: Optional (seen_kind, keyed_items, make_units). Items whose key was already
+                    recorded under seen_kind are dropped and make_units(new_items) returns the
+                    follow-up units to enqueue
+
+        Returns:
+            False if the lease was lost, in which case nothing is written
+        """
+        self._begin()
+        try:
+            row = self.conn.execute(
+                "SELECT status, lease_token FROM work_units WHERE unit_id = ?", (unit['unit_id'],)
+            ).fetchone()
+            if row is None or row['status'] != 'leased' or row['lease_token'] != unit['lease_token']:
+                self.conn.execute("ROLLBACK")
+                return False
+
+            for kind, key, data in results:
+                self.conn.execute(
+                    "INSERT OR IGNORE INTO results (kind, key, unit_id, data) VALUES (?, ?, ?, ?)",
+                    (kind, key, unit['unit_id'], json.dumps(data, ensure_ascii=False))
+                )
+
+            if fanout:
+                seen_kind, keyed_items, make_units = fanout
+                new_items = []
+                for key, item in keyed_items:
+                    cursor = self.conn.execute(
+                        "INSERT OR IGNORE INTO seen_keys (kind, key) VALUES (?, ?)", (seen_kind, key)
+                    )
+                    if cursor.rowcount == 1:
+                        new_items.append(item)
+                if new_items:
+                    self._insert_units(make_units(new_items))
+
+            for name, value in (counters or {}).items():
+                self.conn.execute(
+                    "INSERT INTO counters (name, value) VALUES (?, ?) "
+                    "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                    (name, value)
+                )
+
+            self.conn.execute(
+                "UPDATE work_units SET status = 'done', completed_at = ?, lease_token = NULL WHERE unit_id = ?",
+                (time.time(), unit['unit_id'])
+            )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return True
+
+    def fail(self, unit, error, max_attempts=3):
+        """Release a unit after an error; it is retried until max_attempts, then marked failed"""
+        status = 'pending' if unit['attempt'] < max_attempts else 'failed'
+        self.conn.execute(
+            "UPDATE work_units SET status = ?, last_error = ?, lease_token = NULL, lease_expires = NULL "
+            "WHERE unit_id = ? AND lease_token = ?",
+            (status, str(error), unit['unit_id'], unit['lease_token'])
+        )
+
+    def results(self, kind):
+        """Yield (key, data) for every stored result of a kind"""
+        for row in self.conn.execute("SELECT key, data FROM results WHERE kind = ? ORDER BY key", (kind,)):
+            yield row['key'], json.loads(row['data'])
+
+    def counters(self):
+        return {row['name']: row['value'] for row in self.conn.execute("SELECT name, value FROM counters")}
+
+    def status_summary(self):
+        """Return {kind: {status: count}} for progress reporting"""
+        summary = {}
+        for row in self.conn.execute("SELECT kind, status, COUNT(*) AS n FROM work_units GROUP BY kind, status"):
+            summary.setdefault(row['kind'], {})[row['status']] = row['n']
+        return summary
+
+    def has_open_units(self, max_attempts=3):
+        row = self.conn.execute(
+            "SELECT COUNT(*) FROM work_units WHERE status = 'leased' OR (status = 'pending' AND attempts < ?)",
+            (max_attempts,)
+        ).fetchone()
+        return row[0] > 0
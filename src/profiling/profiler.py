@@ -0,0 +1,242 @@
+import functools
+import importlib
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+
+# (module, attribute path, stage name) wrapped when profiling is enabled.
+# Entries whose module or attribute doesn't exist are skipped.
+DEFAULT_STAGES = [
+    ("requests.sessions", "Session.request", "network"),
+    ("json", "dump", "json_dump"),
+    ("json", "dumps", "json_dump"),
+    ("src.github_searches.pr_search", "search_window", "search_window"),
+    ("src.github_searches.pr_search", "process_pr", "process_pr"),
+    ("src.github_searches.pr_search", "fetch_pr_files", "fetch_pr_files"),
+    ("src.github_searches.filter_search", "GitHubTestAnalyzer.analyze_pr", "analyze_pr"),
+    ("src.github_searches.filter_search", "GitHubTestAnalyzer.scan_file_content", "scan_file_content"),
+    ("src.github_searches.filter_search", "GitHubTestAnalyzer.scan_files_offloaded", "scan_files_offloaded"),
+    ("src.github_searches.content_scan", "ContentScanPool.scan", "cpu_tier_scan"),
+    ("src.github_searches.content_scan", "KeywordStreamMatcher.feed", "keyword_match"),
+    ("awesomeLists.filtraLinks", "GitHubPRAnalyzer.analyze_repository", "analyze_repository"),
+    ("awesomeLists.filtraLinks", "GitHubPRAnalyzer.get_pull_requests", "get_pull_requests"),
+    ("awesomeLists.filtraLinks", "GitHubPRAnalyzer.check_pr_description", "check_pr_description"),
+    ("awesomeLists.filtraLinks", "GitHubPRAnalyzer.analyze_file_content", "analyze_file_content"),
+]
+
+# Leaf functions that mean the thread is blocked, not computing
+WAIT_FUNCTIONS = {"sleep", "recv_into", "recv", "read", "readinto", "select", "poll", "wait", "acquire",
+                  "connect", "do_handshake", "create_connection", "getaddrinfo"}
+
+class StageStats:
+    __slots__ = ("calls", "wall", "cpu", "alloc_bytes")
+
+    def __init__(self):
+        self.calls = 0
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.alloc_bytes = 0
+
+    def to_dict(self):
+        return {
+            "calls": self.calls,
+            "wall_seconds": round(self.wall, 4),
+            "cpu_seconds": round(self.cpu, 4),
+            # Time inside the stage the thread was not on the CPU: network, sleeps, locks
+            "wait_seconds": round(max(self.wall - self.cpu, 0.0), 4),
+            "net_alloc_bytes": self.alloc_bytes,
+        }
+
+class Profiler:
+    """
+    In-process profiler for crawl and analysis runs:
+    - A sampling thread records every thread's stack at `interval` seconds,
+      prefixed with the stage the thread is in, as collapsed stacks
+      (flamegraph.pl / speedscope input)
+    - Instrumented stages record calls, wall time and thread CPU time, so
+      CPU-bound matching and network waits can be told apart
+    - tracemalloc snapshots at start and end give the top-N allocation sites
+    """
+
+    def __init__(self, output_dir="profiles", interval=0.005, top_n=25, stages=None):
+        self.output_dir = os.path.join(output_dir, datetime.now().strftime("%Y%m%d-%H%M%S"))
+        self.interval = interval
+        self.top_n = top_n
+        self.stages = DEFAULT_STAGES if stages is None else stages
+        self.samples = Counter()
+        self.wait_samples = Counter()
+        self.stage_stats = defaultdict(StageStats)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._thread_stages = {}
+        self._patched = []
+        self._stop = threading.Event()
+        self._sampler = None
+        self._start_snapshot = None
+        self._started_tracing = False
+        self._started_at = None
+
+    def _current_stages(self):
+        stack = getattr(self._local, "stages", None)
+        if stack is None:
+            stack = self._local.stages = []
+            self._thread_stages[threading.get_ident()] = stack
+        return stack
+
+    @contextmanager
+    def stage(self, name):
+        """Time a block as a named stage (nested stages are counted in each)"""
+        stages = self._current_stages()
+        stages.append(name)
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        mem_start = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall_start
+            cpu = time.thread_time() - cpu_start
+            mem = (tracemalloc.get_traced_memory()[0] - mem_start) if tracemalloc.is_tracing() else 0
+            stages.pop()
+            with self._lock:
+                stats = self.stage_stats[name]
+                stats.calls += 1
+                stats.wall += wall
+                stats.cpu += cpu
+                stats.alloc_bytes += mem
+
+    def _wrap(self, func, name):
+        profiler = self
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with profiler.stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+
+    def instrument(self):
+        """Wrap the configured stage functions in place (undone by restore())"""
+        for module_name, attr_path, stage_name in self.stages:
+            try:
+                owner = importlib.import_module(module_name)
+            except ImportError:
+                continue
+
+            *parents, attr = attr_path.split(".")
+            try:
+                for parent in parents:
+                    owner = getattr(owner, parent)
+                original = owner.__dict__[attr] if isinstance(owner, type) else getattr(owner, attr)
+            except (AttributeError, KeyError):
+                continue
+
+            setattr(owner, attr, self._wrap(original, stage_name))
+            self._patched.append((owner, attr, original))
+
+    def restore(self):
+        for owner, attr, original in reversed(self._patched):
+            setattr(owner, attr, original)
+        self._patched = []
+
+    def _sample_loop(self):
+        own_ident = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            for ident, frame in frames.items():
+                if ident == own_ident:
+                    continue
+
+                stack = []
+                leaf = frame.f_code.co_name
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                stack.reverse()
+
+                stages = self._thread_stages.get(ident)
+                stage = stages[-1] if stages else "unstaged"
+                key = ";".join([f"stage:{stage}"] + stack)
+                self.samples[key] += 1
+                if leaf in WAIT_FUNCTIONS:
+                    self.wait_samples[stage] += 1
+
+    def start(self):
+        self._started_at = time.perf_counter()
+        # A caller that was already tracing keeps its tracing after stop()
+        self._started_tracing = not tracemalloc.is_tracing()
+        if self._started_tracing:
+            tracemalloc.start(10)
+        self._start_snapshot = tracemalloc.take_snapshot()
+        self.instrument()
+        self._stop.clear()
+        self._sampler = threading.Thread(target=self._sample_loop, name="profiler-sampler", daemon=True)
+        self._sampler.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._sampler:
+            self._sampler.join()
+        self.restore()
+        end_snapshot = tracemalloc.take_snapshot()
+        if self._started_tracing:
+            tracemalloc.stop()
+        self.write_reports(end_snapshot)
+
+    def write_reports(self, end_snapshot):
+        os.makedirs(self.output_dir, exist_ok=True)
+
+        with open(os.path.join(self.output_dir, "cpu.collapsed"), "w", encoding="utf-8") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+        stage_samples = Counter()
+        for stack, count in self.samples.items():
+            stage_samples[stack.split(";", 1)[0][len("stage:"):]] += count
+
+        report = {
+            "wall_seconds": round(time.perf_counter() - self._started_at, 3),
+            "sample_interval": self.interval,
+            "stages": {name: stats.to_dict() for name, stats in sorted(self.stage_stats.items())},
+            "samples_per_stage": {
+                stage: {"total": total, "waiting": self.wait_samples.get(stage, 0)}
+                for stage, total in stage_samples.most_common()
+            },
+        }
+        with open(os.path.join(self.output_dir, "stages.json"), "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+        with open(os.path.join(self.output_dir, "allocations.txt"), "w", encoding="utf-8") as f:
+            snapshot_filter = [tracemalloc.Filter(False, tracemalloc.__file__)]
+            diff = end_snapshot.filter_traces(snapshot_filter).compare_to(
+                self._start_snapshot.filter_traces(snapshot_filter), "lineno"
+            )
+            f.write(f"Top {self.top_n} allocation sites (growth since start)\n")
+            for stat in diff[:self.top_n]:
+                f.write(f"{stat}\n")
+
+            f.write(f"\nTop {self.top_n} live allocation sites at end\n")
+            for stat in end_snapshot.filter_traces(snapshot_filter).statistics("lineno")[:self.top_n]:
+                f.write(f"{stat}\n")
+
+        print(f"📈 Profile written to {self.output_dir}")
+
+@contextmanager
+def profiled_run(enabled=True, output_dir="profiles", **kwargs):
+    """Profile the enclosed block when enabled; otherwise a no-op"""
+    if not enabled:
+        yield None
+        return
+
+    profiler = Profiler(output_dir=output_dir, **kwargs)
+    profiler.start()
+    try:
+        yield profiler
+    finally:
+        profiler.stop()